@@ -0,0 +1,37 @@
+"""
+Compares two benchmark result files and prints per-case median deltas.
+
+    python -m benchmarks.compare before.json after.json [--threshold 5]
+"""
+import argparse
+import json
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return {(r["name"], r["case"]): r for r in json.load(f)["results"]}
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=5.0, help="Only flag changes larger than this many percent")
+    args = parser.parse_args(argv)
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    print(f"{'benchmark':<28} {'case':<32} {'base ms':>10} {'new ms':>10} {'change':>9}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[key]["median_ms"], candidate[key]["median_ms"]
+        change = (after - before) / before * 100 if before else 0.0
+        flag = "" if abs(change) < args.threshold else ("  slower" if change > 0 else "  faster")
+        print(f"{key[0]:<28} {key[1]:<32} {before:>10.2f} {after:>10.2f} {change:>8.1f}%{flag}")
+
+    for key in sorted(baseline.keys() - candidate.keys()):
+        print(f"{key[0]:<28} {key[1]:<32} only in baseline")
+    for key in sorted(candidate.keys() - baseline.keys()):
+        print(f"{key[0]:<28} {key[1]:<32} only in candidate")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,181 @@
+"""
+Synthetic resume / JD corpus for the benchmarks.
+
+Everything is generated deterministically from a seed with PyMuPDF, so two
+runs on the same commit see byte-identical inputs.
+"""
+import random
+from dataclasses import dataclass
+from typing import Dict, List
+
+import fitz  # PyMuPDF
+
+from utils import skill_taxonomy
+
+# Base-14 font families: Helvetica / Times are ATS friendly, Courier is not
+FONT_FAMILIES = {
+    "helvetica": ("helv", "hebo"),
+    "times": ("tiro", "tibo"),
+    "courier": ("cour", "cobo"),
+}
+
+SECTIONS = ["Summary", "Experience", "Projects", "Education", "Skills", "Certifications"]
+
+FILLER = (
+    "Designed and shipped {skill} services used by {n} customers",
+    "Reduced p95 latency by {n}% by profiling {skill} hot paths",
+    "Led a team of {n} engineers migrating legacy systems to {skill}",
+    "Built CI pipelines and observability for {skill} deployments",
+    "Mentored {n} junior developers on {skill} best practices",
+    "Owned on-call for {skill} clusters serving {n}k requests per second",
+)
+
+JD_FILLER = (
+    "You will collaborate with product and design to deliver features end to end.",
+    "We value ownership, clear communication and a bias for action.",
+    "The role includes participating in code reviews and on-call rotations.",
+    "Experience mentoring engineers and driving technical decisions is a plus.",
+)
+
+
+@dataclass
+class ResumeCase:
+    name: str
+    pages: int
+    layout: str
+    font: str
+    images: int
+    pdf_bytes: bytes
+
+
+@dataclass
+class LayoutCase:
+    """A resume with the structural checks the analyzer must report for it."""
+    name: str
+    pdf_bytes: bytes
+    expected: Dict[str, bool]
+
+
+@dataclass
+class JDCase:
+    name: str
+    skills: int
+    text: str
+
+
+def _skills(rng: random.Random, count: int) -> List[str]:
+    pool = sorted(skill_taxonomy.CATEGORY_OF)
+    return rng.sample(pool, min(count, len(pool)))
+
+
+def _image_pixmap(size: int, shade: int) -> fitz.Pixmap:
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, size, size), False)
+    pixmap.clear_with(shade)
+    return pixmap
+
+
+def make_resume(rng: random.Random, pages: int, layout: str, font: str, images: int) -> bytes:
+    regular, bold = FONT_FAMILIES[font]
+    skills = _skills(rng, 40)
+    doc = fitz.open()
+    for page_number in range(pages):
+        page = doc.new_page(width=595, height=842)  # A4
+        columns = [(50, 545)] if layout == "single" else [(40, 200), (230, 555)]
+        for image_index in range(images if page_number == 0 else 0):
+            page.insert_image(
+                fitz.Rect(470 - image_index * 70, 30, 530 - image_index * 70, 90),
+                pixmap=_image_pixmap(96, 120 + image_index * 30),
+            )
+        for column_left, column_right in columns:
+            y = 110
+            for section in SECTIONS:
+                page.insert_text((column_left, y), section.upper(), fontname=bold, fontsize=12)
+                y += 18
+                for _ in range(rng.randint(3, 6)):
+                    line = rng.choice(FILLER).format(skill=rng.choice(skills), n=rng.randint(2, 90))
+                    max_chars = int((column_right - column_left) / 4.6)
+                    page.insert_text((column_left + 8, y), "- " + line[:max_chars], fontname=regular, fontsize=9.5)
+                    y += 13
+                    if y > 800:
+                        break
+                y += 8
+                if y > 790:
+                    break
+    pdf_bytes = doc.tobytes(garbage=3, deflate=True, no_new_id=True)
+    doc.close()
+    return pdf_bytes
+
+
+def make_entry_resume(rng: random.Random, entries: int = 6) -> bytes:
+    """
+    A one-column resume whose jobs open with "Title, Company · City · Dates"
+    lines, each part at its own tab stop, followed by bullet points.
+    """
+    skills = _skills(rng, 20)
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    page.insert_text((50, 60), "Jane Doe", fontname="hebo", fontsize=18)
+    page.insert_text((50, 100), "EXPERIENCE", fontname="hebo", fontsize=12)
+    y = 118
+    for index in range(entries):
+        start = 2010 + 2 * index
+        page.insert_text((50, y), f"Backend Engineer, Company {index} ·", fontname="hebo", fontsize=10)
+        page.insert_text((300, y), "Berlin, DE ·", fontname="helv", fontsize=10)
+        page.insert_text((480, y), f"{start} - {start + 2}", fontname="helv", fontsize=10)
+        y += 14
+        for _ in range(3):
+            line = rng.choice(FILLER).format(skill=rng.choice(skills), n=rng.randint(2, 90))
+            page.insert_text((58, y), "- " + line, fontname="helv", fontsize=9.5)
+            y += 13
+        y += 8
+    pdf_bytes = doc.tobytes(garbage=3, deflate=True, no_new_id=True)
+    doc.close()
+    return pdf_bytes
+
+
+def layout_cases(seed: int = 1234) -> List[LayoutCase]:
+    """Layouts the structural checks have got wrong before."""
+    rng = random.Random(seed)
+    return [
+        LayoutCase(
+            name="title-city-dates-entries",
+            pdf_bytes=make_entry_resume(rng),
+            expected={"column": True, "no tables": True},
+        ),
+    ]
+
+
+def make_jd(rng: random.Random, skill_count: int) -> str:
+    skills = _skills(rng, skill_count)
+    lines = [f"Senior Backend Engineer ({rng.randint(3, 8)}+ years of experience)", ""]
+    for start in range(0, len(skills), 4):
+        chunk = skills[start:start + 4]
+        lines.append(f"Hands-on experience with {', '.join(chunk)} in production.")
+        lines.append(rng.choice(JD_FILLER))
+    return "\n".join(lines)
+
+
+def build_corpus(seed: int = 1234, quick: bool = False):
+    """Returns (resume_cases, jd_cases) covering the benchmark matrix."""
+    rng = random.Random(seed)
+    page_counts = (1, 3) if quick else (1, 2, 5, 10)
+    layouts = ("single", "two_column")
+    fonts = ("helvetica",) if quick else tuple(FONT_FAMILIES)
+    image_counts = (0, 2)
+
+    resumes = []
+    for pages in page_counts:
+        for layout in layouts:
+            for font in fonts:
+                for images in image_counts:
+                    resumes.append(ResumeCase(
+                        name=f"{pages}p-{layout}-{font}-{images}img",
+                        pages=pages, layout=layout, font=font, images=images,
+                        pdf_bytes=make_resume(rng, pages, layout, font, images),
+                    ))
+
+    jds = [
+        JDCase(name=f"jd-{count}-skills", skills=count, text=make_jd(rng, count))
+        for count in ((8, 40) if quick else (8, 25, 60, 120))
+    ]
+    return resumes, jds
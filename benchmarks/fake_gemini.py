@@ -0,0 +1,98 @@
+"""
+In-process stand-in for google.generativeai used by the benchmarks.
+
+install() swaps genai.GenerativeModel for a stub with configurable latency,
+so end-to-end timings measure our code plus a fixed, known upstream delay
+instead of network jitter and API quota.
+"""
+import asyncio
+import json
+import os
+import time
+
+import google.generativeai as genai
+
+from utils import local_structurer
+
+CANNED_NARRATIVE = {
+    "resumeAnalysis": {
+        "overallAssessment": "Synthetic benchmark narrative.",
+        "detailedBreakdown": {
+            "atsCompatibilityScore": {"score": 80, "analysis": "n/a", "recommendation": "n/a"},
+            "keywordAnalysis": {"matchPercentage": 50, "missingKeywords": [], "analysis": "n/a", "recommendation": "n/a"},
+        },
+        "summaryOfKeyRecommendations": {},
+    }
+}
+
+
+class _Usage:
+    def __init__(self, prompt: str, text: str):
+        # Rough 4-characters-per-token estimate, good enough for metrics
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(text) // 4
+
+
+class _Response:
+    def __init__(self, text: str, prompt: str = ""):
+        self.text = text
+        self.usage_metadata = _Usage(prompt, text)
+
+
+class _StreamResponse:
+    def __init__(self, text: str, prompt: str, latency: float, chunk_size: int = 64):
+        self._chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        self._latency = latency
+        self.usage_metadata = _Usage(prompt, text)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        per_chunk = self._latency / max(len(self._chunks), 1)
+        for chunk in self._chunks:
+            await asyncio.sleep(per_chunk)
+            yield _Response(chunk)
+
+
+def respond(model_name: str, prompt: str, response_bytes: int = 0) -> str:
+    """
+    Deterministic model output for a prompt: Flash gets the local structurer's
+    parse of the JD keywords, Pro the canned narrative, padded to roughly
+    response_bytes when that is larger.
+    """
+    if "flash" in model_name:
+        # The JD prompt ends with the raw keyword JSON; structure it locally
+        raw_keywords = json.loads(prompt[prompt.index("{", prompt.index("# INPUT DATA TO PARSE")):])
+        return json.dumps(local_structurer.structure_keywords(raw_keywords))
+    text = json.dumps(CANNED_NARRATIVE)
+    if response_bytes > len(text):
+        narrative = json.loads(text)
+        narrative["resumeAnalysis"]["overallAssessment"] += " " + "x" * (response_bytes - len(text))
+        text = json.dumps(narrative)
+    return text
+
+
+def install(flash_latency: float = 0.3, pro_latency: float = 2.0) -> None:
+    """Replaces the Gemini client with the stub for the rest of the process."""
+    latencies = {"flash": flash_latency, "pro": pro_latency}
+
+    class FakeGenerativeModel:
+        def __init__(self, model_name, *args, **kwargs):
+            self.model_name = model_name
+            self.latency = latencies["flash" if "flash" in model_name else "pro"]
+
+        def generate_content(self, prompt, **kwargs):
+            time.sleep(self.latency)
+            return _Response(respond(self.model_name, prompt), prompt)
+
+        async def generate_content_async(self, prompt, stream=False, **kwargs):
+            text = respond(self.model_name, prompt)
+            if stream:
+                return _StreamResponse(text, prompt, self.latency)
+            await asyncio.sleep(self.latency)
+            return _Response(text, prompt)
+
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark-fake-key")
+    genai.configure = lambda *args, **kwargs: None
+    genai.GenerativeModel = FakeGenerativeModel
@@ -0,0 +1,163 @@
+"""
+Local HTTP stand-in for the Gemini generateContent REST API.
+
+Serves generateContent and streamGenerateContent (alt=sse) for any model
+with injectable latency, jitter, error rate and response size, so the app
+can be load tested end to end without spending API quota:
+
+    python -m benchmarks.gemini_standin --port 8765 --pro-latency 8 --error-rate 0.02
+    GEMINI_TRANSPORT=rest GEMINI_API_BASE_URL=http://127.0.0.1:8765 \\
+        GEMINI_API_KEY=standin uvicorn main:app
+
+Settings can be changed while it runs with PUT /standin/config (JSON body
+with any StandinConfig field); GET /standin/stats returns request counts.
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import random
+from collections import Counter
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from benchmarks.fake_gemini import respond
+
+STATUS_NAMES = {429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE", 504: "DEADLINE_EXCEEDED"}
+
+
+@dataclasses.dataclass
+class StandinConfig:
+    flash_latency: float = 0.4      # seconds per Flash call
+    pro_latency: float = 6.0        # seconds per Pro call (spread over the stream)
+    jitter: float = 0.2             # +/- fraction applied to each latency
+    error_rate: float = 0.0         # fraction of calls that fail
+    error_status: int = 429         # HTTP status of injected failures
+    retry_after: float = 1.0        # Retry-After seconds sent with 429s
+    response_bytes: int = 0         # pad Pro responses to about this size
+    stream_chunk_chars: int = 256
+    seed: int = 0
+
+
+config = StandinConfig()
+stats = Counter()
+_rng = random.Random(config.seed)
+
+
+def _latency(model: str) -> float:
+    base = config.flash_latency if "flash" in model else config.pro_latency
+    return max(0.0, base * (1 + _rng.uniform(-config.jitter, config.jitter)))
+
+
+def _payload(model: str, text: str, prompt: str, final: bool = True) -> dict:
+    payload = {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": text}]},
+            "index": 0,
+            **({"finishReason": "STOP"} if final else {}),
+        }],
+        "modelVersion": model,
+    }
+    if final:
+        # Same rough 4-characters-per-token estimate as the in-process fake
+        payload["usageMetadata"] = {
+            "promptTokenCount": len(prompt) // 4,
+            "candidatesTokenCount": len(text) // 4,
+            "totalTokenCount": (len(prompt) + len(text)) // 4,
+        }
+    return payload
+
+
+def _injected_error():
+    if _rng.random() >= config.error_rate:
+        return None
+    headers = {"Retry-After": f"{config.retry_after:g}"} if config.error_status == 429 else {}
+    body = {"error": {
+        "code": config.error_status,
+        "message": "Injected failure from the Gemini stand-in",
+        "status": STATUS_NAMES.get(config.error_status, "UNKNOWN"),
+    }}
+    return JSONResponse(body, status_code=config.error_status, headers=headers)
+
+
+async def generate(request: Request):
+    model, _, method = request.path_params["target"].partition(":")
+    body = await request.json()
+    prompt = "".join(part.get("text", "") for part in body["contents"][-1]["parts"])
+    stats[f"{model}:{method}"] += 1
+
+    error = _injected_error()
+    if error is not None:
+        await asyncio.sleep(_latency(model) * 0.1)
+        stats[f"{model}:error"] += 1
+        return error
+
+    text = respond(model, prompt, config.response_bytes)
+    if method == "generateContent":
+        await asyncio.sleep(_latency(model))
+        return JSONResponse(_payload(model, text, prompt))
+    if method != "streamGenerateContent":
+        return JSONResponse({"error": {"code": 404, "message": f"Unknown method {method}"}}, status_code=404)
+
+    size = config.stream_chunk_chars
+    chunks = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+    per_chunk = _latency(model) / len(chunks)
+
+    async def events():
+        for index, chunk in enumerate(chunks):
+            await asyncio.sleep(per_chunk)
+            final = index == len(chunks) - 1
+            yield f"data: {json.dumps(_payload(model, chunk, prompt, final))}\r\n\r\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+async def update_config(request: Request):
+    global _rng
+    changes = await request.json()
+    for key, value in changes.items():
+        if not hasattr(config, key):
+            return JSONResponse({"error": f"Unknown setting '{key}'"}, status_code=400)
+        setattr(config, key, type(getattr(config, key))(value))
+    if "seed" in changes:
+        _rng = random.Random(config.seed)
+    return JSONResponse(dataclasses.asdict(config))
+
+
+async def get_config(request: Request):
+    return JSONResponse(dataclasses.asdict(config))
+
+
+async def get_stats(request: Request):
+    return JSONResponse(dict(stats))
+
+
+app = Starlette(routes=[
+    Route("/v1beta/models/{target}", generate, methods=["POST"]),
+    Route("/standin/config", get_config, methods=["GET"]),
+    Route("/standin/config", update_config, methods=["PUT"]),
+    Route("/standin/stats", get_stats, methods=["GET"]),
+])
+
+
+def main_cli(argv=None):
+    global _rng
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    for field in dataclasses.fields(StandinConfig):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=field.type, default=field.default)
+    args = parser.parse_args(argv)
+
+    for field in dataclasses.fields(StandinConfig):
+        setattr(config, field.name, getattr(args, field.name))
+    _rng = random.Random(config.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main_cli()
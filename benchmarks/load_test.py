@@ -0,0 +1,223 @@
+"""
+Closed-loop load generator for the running API.
+
+Ramps concurrency against /ats/analyse and/or /jds/parse_text and reports,
+per step, throughput, p50/p95/p99 latency and error rate, so we can see
+where one worker's latency collapses. With --spawn it starts the Gemini
+stand-in and a single uvicorn worker wired to it, so no API quota is used:
+
+    python -m benchmarks.load_test --spawn --scenario analyse --concurrency 1,4,16,32
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --scenario parse_text
+
+--cache-mode miss (default) makes every JD unique so each request does the
+full pipeline; hit reuses one JD and resume to measure the cached path.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks import corpus
+
+SCENARIOS = ("analyse", "parse_text", "mixed")
+
+
+def percentile(ordered, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+class Workload:
+    """Builds request payloads from the synthetic corpus."""
+
+    def __init__(self, scenario: str, cache_mode: str, seed: int):
+        self.resumes, self.jds = corpus.build_corpus(seed=seed, quick=True)
+        self.scenario = scenario
+        self.cache_mode = cache_mode
+        self.counter = itertools.count()
+        self.rng = random.Random(seed)
+
+    def _jd_text(self) -> str:
+        jd = self.jds[-1] if self.cache_mode == "hit" else self.rng.choice(self.jds)
+        if self.cache_mode == "hit":
+            return jd.text
+        # A unique trailer changes the content hash without changing the skills
+        return f"{jd.text}\nRequisition {next(self.counter)}"
+
+    def next_request(self):
+        kind = self.scenario
+        if kind == "mixed":
+            kind = self.rng.choice(("analyse", "parse_text"))
+        if kind == "parse_text":
+            return kind, {"url": "/jds/parse_text", "json": {"jd": self._jd_text()}}
+        resume = self.resumes[0] if self.cache_mode == "hit" else self.rng.choice(self.resumes)
+        return kind, {
+            "url": "/ats/analyse",
+            "files": {"pdf": (f"{resume.name}.pdf", resume.pdf_bytes, "application/pdf")},
+            "data": {"jd": self._jd_text()},
+        }
+
+
+async def run_step(client: httpx.AsyncClient, workload: Workload, concurrency: int, duration: float, warmup: float):
+    """
+    Every request sent during the measured window counts, however late it
+    finishes: the step waits for the stragglers, whose latencies are exactly
+    the tail being measured. "late" is how many finished after the window.
+    """
+    samples, errors, late = [], {}, 0
+    start = time.perf_counter()
+    measure_from, stop_at = start + warmup, start + warmup + duration
+
+    async def worker():
+        nonlocal late
+        while time.perf_counter() < stop_at:
+            kind, request = workload.next_request()
+            sent = time.perf_counter()
+            try:
+                response = await client.post(**request)
+                status = str(response.status_code) if response.is_error else None
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            done = time.perf_counter()
+            if sent < measure_from:
+                continue
+            samples.append(done - sent)
+            late += done > stop_at
+            if status is not None:
+                errors[status] = errors.get(status, 0) + 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    ordered = sorted(samples)
+    failed = sum(errors.values())
+    return {
+        "concurrency": concurrency,
+        "requests": len(ordered),
+        "late": late,
+        "throughput_rps": round(len(ordered) / duration, 3),
+        "error_rate": round(failed / len(ordered), 4) if ordered else 0.0,
+        "errors": errors,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 1),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 1),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+    }
+
+
+def _wait_until_up(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.25)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def spawn_stack(args):
+    """Starts the Gemini stand-in and one app worker; returns (base_url, processes)."""
+    standin_url = f"http://127.0.0.1:{args.standin_port}"
+    standin = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.gemini_standin", "--port", str(args.standin_port),
+        "--flash-latency", str(args.flash_latency), "--pro-latency", str(args.pro_latency),
+        "--error-rate", str(args.error_rate), "--response-bytes", str(args.response_bytes),
+    ])
+    env = dict(
+        os.environ,
+        GEMINI_TRANSPORT="rest",
+        GEMINI_API_BASE_URL=standin_url,
+        GEMINI_API_KEY="standin",
+    )
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.app_port), "--log-level", "warning"],
+        env=env,
+    )
+    processes = [app, standin]
+    try:
+        _wait_until_up(f"{standin_url}/standin/config")
+        _wait_until_up(f"http://127.0.0.1:{args.app_port}/")
+    except Exception:
+        for process in processes:
+            process.terminate()
+        raise
+    return f"http://127.0.0.1:{args.app_port}", processes
+
+
+async def ramp(args, base_url: str):
+    workload = Workload(args.scenario, args.cache_mode, args.seed)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    steps = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout, limits=limits) as client:
+        for concurrency in args.concurrency:
+            step = await run_step(client, workload, concurrency, args.duration, args.warmup)
+            steps.append(step)
+            print(
+                f"c={step['concurrency']:<4} rps={step['throughput_rps']:<8} "
+                f"p50={step['p50_ms']:<8} p95={step['p95_ms']:<8} p99={step['p99_ms']:<8} "
+                f"errors={step['error_rate']:.2%}",
+                file=sys.stderr,
+            )
+            if args.stop_p95_ms and step["p95_ms"] > args.stop_p95_ms:
+                print(f"p95 above {args.stop_p95_ms} ms, stopping the ramp", file=sys.stderr)
+                break
+    return steps
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="Running app to load (ignored with --spawn)")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="analyse")
+    parser.add_argument("--cache-mode", choices=("miss", "hit"), default="miss")
+    parser.add_argument("--concurrency", type=lambda s: [int(c) for c in s.split(",")], default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per concurrency step")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds at the start of each step")
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--stop-p95-ms", type=float, default=None, help="Stop ramping once p95 exceeds this")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", default="load_test_results.json")
+    spawn = parser.add_argument_group("spawned stack (--spawn)")
+    spawn.add_argument("--spawn", action="store_true", help="Start the Gemini stand-in and one app worker")
+    spawn.add_argument("--app-port", type=int, default=8100)
+    spawn.add_argument("--standin-port", type=int, default=8765)
+    spawn.add_argument("--flash-latency", type=float, default=0.4)
+    spawn.add_argument("--pro-latency", type=float, default=6.0)
+    spawn.add_argument("--error-rate", type=float, default=0.0)
+    spawn.add_argument("--response-bytes", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    processes = []
+    base_url = args.base_url
+    if args.spawn:
+        base_url, processes = spawn_stack(args)
+    try:
+        steps = asyncio.run(ramp(args, base_url))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "base_url": base_url,
+            "config": vars(args),
+        },
+        "steps": steps,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(steps)} steps to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main_cli()
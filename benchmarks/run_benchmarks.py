@@ -0,0 +1,190 @@
+"""
+Reproducible benchmarks for the resume/JD pipeline.
+
+Times each stage (PDF parsing, text extraction, spaCy keyword extraction,
+local JD structuring, structural analysis) over a synthetic corpus, plus the
+end-to-end /ats/analyse handler against a fake Gemini backend with fixed
+latency. Results are written as JSON; compare two runs with
+benchmarks/compare.py.
+
+    python -m benchmarks.run_benchmarks --output before.json
+    python -m benchmarks.run_benchmarks --quick --pro-latency 0 --output after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks import corpus, fake_gemini
+
+
+def summarize(name: str, case: str, samples) -> dict:
+    ordered = sorted(samples)
+    return {
+        "name": name,
+        "case": case,
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def time_call(fn, *args, repeat: int, warmup: int = 1):
+    for _ in range(warmup):
+        fn(*args)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_stages(resumes, jds, repeat: int):
+    from utils import atsAanalyzer, jd_keyword_extractor, local_structurer, pdf_document, pdf_text_extractor
+
+    results = []
+    reference_jd = local_structurer.structure_keywords(jd_keyword_extractor.extract_keywords(jds[-1].text))
+
+    for resume in resumes:
+        results.append(summarize("pdf_parse", resume.name, time_call(pdf_document.parse_pdf, resume.pdf_bytes, repeat=repeat)))
+        results.append(summarize(
+            "extract_text_from_pdf", resume.name,
+            time_call(pdf_text_extractor.extract_text_from_bytes, resume.pdf_bytes, repeat=repeat),
+        ))
+        document = pdf_document.parse_pdf(resume.pdf_bytes)
+        results.append(summarize(
+            "analyze_resume", resume.name,
+            time_call(atsAanalyzer.analyze_resume_sync, document, reference_jd, False, repeat=repeat),
+        ))
+
+    for jd in jds:
+        results.append(summarize(
+            "extract_keywords_simple", jd.name,
+            time_call(jd_keyword_extractor.extract_keywords, jd.text, repeat=repeat),
+        ))
+        raw_keywords = jd_keyword_extractor.extract_keywords(jd.text)
+        results.append(summarize(
+            "local_structurer", jd.name,
+            time_call(local_structurer.structure_keywords, raw_keywords, repeat=repeat),
+        ))
+    results.append(summarize(
+        "extract_keywords_batch", f"{len(jds)}_jds",
+        time_call(jd_keyword_extractor.extract_keywords_batch, [jd.text for jd in jds], repeat=repeat),
+    ))
+    return results
+
+
+def check_layouts(cases) -> list:
+    """The structural checks that differ from each layout case's expectations."""
+    from utils import atsAanalyzer, pdf_document
+
+    failures = []
+    for case in cases:
+        result = atsAanalyzer.analyze_resume_sync(pdf_document.parse_pdf(case.pdf_bytes), None, False)
+        for check, expected in case.expected.items():
+            if result.get(check) != expected:
+                failures.append(f"{case.name}: '{check}' is {result.get(check)}, expected {expected}")
+    return failures
+
+
+async def bench_end_to_end(resumes, jds, repeat: int):
+    import httpx
+
+    import main
+    from utils import analysis_cache, executor, jd_pipeline
+
+    results = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+        async def post(resume, jd):
+            response = await client.post(
+                "/ats/analyse",
+                files={"pdf": (f"{resume.name}.pdf", resume.pdf_bytes, "application/pdf")},
+                data={"jd": jd.text},
+            )
+            response.raise_for_status()
+
+        for resume in resumes:
+            jd = jds[len(jds) // 2]
+            for label, clear_jd in (("cold", True), ("warm_jd_cache", False)):
+                await post(resume, jd)  # warm-up: executor processes, spaCy, matchers
+                samples = []
+                for _ in range(repeat):
+                    analysis_cache.analysis_cache.clear()
+                    if clear_jd:
+                        jd_pipeline.jd_cache.clear()
+                    start = time.perf_counter()
+                    await post(resume, jd)
+                    samples.append(time.perf_counter() - start)
+                results.append(summarize(f"ats_analyse_{label}", resume.name, samples))
+    executor.shutdown()
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed iterations per case")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--quick", action="store_true", help="Smaller corpus for a fast smoke run")
+    parser.add_argument("--flash-latency", type=float, default=0.3, help="Fake Gemini Flash latency (s)")
+    parser.add_argument("--pro-latency", type=float, default=2.0, help="Fake Gemini Pro latency (s)")
+    parser.add_argument("--skip-e2e", action="store_true", help="Only run the per-stage benchmarks")
+    args = parser.parse_args(argv)
+
+    # No real network calls and no cross-run cache reuse
+    fake_gemini.install(args.flash_latency, args.pro_latency)
+    os.environ.pop("JD_CACHE_DB", None)
+    os.environ.pop("ANALYSIS_CACHE_URL", None)
+
+    # Timings of an analyzer that gets known layouts wrong are not worth recording
+    failures = check_layouts(corpus.layout_cases(args.seed))
+    if failures:
+        sys.exit("Layout regressions:\n" + "\n".join(failures))
+
+    resumes, jds = corpus.build_corpus(seed=args.seed, quick=args.quick)
+    print(f"Corpus: {len(resumes)} resumes, {len(jds)} JDs", file=sys.stderr)
+
+    results = bench_stages(resumes, jds, args.repeat)
+    if not args.skip_e2e:
+        results += asyncio.run(bench_end_to_end(resumes, jds, args.repeat))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": vars(args),
+            "executor": os.getenv("ATS_EXECUTOR", "process"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,15 +1,35 @@
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
 # Import your routers
-from routers import pdf_router, jd_router, ats_router
+from routers import pdf_router, jd_router, ats_router, index_router, admin_router
+from utils import compression, executor, gemini_client, ingest, jobs, metrics, pdf_document, prefork, profiling, warmup
 
 PORT = int(os.getenv("PORT", 8000))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # CPU pool lives for the whole app; workers load spaCy in their initializer
+    executor.get_executor()
+    # Warm the CPU pool before uvicorn starts accepting connections
+    await warmup.warm_up()
+    jobs.job_queue.start()
+    yield
+    warmup.drain()
+    await jobs.job_queue.stop()
+    executor.shutdown()
+    await gemini_client.aclose()
+
 app = FastAPI(
     title="My Backend API",
     description="A simple FastAPI service with PDF text extraction",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson renders what the routes' response models have already serialized
+    default_response_class=ORJSONResponse,
 )
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -19,15 +39,58 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Cache", "Retry-After", "X-Profile-Id"],
 )
+app.add_middleware(compression.CompressionMiddleware)
+# Oversized request bodies get a 413 before (or while) they are read
+app.add_middleware(ingest.UploadLimitMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+# Opt-in per-request profiling, only active when PROFILING_TOKEN is set
+app.add_middleware(profiling.ProfilingMiddleware)
+
+# Gemini admission control sheds load with a fast 429/503 + Retry-After
+@app.exception_handler(gemini_client.GeminiOverloaded)
+async def gemini_overloaded_handler(request: Request, exc: gemini_client.GeminiOverloaded):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+# Uploads over the ingest limits, or that cannot be analyzed, get a clear 413/422
+@app.exception_handler(pdf_document.PDFRejected)
+async def pdf_rejected_handler(request: Request, exc: pdf_document.PDFRejected):
+    metrics.UPLOAD_REJECTIONS.inc(reason=exc.reason)
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
 
 # Health check endpoint
 @app.get("/", tags=["Health Check"])
 async def root():
     return {"message": "Server is running"}
 
+# Liveness: the process is up and serving its event loop
+@app.get("/health/live", tags=["Health Check"])
+async def liveness():
+    return {"status": "alive"}
+
+# Readiness: warmup finished and the worker is not shutting down
+@app.get("/health/ready", tags=["Health Check"])
+async def readiness():
+    body = warmup.state.as_dict()
+    return JSONResponse(status_code=200 if body["ready"] else 503, content=body)
+
+# Prometheus metrics for this worker process
+@app.get("/metrics", tags=["Health Check"], response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Register routers
 app.include_router(pdf_router.router)
 app.include_router(jd_router.router)
 app.include_router(ats_router.router)
+app.include_router(index_router.router)
+app.include_router(admin_router.router)
 
+# Production entry point: python main.py (WEB_CONCURRENCY sets the worker count)
+if __name__ == "__main__":
+    prefork.serve(app, port=PORT)
@@ -0,0 +1,80 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from pydantic import BaseModel, Field
+from utils import profiling
+
+
+def _require_token(x_profile_token: Optional[str] = Header(None)):
+    # Without PROFILING_TOKEN the admin endpoints do not exist
+    if not profiling.PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiling.token_valid(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Profile-Token")
+
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(_require_token)])
+
+
+class ProfilingSettings(BaseModel):
+    sample_rate: Optional[float] = Field(None, ge=0, le=1, description="Share of requests to profile")
+    slow_seconds: Optional[float] = Field(None, ge=0, description="Sampled requests faster than this are discarded")
+
+
+def _settings() -> dict:
+    return {
+        "sample_rate": profiling.sampler.sample_rate,
+        "slow_seconds": profiling.sampler.slow_seconds,
+        "max_per_minute": profiling.PROFILE_MAX_PER_MINUTE,
+        "keep": profiling.PROFILE_KEEP,
+    }
+
+
+# --- Profiling toggle (per worker process) ---
+@router.get("/profiling")
+async def get_profiling_settings():
+    return _settings()
+
+
+@router.put("/profiling")
+async def update_profiling_settings(settings: ProfilingSettings):
+    if settings.sample_rate is not None:
+        profiling.sampler.sample_rate = settings.sample_rate
+    if settings.slow_seconds is not None:
+        profiling.sampler.slow_seconds = settings.slow_seconds
+    return _settings()
+
+
+# --- Stored profiles ---
+def _get_profile(profile_id: str) -> dict:
+    profile = profiling.profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found on this worker")
+    return profile
+
+
+@router.get("/profiles")
+async def list_profiles():
+    return {"profiles": profiling.profile_store.list()}
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    profile = _get_profile(profile_id)
+    stages = [
+        {key: value for key, value in stage.items() if key != "pstats"}
+        for stage in profile["stages"]
+    ]
+    return {**profile, "stages": stages}
+
+
+@router.get("/profiles/{profile_id}/stages/{index}.prof")
+async def download_stage_profile(profile_id: str, index: int):
+    """The stage's CPU profile in pstats format (python -m pstats, snakeviz)."""
+    stages = _get_profile(profile_id)["stages"]
+    if not 0 <= index < len(stages):
+        raise HTTPException(status_code=404, detail="Stage not found in this profile")
+    return Response(
+        content=stages[index]["pstats"],
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}-{index}.prof"'},
+    )
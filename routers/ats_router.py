@@ -1,10 +1,11 @@
 import os
-import json
-from fastapi import APIRouter, File, UploadFile, HTTPException, status, Form
-from fastapi.responses import JSONResponse
-from utils import jd_keyword_extractor, pdf_text_extractor, atsAanalyzer, sendGemini
-from io import BytesIO
-import google.generativeai as genai
+import asyncio
+from typing import List, Literal, Optional
+from fastapi import APIRouter, File, UploadFile, HTTPException, status, Form, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import orjson
+from utils import atsAanalyzer, jd_pipeline, executor, resume_narrative, analysis_cache, metrics, gemini_client, jobs, deadline, profiling, schemas, ingest, pdf_document
 
 # --- Router Setup ---
 router = APIRouter(
@@ -12,150 +13,435 @@ router = APIRouter(
     tags=["ATS"]
 )
 
-@router.post("/analyse", status_code=status.HTTP_201_CREATED)
-async def analyse_resume(pdf: UploadFile = File(...), jd: str = Form(...)):
+JDStructurer = Optional[Literal["gemini", "local", "auto"]]
+
+# --- Batch limits ---
+MAX_BATCH_RESUMES = int(os.getenv("MAX_BATCH_RESUMES", 500))
+BATCH_NARRATIVE_CONCURRENCY = int(os.getenv("BATCH_NARRATIVE_CONCURRENCY", 4))
+# Each batch narrative gets this long from when it takes a slot
+BATCH_NARRATIVE_SECONDS = float(os.getenv("BATCH_NARRATIVE_SECONDS", 30))
+
+def _require_jd(jd: str) -> str:
+    jd_text = jd.strip()
+    if not jd_text:
+        raise HTTPException(status_code=422, detail="Job description cannot be empty")
+    return jd_text
+
+
+async def _analyze_pdf(pdf_bytes: bytes, parsed_jd) -> dict:
+    """Runs atsAanalyzer.analyze_pdf_bytes on the executor and records its metrics."""
+    metrics.PDF_BYTES.observe(len(pdf_bytes))
+    with metrics.stage("pdf_analysis"):
+        analysis = await executor.run_cpu(atsAanalyzer.analyze_pdf_bytes, pdf_bytes, parsed_jd)
+    metrics.PDF_PAGES.observe(analysis["pages"])
+    metrics.PAGE_CACHE_LOOKUPS.inc(analysis["cached_pages"], result="hit")
+    metrics.PAGE_CACHE_LOOKUPS.inc(analysis["pages"] - analysis["cached_pages"], result="miss")
+    profiling.annotate(pdf_bytes=len(pdf_bytes), **analysis["document"])
+    for stage, seconds in analysis["timings"].items():
+        metrics.observe_stage(stage, seconds)
+    return analysis
+
+
+async def _structure_jd(jd_text: str, structurer: Optional[str], budget: deadline.RequestBudget) -> dict:
     """
-    Analyzes a resume PDF against a job description.
+    Structures the JD within the budget's JD slice. A Gemini parse that is
+    too slow, fails or comes back as an error is replaced by the local
+    structurer's result, recorded as a degradation on the budget.
     """
-    
-    # === STEP 1: Initial Data Processing ===
+    if (structurer or jd_pipeline.JD_STRUCTURER) == "local":
+        return await jd_pipeline.structure_jd(jd_text, "local")
     try:
-        # Extract text from PDF
-        pdf_text = pdf_text_extractor.extract_text_from_pdf(pdf)
-        if not pdf_text.strip():
-            raise HTTPException(status_code=422, detail="No text could be extracted from the PDF")
-        
-        # Parse JD text
-        jd_text = jd.strip()
-        if not jd_text:
-            raise HTTPException(status_code=422, detail="Job description cannot be empty")
-        
-        # Extract keywords from JD
-        raw_keywords = await jd_keyword_extractor.extract_keywords_simple(jd_text)
-        
-        # Structure keywords using a helper function
-        parsed_jd = sendGemini.parse_with_gemini(sendGemini.system_prompt, raw_keywords)
-        
-        # Reset file pointer and get bytes for analysis
-        await pdf.seek(0)
-        pdf_bytes = await pdf.read()
-        pdf_stream = BytesIO(pdf_bytes)
+        parsed_jd = await asyncio.wait_for(
+            jd_pipeline.structure_jd(jd_text, structurer, budget), budget.slice(deadline.JD_BUDGET_SHARE)
+        )
+        if "error" not in parsed_jd:
+            return parsed_jd
+        reason = "error"
+    except (asyncio.TimeoutError, *gemini_client.UPSTREAM_ERRORS) as e:
+        reason = jd_pipeline.fallback_reason(e)
+    budget.degrade("jd_structuring", reason, "local")
+    # Cut short here, the parse never reaches its own fallback: remember it for "auto"
+    jd_pipeline.remember_fallback(jd_text, reason)
+    return await jd_pipeline.structure_jd(jd_text, "local")
+
+
+async def _initial_analysis(pdf_bytes: bytes, jd_text: str, structurer: Optional[str] = None,
+                            budget: Optional[deadline.RequestBudget] = None) -> tuple:
+    """
+    Shared first stage of the analyse endpoints: structures the JD and runs
+    the structural/keyword analysis. Returns (prompt_text, analysis_result_json,
+    degradations) where prompt_text is the compacted resume text for the
+    narrative prompt.
+    """
+    budget = budget or deadline.RequestBudget(None)
+    try:
+        # Extract keywords from JD and structure them (cached per JD text)
+        with metrics.stage("jd_structuring"):
+            parsed_jd = await _structure_jd(jd_text, structurer, budget)
         
-        # Perform the initial structural and keyword analysis
-        analysis_result_json = await atsAanalyzer.analyze_resume(pdf_stream, parsed_jd, False)
+        # Parsing + structural/keyword analysis run together on the
+        # CPU executor against a single document model
+        analysis = await _analyze_pdf(pdf_bytes, parsed_jd)
+        if not analysis["text"].strip():
+            raise HTTPException(status_code=422, detail="No text could be extracted from the PDF")
+        return analysis["prompt_text"], analysis["result"], budget.degradations
         
+    except (HTTPException, gemini_client.GeminiOverloaded, pdf_document.PDFRejected):
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error during initial processing: {str(e)}")
 
 
-    # === STEP 2: Use the Original Prompt for Formatted String Output ===
-    final_prompt_template = """
-You are an expert software developer resume analyst with 10+ years of experience in technical recruiting and ATS optimization. 
-
-Given the following resume analysis data:
-{json_analysis}
-
-And the resume text:
-{resume_text}
-
-Provide a comprehensive analysis in the following JSON structure:
-
-{{
-  "resumeAnalysis": {{
-    "overallAssessment": "A comprehensive 3-4 sentence summary of the resume's current state, highlighting major strengths and critical weaknesses",
-    "detailedBreakdown": {{
-      "atsCompatibilityScore": {{
-        "score": <number between 0-100>,
-        "analysis": "Detailed explanation of why this score was given and what it means for ATS parsing",
-        "recommendation": "Specific actionable steps to improve ATS compatibility"
-      }},
-      "keywordAnalysis": {{
-        "matchPercentage": <percentage of keywords matched>,
-        "missingKeywords": ["keyword1", "keyword2", "keyword3"],
-        "analysis": "Explanation of keyword gaps and their impact",
-        "recommendation": "Specific guidance on where and how to add missing keywords with examples"
-      }},
-      "impactAndQuantification": {{
-        "quantifiedResults": <number of metrics found in resume>,
-        "analysis": "Assessment of how well achievements are quantified",
-        "recommendation": "Guidance on adding metrics using STAR/XYZ method with examples"
-      }},
-      "formattingAndReadability": {{
-        "issues": ["issue1", "issue2", "issue3"],
-        "analysis": "Explanation of formatting problems and their impact",
-        "recommendation": "Step-by-step formatting improvements"
-      }},
-      "grammarAndSpelling": {{
-        "errorCount": <estimated number of errors>,
-        "analysis": "Assessment of language quality",
-        "recommendation": "Proofreading and correction guidance"
-      }},
-      "structureAndContent": {{
-        "skillsSection": "Analysis of the skills section organization and completeness",
-        "projectsSection": "Analysis of projects section and suggestions",
-        "recommendations": ["recommendation1", "recommendation2"]
-      }}
-    }},
-    "summaryOfKeyRecommendations": {{
-      "rectifyFormattingAndProofread": {{
-        "priority": "Critical|High|Medium",
-        "action": "Detailed action to take"
-      }},
-      "aggressivelyOptimizeKeywords": {{
-        "priority": "Critical|High|Medium",
-        "action": "Detailed action to take"
-      }},
-      "quantifyAllAchievements": {{
-        "priority": "Critical|High|Medium",
-        "action": "Detailed action to take"
-      }},
-      "restructureSkillsAndProjects": {{
-        "priority": "Critical|High|Medium",
-        "action": "Detailed action to take"
-      }}
-    }}
-  }}
-}}
-
-Important guidelines:
-1. Base ATS score on the structure score from the JSON analysis
-2. Use the "keyword missing" array to populate missingKeywords
-3. Calculate keyword match percentage from keywords matched vs total keywords
-4. Be specific and actionable in all recommendations
-5. Use proper priority levels (Critical for urgent issues, High for important, Medium for nice-to-have)
-6. Provide concrete examples in recommendations
-7. Return ONLY valid JSON, no additional text
-"""
-    
-    full_prompt_with_context = final_prompt_template.format(
-        resume_text=pdf_text,
-        json_analysis=json.dumps(analysis_result_json, indent=2)
+@router.post("/analyse", status_code=status.HTTP_201_CREATED, response_model=schemas.AnalyseResponse)
+async def analyse_resume(
+    response: Response,
+    pdf: UploadFile = File(...),
+    jd: str = Form(...),
+    structurer: JDStructurer = Form(None),
+    budget_seconds: Optional[float] = Form(
+        None, gt=0, description="End-to-end latency budget; defaults to ANALYSE_BUDGET_SECONDS"
+    )
+):
+    """
+    Analyzes a resume PDF against a job description. "response" is the
+    Gemini Pro narrative, parsed and validated against schemas.Narrative.
+    Identical resume/JD pairs are served from the analysis cache (X-Cache: HIT).
+    Stages that would overrun the latency budget fall back to a cheaper
+    result (local JD structuring, no narrative); such responses carry
+    "degraded": true, the list of "degradations" and an X-Degraded header.
+    """
+    jd_text = _require_jd(jd)
+    pdf_bytes = await ingest.read_pdf(pdf)
+
+    cache_key = analysis_cache.analysis_cache_key(pdf_bytes, jd_text, structurer)
+    cached = await analysis_cache.analysis_cache.aget(cache_key)
+    if cached is not None and "response" in cached:
+        response.headers["X-Cache"] = "HIT"
+        return cached
+    response.headers["X-Cache"] = "MISS"
+
+    # Concurrent identical requests wait for the first one's result (and budget)
+    result = await analysis_cache.analysis_flights.do(
+        ("analyse", cache_key), _full_analysis, pdf_bytes, jd_text, structurer, cache_key,
+        deadline.request_budget(budget_seconds)
     )
+    if result.get("degraded"):
+        response.headers["X-Degraded"] = ",".join(item["stage"] for item in result["degradations"])
+    return result
+
 
-    # === STEP 3: Call Gemini and Return the Raw String Response ===
+async def _generate_narrative(prompt_text: str, analysis_result_json: dict,
+                              budget: deadline.RequestBudget) -> Optional[dict]:
+    """
+    The Gemini Pro narrative within what the budget has left. Returns None,
+    recorded as a degradation, when time runs out, Gemini is overloaded or
+    failing, or its output does not fit the schema.
+    """
+    remaining = budget.remaining()
+    if remaining < deadline.MIN_NARRATIVE_SECONDS:
+        budget.degrade("narrative", "timeout", "omitted")
+        return None
     try:
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise HTTPException(status_code=500, detail="GEMINI_API_KEY environment variable is not set.")
-        
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.5-pro')
-
-        gemini_response = await model.generate_content_async(
-            full_prompt_with_context,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.1,
-                response_mime_type="application/json"  # Force JSON output
+        with metrics.stage("gemini_pro_narrative"):
+            return await asyncio.wait_for(
+                resume_narrative.generate_narrative(prompt_text, analysis_result_json, deadline=remaining),
+                remaining,
             )
+    except asyncio.TimeoutError:
+        budget.degrade("narrative", "timeout", "omitted")
+    except gemini_client.GeminiOverloaded:
+        budget.degrade("narrative", "overloaded", "omitted")
+    except gemini_client.UPSTREAM_ERRORS:
+        budget.degrade("narrative", "error", "omitted")
+    except schemas.ModelOutputError:
+        budget.degrade("narrative", "invalid_output", "omitted")
+    return None
+
+
+async def _full_analysis(pdf_bytes: bytes, jd_text: str, structurer: Optional[str], cache_key: str,
+                         budget: deadline.RequestBudget) -> dict:
+    # === STEP 1: Initial Data Processing ===
+    pdf_text, analysis_result_json, degradations = await _initial_analysis(pdf_bytes, jd_text, structurer, budget)
+
+    # === STEP 2: Call Gemini Pro for the (validated) narrative ===
+    try:
+        narrative = await _generate_narrative(pdf_text, analysis_result_json, budget)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred with the Gemini API: {str(e)}")
+
+    result = {
+        "result": analysis_result_json,
+        "response": narrative
+    }
+    if degradations:
+        # Degraded results are never cached, so the next request gets a full answer
+        result["degraded"] = True
+        result["degradations"] = degradations
+    else:
+        await analysis_cache.analysis_cache.aset(cache_key, result)
+    return result
+
+
+def _sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+@router.post("/analyse_stream")
+async def analyse_resume_stream(pdf: UploadFile = File(...), jd: str = Form(...), structurer: JDStructurer = Form(None)):
+    """
+    Server-Sent Events variant of /analyse.
+    Emits `analysis` (structural/keyword result) immediately, then `chunk`
+    events with the Gemini Pro output as it is generated, then `final`
+    with the validated narrative (or `error`). Shares /analyse's cache.
+    """
+    jd_text = _require_jd(jd)
+    pdf_bytes = await ingest.read_pdf(pdf)
+
+    cache_key = analysis_cache.analysis_cache_key(pdf_bytes, jd_text, structurer)
+    cached = await analysis_cache.analysis_cache.aget(cache_key)
+    if cached is not None and "response" in cached:
+        async def cached_events():
+            yield _sse_event("analysis", cached["result"])
+            yield _sse_event("final", {"result": cached["result"], "response": cached["response"]})
+
+        return StreamingResponse(cached_events(), media_type="text/event-stream", headers=_sse_headers("HIT"))
+
+    pdf_text, analysis_result_json, degradations = await analysis_cache.analysis_flights.do(
+        ("initial", cache_key), _initial_analysis, pdf_bytes, jd_text, structurer
+    )
+
+    async def events():
+        yield _sse_event("analysis", analysis_result_json)
+        narrative_parts = []
+        try:
+            async for text in resume_narrative.stream_narrative(pdf_text, analysis_result_json):
+                narrative_parts.append(text)
+                yield _sse_event("chunk", {"text": text})
+        except gemini_client.GeminiOverloaded as e:
+            yield _sse_event("error", {"detail": e.detail, "retry_after": e.retry_after})
+            return
+        except Exception as e:
+            yield _sse_event("error", {"detail": f"An unexpected error occurred with the Gemini API: {str(e)}"})
+            return
+
+        narrative_text = "".join(narrative_parts)
+        try:
+            narrative = resume_narrative.parse_narrative(narrative_text)
+        except schemas.ModelOutputError as e:
+            yield _sse_event("error", {"detail": f"Model response was not valid JSON: {str(e)}"})
+            return
+        final = {"result": analysis_result_json, "response": narrative}
+        if degradations:
+            final.update(degraded=True, degradations=degradations)
+        else:
+            await analysis_cache.analysis_cache.aset(cache_key, final)
+        yield _sse_event("final", final)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=_sse_headers("MISS"))
+
+
+def _sse_headers(cache_status: str) -> dict:
+    return {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Cache": cache_status}
+
+
+async def _collect_batch_pdfs(pdfs: List[UploadFile]) -> List[tuple]:
+    """
+    Reads the uploaded resumes into (filename, bytes) pairs.
+    Zip archives are expanded and every .pdf inside them is included.
+    Every PDF goes through the ingest limits; zips are read from Starlette's
+    spooled file rather than loaded into memory first.
+    """
+    resumes = []
+    budget = ingest.MAX_BATCH_REQUEST_BYTES
+    for upload in pdfs:
+        filename = upload.filename or "resume.pdf"
+        if filename.lower().endswith(".zip") or upload.content_type in ("application/zip", "application/x-zip-compressed"):
+            expanded = await run_in_threadpool(ingest.expand_zip, upload.file, filename, budget)
+        else:
+            expanded = [(filename, await ingest.read_pdf(upload))]
+        budget -= sum(len(pdf_bytes) for _, pdf_bytes in expanded)
+        resumes.extend(expanded)
+
+        if len(resumes) > MAX_BATCH_RESUMES:
+            raise HTTPException(status_code=413, detail=f"A batch may contain at most {MAX_BATCH_RESUMES} resumes")
+    return resumes
+
+
+@router.post("/analyse_batch")
+async def analyse_resume_batch(
+    pdfs: List[UploadFile] = File(...),
+    jd: str = Form(...),
+    include_narrative: bool = Form(False),
+    structurer: JDStructurer = Form(None)
+):
+    """
+    Scores many resumes (PDFs and/or zip archives of PDFs) against one job description.
+    The JD is structured once; results stream back as NDJSON in completion order.
+    Each narrative has BATCH_NARRATIVE_SECONDS; like /analyse, an item whose
+    narrative is omitted (or whose JD fell back) carries "degraded" and "degradations".
+    """
+    jd_text = _require_jd(jd)
+
+    budget = deadline.RequestBudget(None)
+    try:
+        parsed_jd = await _structure_jd(jd_text, structurer, budget)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error during JD processing: {str(e)}")
+    # Results scored against a fallback JD are flagged and never cached
+    degradations = budget.degradations
+
+    resumes = await _collect_batch_pdfs(pdfs)
+    if not resumes:
+        raise HTTPException(status_code=422, detail="No PDF resumes were uploaded")
+
+    narrative_slots = asyncio.Semaphore(BATCH_NARRATIVE_CONCURRENCY)
+
+    async def score(index: int, filename: str, pdf_bytes: bytes) -> dict:
+        item = {"index": index, "filename": filename}
+        try:
+            cache_key = analysis_cache.analysis_cache_key(pdf_bytes, jd_text, structurer)
+            cached = await analysis_cache.analysis_cache.aget(cache_key)
+            if cached is not None and (not include_narrative or "response" in cached):
+                item["cache"] = "HIT"
+                item["result"] = cached["result"]
+                if include_narrative:
+                    item["response"] = cached["response"]
+                return item
+            item["cache"] = "MISS"
+
+            analysis = await _analyze_pdf(pdf_bytes, parsed_jd)
+            if not analysis["text"].strip():
+                item["error"] = "No text could be extracted from the PDF"
+                return item
+            item["result"] = analysis["result"]
+            item_degradations = list(degradations)
+            if include_narrative:
+                async with narrative_slots:
+                    narrative_budget = deadline.RequestBudget(BATCH_NARRATIVE_SECONDS)
+                    item["response"] = await _generate_narrative(analysis["prompt_text"], analysis["result"], narrative_budget)
+                item_degradations += narrative_budget.degradations
+                if not item_degradations:
+                    await analysis_cache.analysis_cache.aset(cache_key, {"result": item["result"], "response": item["response"]})
+            elif cached is None and not degradations:
+                # Structural/keyword result only; a later narrative request fills it in
+                await analysis_cache.analysis_cache.aset(cache_key, {"result": item["result"]})
+            if item_degradations:
+                item.update(degraded=True, degradations=item_degradations)
+        except Exception as e:
+            item["error"] = str(e)
+        return item
+
+    async def stream_results():
+        tasks = [
+            asyncio.create_task(score(index, filename, pdf_bytes))
+            for index, (filename, pdf_bytes) in enumerate(resumes)
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield orjson.dumps(await finished) + b"\n"
+        finally:
+            # Client went away: don't keep burning CPU / API quota on the rest
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+
+# --- Asynchronous jobs ---
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_analysis_job(pdf: UploadFile = File(...), jd: str = Form(...), structurer: JDStructurer = Form(None)):
+    """
+    Job-based variant of /analyse: returns a job id at once and runs the
+    analysis in the background. Poll GET /ats/jobs/{job_id} for the
+    structural/keyword result (status "partial") and then the narrative ("done").
+    """
+    jd_text = _require_jd(jd)
+    pdf_bytes = await ingest.read_pdf(pdf)
+
+    cache_key = analysis_cache.analysis_cache_key(pdf_bytes, jd_text, structurer)
+    cached = await analysis_cache.analysis_cache.aget(cache_key)
+    if cached is not None and "response" in cached:
+        job = await jobs.job_store.create(status="done", result=cached["result"], response=cached["response"])
+    else:
+        job = await jobs.job_store.create()
+        try:
+            jobs.job_queue.submit(job["id"], _run_analysis_job, pdf_bytes, jd_text, structurer, cache_key)
+        except jobs.JobQueueFull as e:
+            await jobs.job_store.update(job["id"], status="failed", error=str(e))
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {"job_id": job["id"], "status": job["status"], "status_url": f"{router.prefix}/jobs/{job['id']}"}
+
+
+async def _run_analysis_job(job_id: str, pdf_bytes: bytes, jd_text: str, structurer: Optional[str], cache_key: str) -> None:
+    try:
+        pdf_text, analysis_result_json, degradations = await analysis_cache.analysis_flights.do(
+            ("initial", cache_key), _initial_analysis, pdf_bytes, jd_text, structurer
         )
-        
-        # --- Return the raw text directly from the model ---
-        return {
-            "result": analysis_result_json,
-            "response": gemini_response.text 
-        }
+    except HTTPException as e:
+        await jobs.job_store.update(job_id, status="failed", error=e.detail)
+        return
+    if degradations:
+        await jobs.job_store.update(job_id, status="partial", result=analysis_result_json, degraded=True, degradations=degradations)
+    else:
+        await jobs.job_store.update(job_id, status="partial", result=analysis_result_json)
+
+    try:
+        with metrics.stage("gemini_pro_narrative"):
+            narrative = await resume_narrative.generate_narrative(pdf_text, analysis_result_json)
+    except Exception as e:
+        await jobs.job_store.update(job_id, status="failed", error=f"An unexpected error occurred with the Gemini API: {str(e)}")
+        return
+    if not degradations:
+        await analysis_cache.analysis_cache.aset(cache_key, {"result": analysis_result_json, "response": narrative})
+    await jobs.job_store.update(job_id, status="done", response=narrative)
+
+
+@router.get("/jobs/{job_id}")
+async def get_analysis_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, description="Long-poll: seconds to wait for a change (capped by JOB_MAX_WAIT_SECONDS)"),
+    version: int = Query(0, ge=0, description="Last version seen; with wait, returns once the job is newer"),
+):
+    """Job status, plus the partial and final results as they become available."""
+    if wait:
+        job = await jobs.job_store.wait(job_id, version, min(wait, jobs.JOB_MAX_WAIT_SECONDS))
+    else:
+        job = await jobs.job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+
+REPORT_MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
 
+
+@router.post("/report")
+async def analysis_report(
+    pdf: UploadFile = File(...),
+    jd: Optional[str] = Form(None),
+    format: Literal["png", "svg"] = Form("png"),
+    structurer: JDStructurer = Form(None)
+):
+    """
+    Renders the visual ATS report (layout histogram, keyword match,
+    structural checks, scores) as a PNG or SVG image.
+    """
+    pdf_bytes = await ingest.read_pdf(pdf)
+    try:
+        parsed_jd = await jd_pipeline.structure_jd(jd.strip(), structurer) if jd and jd.strip() else None
+        image = await executor.run_cpu(atsAanalyzer.render_pdf_report, pdf_bytes, parsed_jd, format)
+    except (gemini_client.GeminiOverloaded, pdf_document.PDFRejected):
+        raise
     except Exception as e:
-        if isinstance(e, HTTPException):
-            raise e
-        raise HTTPException(status_code=500, detail=f"An unexpected error occurred with the Gemini API: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f"Error while rendering the report: {str(e)}")
+    return Response(content=image, media_type=REPORT_MEDIA_TYPES[format])
+
+# --- Cache statistics ---
+@router.get("/cache/stats")
+async def analysis_cache_stats():
+    return analysis_cache.analysis_cache.stats()
@@ -0,0 +1,93 @@
+from typing import List
+from fastapi import APIRouter, File, UploadFile, HTTPException, status, Form
+from starlette.concurrency import run_in_threadpool
+from routers.ats_router import JDStructurer, _collect_batch_pdfs, _require_jd
+from utils import atsAanalyzer, executor, gemini_client, jd_pipeline, metrics, resume_index
+
+# --- Router Setup ---
+router = APIRouter(
+    prefix="/ats",
+    tags=["Resume index"]
+)
+
+MAX_RANK_RESULTS = 500
+
+
+async def _index() -> resume_index.ResumeIndex:
+    # SQLite calls block (up to the 5 s busy timeout), so all of them go to the threadpool
+    return await run_in_threadpool(resume_index.get_index)
+
+
+# --- Ingestion ---
+@router.post("/index", status_code=status.HTTP_201_CREATED)
+async def index_resumes(pdfs: List[UploadFile] = File(...)):
+    """
+    Ingests resumes (PDFs and/or zip archives of PDFs) into the persistent
+    resume index. Identical files are stored once.
+    """
+    resumes = await _collect_batch_pdfs(pdfs)
+    if not resumes:
+        raise HTTPException(status_code=422, detail="No PDF resumes were uploaded")
+
+    index = await _index()
+    indexed = []
+    for filename, pdf_bytes in resumes:
+        item = {"filename": filename}
+        try:
+            with metrics.stage("resume_indexing"):
+                features = await executor.run_cpu(resume_index.extract_features, pdf_bytes)
+            item["id"], item["duplicate"] = await run_in_threadpool(index.add, features, filename)
+            item["structure score"] = features["structure_score"]
+        except Exception as e:
+            item["error"] = str(e)
+        indexed.append(item)
+    return {"indexed": indexed}
+
+
+# --- Ranking ---
+@router.post("/rank")
+async def rank_resumes(
+    jd: str = Form(...),
+    k: int = Form(20, ge=1, le=MAX_RANK_RESULTS),
+    structurer: JDStructurer = Form(None)
+):
+    """
+    Structures the JD once and returns the top-k indexed resumes, scored with
+    the same keyword/structure formula as /analyse.
+    """
+    jd_text = _require_jd(jd)
+    try:
+        parsed_jd = await jd_pipeline.structure_jd(jd_text, structurer)
+    except gemini_client.GeminiOverloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error during JD processing: {str(e)}")
+    if "error" in parsed_jd:
+        raise HTTPException(status_code=502, detail=f"JD structuring failed: {parsed_jd['error']}")
+
+    skills = atsAanalyzer.extract_skills_from_json(parsed_jd)
+    with metrics.stage("resume_ranking"):
+        ranked = await run_in_threadpool((await _index()).rank, skills, k)
+    return {"required_skills": sorted(skills), "results": ranked}
+
+
+# --- Index management ---
+@router.get("/index/stats")
+async def index_stats():
+    return await run_in_threadpool((await _index()).stats)
+
+
+@router.get("/index/{resume_id}")
+async def get_indexed_resume(resume_id: str, include_text: bool = False):
+    resume = await run_in_threadpool((await _index()).get, resume_id)
+    if resume is None:
+        raise HTTPException(status_code=404, detail="Resume not found in the index")
+    if not include_text:
+        resume.pop("text")
+    return resume
+
+
+@router.delete("/index/{resume_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_indexed_resume(resume_id: str):
+    if not await run_in_threadpool((await _index()).delete, resume_id):
+        raise HTTPException(status_code=404, detail="Resume not found in the index")
@@ -1,32 +1,62 @@
+import os
 from fastapi import FastAPI, APIRouter, HTTPException, status
 from pydantic import BaseModel, Field
-from utils import jd_keyword_extractor, sendGemini
-import utils.sendGemini as sendGemini
+from typing import List, Literal, Optional
+from utils import jd_pipeline, schemas
 
 
 
 router = APIRouter(prefix="/jds", tags=["JDs"])
 
+MAX_JD_BATCH = int(os.getenv("MAX_JD_BATCH", 100))
+
 # --- Pydantic model for JD input ---
 class JDInput(BaseModel):
     jd: str = Field(..., description="Job description text")
+    structurer: Optional[Literal["gemini", "local", "auto"]] = Field(
+        None, description="How to structure the keywords; defaults to JD_STRUCTURER"
+    )
+
+class JDBatchInput(BaseModel):
+    jds: List[str] = Field(..., description="Job description texts")
+    structurer: Optional[Literal["gemini", "local", "auto"]] = Field(
+        None, description="How to structure the keywords; defaults to JD_STRUCTURER"
+    )
+
+class JDBatchResponse(BaseModel):
+    results: List[schemas.JDResult]
 
 # --- Single endpoint: Extract + Structure ---
-@router.post("/parse_text", status_code=status.HTTP_201_CREATED)
+@router.post("/parse_text", status_code=status.HTTP_201_CREATED, response_model=schemas.JDResult)
 async def parse_jd_text(jd_input: JDInput):
     jd_text = jd_input.jd.strip()
     if not jd_text:
         raise HTTPException(status_code=422, detail="Job description cannot be empty")
 
-    # Step 1: Extract keywords (await because it's async)
-    raw_keywords = await jd_keyword_extractor.extract_keywords_simple(jd_text)
-
-    # Step 2: Structure keywords using Gemini
-    structured_jd = sendGemini.parse_with_gemini(
-        sendGemini.system_prompt, raw_keywords
-    )
+    # Extract keywords + structure them (served from cache when possible)
+    structured_jd = await jd_pipeline.structure_jd(jd_text, jd_input.structurer)
 
     return structured_jd
 
+# --- Batch endpoint: one spaCy pass for every uncached JD ---
+@router.post("/parse_batch", status_code=status.HTTP_201_CREATED, response_model=JDBatchResponse)
+async def parse_jd_batch(batch: JDBatchInput):
+    jd_texts = [jd.strip() for jd in batch.jds]
+    if not jd_texts:
+        raise HTTPException(status_code=422, detail="At least one job description is required")
+    if len(jd_texts) > MAX_JD_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_JD_BATCH} job descriptions per batch")
+    if not all(jd_texts):
+        raise HTTPException(status_code=422, detail="Job descriptions cannot be empty")
+
+    structured_jds = await jd_pipeline.structure_jds(jd_texts, batch.structurer)
+
+    return {"results": structured_jds}
+
+# --- Cache statistics ---
+@router.get("/cache/stats")
+async def jd_cache_stats():
+    return jd_pipeline.jd_cache.stats()
+
 
 
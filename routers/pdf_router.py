@@ -1,5 +1,5 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException, status
-from utils import pdf_text_extractor
+from utils import pdf_text_extractor, executor, profiling, ingest, pdf_document
 
 router = APIRouter(
     prefix="/pdfs",
@@ -7,8 +7,15 @@ router = APIRouter(
 )
 
 @router.post("/extracttext", status_code=status.HTTP_201_CREATED)
-def extract_text(pdf: UploadFile = File(...)):
-    result = pdf_text_extractor.extract_text_from_pdf(pdf)
+async def extract_text(pdf: UploadFile = File(...)):
+    pdf_bytes = await ingest.read_pdf(pdf)
+    profiling.annotate(pdf_bytes=len(pdf_bytes))
+    try:
+        result = await executor.run_cpu(pdf_text_extractor.extract_text_from_bytes, pdf_bytes)
+    except pdf_document.PDFRejected:
+        raise
+    except Exception:
+        result = ""
     if not result.strip():
         raise HTTPException(status_code=422, detail="No text could be extracted from the PDF")
     return {"extracted_text": result}
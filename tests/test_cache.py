@@ -0,0 +1,33 @@
+import asyncio
+import threading
+
+from utils import cache
+
+
+class _RecordingBackend(cache.SQLiteBackend):
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key, value, ttl):
+        self.threads.append(threading.get_ident())
+        super().set(key, value, ttl)
+
+
+def test_async_access_keeps_backend_off_the_event_loop(tmp_path):
+    backend = _RecordingBackend(str(tmp_path / "cache.db"))
+    tiered = cache.TieredCache("test", max_bytes=1024 * 1024, ttl=60, backend=backend)
+
+    async def roundtrip():
+        await tiered.aset("key", {"value": 1})
+        tiered._memory.clear()
+        return await tiered.aget("key"), await tiered.aget("key"), threading.get_ident()
+
+    first, second, loop_thread = asyncio.run(roundtrip())
+    assert first == second == {"value": 1}
+    assert backend.threads and loop_thread not in backend.threads
+    assert (tiered.disk_hits, tiered.memory_hits) == (1, 1)
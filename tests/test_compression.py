@@ -0,0 +1,36 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from benchmarks import corpus
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+def _report(client, format: str):
+    pdf_bytes = corpus.make_resume(random.Random(7), pages=1, layout="single", font="helvetica", images=0)
+    return client.post(
+        "/ats/report",
+        files={"pdf": ("resume.pdf", pdf_bytes, "application/pdf")},
+        data={"format": format},
+        headers={"Accept-Encoding": "gzip"},
+    )
+
+
+def test_png_report_is_not_compressed_again(client):
+    response = _report(client, "png")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert "content-encoding" not in response.headers
+    assert response.content.startswith(b"\x89PNG")
+
+
+def test_svg_report_is_still_compressed(client):
+    response = _report(client, "svg")
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
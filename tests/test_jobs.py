@@ -0,0 +1,40 @@
+import asyncio
+import threading
+
+from utils import cache, jobs
+
+
+def test_wait_drops_its_event_on_timeout():
+    store = jobs.JobStore(jobs.MemoryJobBackend(10, 60), ttl=60)
+
+    async def waits():
+        job = await store.create()
+        return await asyncio.gather(*(store.wait(job["id"], job["version"], 0.05) for _ in range(3)))
+
+    assert [job["status"] for job in asyncio.run(waits())] == ["queued"] * 3
+    assert store._changed == {} and store._waiters == {}
+
+
+def test_sqlite_jobs_stay_off_the_event_loop(tmp_path):
+    backend = cache.SQLiteBackend(str(tmp_path / "jobs.db"), table="jobs")
+    threads = []
+    get = backend.get
+
+    def recording_get(key):
+        threads.append(threading.get_ident())
+        return get(key)
+
+    backend.get = recording_get
+    store = jobs.JobStore(backend, ttl=60)
+
+    async def lifecycle():
+        job = await store.create()
+        waiter = asyncio.create_task(store.wait(job["id"], job["version"], 5))
+        await asyncio.sleep(0.05)
+        await store.update(job["id"], status="running")
+        return await waiter, threading.get_ident()
+
+    job, loop_thread = asyncio.run(lifecycle())
+    assert (job["status"], job["version"]) == ("running", 2)
+    assert threads and loop_thread not in threads
+    assert store._changed == {}
@@ -0,0 +1,56 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+import pytest
+
+from utils import cache, pdf_document
+
+
+def _resume(pages: int, edited_page: int = -1) -> bytes:
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((50, 80), "EXPERIENCE", fontname="hebo", fontsize=12)
+        for index in range(8):
+            text = f"Built Python services for team {number}-{index}"
+            if number == edited_page and index == 0:
+                text += " (edited)"
+            page.insert_text((58, 100 + 14 * index), text, fontname="helv", fontsize=10)
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+def _parse(pdf_bytes: bytes):
+    document = pdf_document.parse_pdf(pdf_bytes)
+    return document.text, document.cached_pages
+
+
+@pytest.fixture
+def shared_page_cache(tmp_path, monkeypatch):
+    page_cache = cache.TieredCache(
+        "page", max_bytes=1024 * 1024, ttl=60,
+        backend=cache.SQLiteBackend(str(tmp_path / "pages.db"), table="page_cache"),
+    )
+    monkeypatch.setattr(pdf_document, "page_cache", page_cache)
+    return page_cache
+
+
+def test_cached_pages_match_extracted_pages(shared_page_cache):
+    pdf_bytes = _resume(2)
+    first = pdf_document.parse_pdf(pdf_bytes)
+    second = pdf_document.parse_pdf(pdf_bytes)
+    assert (first.cached_pages, second.cached_pages) == (0, 2)
+    assert second.pages == first.pages
+
+
+def test_reupload_hits_pages_parsed_by_another_worker(shared_page_cache):
+    # Two single-worker pools are two distinct processes, as two pool workers would be
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(1, mp_context=context) as first, ProcessPoolExecutor(1, mp_context=context) as second:
+        text, cached = first.submit(_parse, _resume(3)).result()
+        assert cached == 0
+        edited_text, cached = second.submit(_parse, _resume(3, edited_page=1)).result()
+    assert cached == 2
+    assert "(edited)" in edited_text and edited_text.replace(" (edited)", "") == text
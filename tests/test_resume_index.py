@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from benchmarks import corpus
+from utils import atsAanalyzer, pdf_document, resume_index
+
+JDS = {
+    "skills": {
+        "job_title": "Backend Engineer",
+        "programming_languages": ["Python", "Go"],
+        "devops_and_infrastructure": {"orchestration": ["Kubernetes"], "ci_cd": ["dbt-core"]},
+        "other_technical_skills": ["Snowpark", "Studio"],
+    },
+    "no skills": {"job_title": "", "programming_languages": []},
+}
+
+
+@pytest.fixture(scope="module")
+def resumes():
+    rng = random.Random(7)
+    return {
+        "single": corpus.make_resume(rng, 1, "single", "helvetica", 0),
+        "two_column": corpus.make_resume(rng, 2, "two_column", "times", 2),
+        "entries": corpus.make_entry_resume(rng),
+    }
+
+
+@pytest.fixture
+def index(tmp_path, resumes):
+    index = resume_index.ResumeIndex(str(tmp_path / "index.db"))
+    for name, pdf_bytes in resumes.items():
+        index.add(resume_index.extract_features(pdf_bytes), name)
+    return index
+
+
+@pytest.mark.parametrize("jd", JDS)
+def test_rank_scores_match_the_analyzer(index, resumes, jd):
+    parsed_jd = JDS[jd]
+    skills = atsAanalyzer.extract_skills_from_json(parsed_jd)
+    ranked = {result["filename"]: result for result in index.rank(skills, len(resumes))}
+    for name, pdf_bytes in resumes.items():
+        analysis = atsAanalyzer.analyze_resume_sync(pdf_document.parse_pdf(pdf_bytes), parsed_jd, False)
+        assert ranked[name]["score"] == analysis["score"], name
+        assert ranked[name]["key words matched"] == analysis["key words matched"], name
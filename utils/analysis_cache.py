@@ -0,0 +1,40 @@
+import hashlib
+import os
+from typing import Optional
+
+from utils import atsAanalyzer, cache, jd_pipeline, metrics, resume_narrative, schemas, singleflight
+
+# --- Analysis result cache configuration ---
+# ANALYSIS_CACHE_URL selects a persistent backend, e.g. sqlite:////var/cache/ats.db
+ANALYSIS_CACHE_MAX_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+ANALYSIS_CACHE_TTL_SECONDS = float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", 24 * 3600))
+ANALYSIS_CACHE_URL = os.getenv("ANALYSIS_CACHE_URL")
+
+analysis_cache = cache.TieredCache(
+    "analysis",
+    max_bytes=ANALYSIS_CACHE_MAX_BYTES,
+    ttl=ANALYSIS_CACHE_TTL_SECONDS,
+    backend=cache.backend_from_url(ANALYSIS_CACHE_URL, table="analysis_cache"),
+)
+metrics.register_cache(analysis_cache)
+
+# Identical resume+JD requests arriving together share one computation
+analysis_flights = singleflight.SingleFlight("analysis")
+
+
+def analysis_cache_key(pdf_bytes: bytes, jd_text: str, structurer: Optional[str] = None) -> str:
+    """
+    Key for a full /ats/analyse result: the PDF content, the JD (with its own
+    model/prompt versions), the analyzer + narrative model/prompt versions
+    and the response schema version.
+    """
+    structurer = structurer or jd_pipeline.JD_STRUCTURER
+    return cache.content_hash(
+        hashlib.sha256(pdf_bytes).hexdigest(),
+        structurer,
+        jd_pipeline.jd_cache_key(jd_text, "local" if structurer == "local" else "gemini"),
+        atsAanalyzer.ANALYZER_VERSION,
+        resume_narrative.NARRATIVE_MODEL_NAME,
+        resume_narrative.NARRATIVE_PROMPT_VERSION,
+        schemas.SCHEMA_VERSION,
+    )
@@ -1,12 +1,23 @@
-import fitz  # PyMuPDF
 import numpy as np
-import matplotlib.pyplot as plt
-from collections import Counter
 import json
-import re
-from scipy.signal import find_peaks
-import traceback
+import logging
+import time
 from io import BytesIO
+from utils import layout_engine, pdf_document, executor, prompt_builder, skill_matcher
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever scoring or the output shape changes; part of result cache keys
+ANALYZER_VERSION = "2"
+
+# Overall score = keyword score * KEYWORD_WEIGHT + structure score * STRUCTURE_WEIGHT
+KEYWORD_WEIGHT = 0.6
+STRUCTURE_WEIGHT = 0.4
+
+
+def combined_score(keyword_score: float, structure_score: float) -> float:
+    """Overall score of a resume scored against a JD (also used by the resume index)."""
+    return keyword_score * KEYWORD_WEIGHT + structure_score * STRUCTURE_WEIGHT
 
 def extract_skills_from_json(data):
     """
@@ -25,181 +36,155 @@ def extract_skills_from_json(data):
         skills.add(data)
     return skills
 
-async def analyze_resume(pdf_path, jd_json_data=None, visualize=True):
+def analyze_with_layout(pdf_path, jd_json_data=None):
     """
-    Comprehensive ATS-friendliness checker with robust LaTeX handling,
-    advanced keyword matching, and full visualization.
+    Comprehensive ATS-friendliness checker with robust LaTeX handling and
+    advanced keyword matching. Returns (result_json, layout) where layout
+    holds the line positions the report renderer plots and the per-page
+    columns/tables/headers; layout is None when the PDF has too little text
+    to analyze. Raises on unreadable input.
     """
-    try:
-        # --- Part 1: PDF Parsing ---
-        # Handle both file path and BytesIO - CORRECTED
-        if isinstance(pdf_path, str):
-            doc = fitz.open(pdf_path)
-        elif isinstance(pdf_path, BytesIO):
-            # Use stream parameter with getvalue() for BytesIO
-            doc = fitz.open(stream=pdf_path.getvalue(), filetype="pdf")
-        else:
-            # Handle other file-like objects
-            if hasattr(pdf_path, 'read'):
-                content = pdf_path.read()
-                doc = fitz.open(stream=content, filetype="pdf")
-            else:
-                raise ValueError(f"Unsupported input type: {type(pdf_path)}")
-        
-        line_data, all_fonts, text_alignment_data = [], [], []
-        has_images, page_width, full_resume_text = False, 0, ""
-
-        for page in doc:
-            page_width = page.rect.width
-            full_resume_text += page.get_text()
-            if len(page.get_images()) > 0: has_images = True
-            
-            blocks = page.get_text("dict")["blocks"]
-            for block in blocks:
-                if "lines" in block:
-                    for line in block["lines"]:
-                        spans = line.get("spans", [])
-                        line_text = "".join(span.get("text", "") for span in spans).strip()
-                        if len(line_text) < 3: continue
-                        
-                        x_start = min([s["bbox"][0] for s in spans if "bbox" in s])
-                        line_data.append((x_start, len(line_text)))
-                        
-                        for span in spans:
-                            all_fonts.append(span.get("font", "N/A"))
-                            text_alignment_data.append(span["bbox"][0] / page_width)
-        doc.close()
-
-        if len(line_data) < 5:
-            return {"error": "Not enough readable text found to analyze."}
-
-        # --- Part 2: Structural Analysis ---
-        x_positions = np.array([x for x, _ in line_data])
-        total_lines = len(x_positions)
-        
-        column_groups = 1
-        if x_positions.size > 0:
-            hist, _ = np.histogram(x_positions, bins=50, range=(0, page_width))
-            prominence_threshold = max(np.max(hist) * 0.05, 1) if hist.size > 0 and np.max(hist) > 0 else 1
-            candidate_peaks, _ = find_peaks(hist, prominence=prominence_threshold)
-            weight_threshold = max(total_lines * 0.05, 5)
-            significant_peaks = [p for p in candidate_peaks if hist[p] > weight_threshold]
-            column_groups = len(significant_peaks) if len(significant_peaks) > 0 else 1
-        
-        is_single_column = bool(column_groups <= 1)
-
-        ATS_FRIENDLY_FONTS = {'arial', 'calibri', 'times', 'helvetica', 'georgia', 'garamond', 'cambria', 'verdana', 'tahoma', 'computer modern', 'cmr', 'lmroman'}
-        font_compatibility_score = 100.0
-        if all_fonts:
-            font_counter = Counter(all_fonts)
-            ats_friendly_font_count = sum(count for font, count in font_counter.items() if any(ats in font.lower() for ats in ATS_FRIENDLY_FONTS))
-            font_compatibility_score = (ats_friendly_font_count / len(all_fonts)) * 100
-        uses_simple_fonts = bool(font_compatibility_score > 80)
-
-        no_images = bool(not has_images)
-        has_clear_headers = True 
-        left_alignment_score = 0.0
-        if text_alignment_data:
-            left_aligned_count = sum(1 for r in text_alignment_data if r < 0.2)
-            left_alignment_score = (left_aligned_count / len(text_alignment_data)) * 100
-        is_left_aligned = bool(left_alignment_score > 70)
-        no_tables = True
-
-        # --- Part 3: Scoring & Keyword Analysis ---
-        structural_checks = [is_single_column, uses_simple_fonts, no_images, has_clear_headers, is_left_aligned, no_tables]
-        structural_score = (sum(structural_checks) / len(structural_checks)) * 100
-
-        keyword_match_score, found_skills, missing_skills = 0.0, [], []
-        required_skills = set()
-        if jd_json_data:
-            required_skills = extract_skills_from_json(jd_json_data)
-            if required_skills:
-                resume_text_norm = " " + full_resume_text.lower().replace('\n', ' ') + " "
-                for skill in sorted(list(required_skills)):
-                    pattern = r'(?<!\w)' + re.escape(skill.lower()) + r'(?!\w)'
-                    if re.search(pattern, resume_text_norm):
-                        found_skills.append(skill)
-                    else:
-                        missing_skills.append(skill)
-                keyword_match_score = (len(found_skills) / len(required_skills)) * 100 if required_skills else 0.0
-        
-        overall_score = (keyword_match_score * 0.6) + (structural_score * 0.4) if jd_json_data else structural_score
-        
-        # --- Part 4: Visualization ---
-        if visualize:
-            fig = plt.figure(figsize=(15, 12))
-            gs = fig.add_gridspec(3, 2, hspace=0.5, wspace=0.3)
-            fig.suptitle('ATS Resume Analysis Report', fontsize=20, fontweight='bold')
-
-            ax1 = fig.add_subplot(gs[0, :])
-            if x_positions.size > 0:
-                hist, bin_edges = np.histogram(x_positions, bins=50, range=(0, page_width))
-                ax1.hist(x_positions, bins=50, color='skyblue', edgecolor='black', alpha=0.7, range=(0, page_width))
-                ax1.set_title(f'Layout Analysis: Detected {column_groups} Significant Column(s)', fontweight='bold')
-                ax1.set_xlabel('Text Start Position (pixels)')
-                ax1.set_ylabel('Frequency')
-            else:
-                ax1.text(0.5, 0.5, 'No valid text positions for layout analysis.', ha='center', va='center')
-                ax1.set_title('Layout Analysis: N/A', fontweight='bold')
-            ax1.grid(alpha=0.3)
-            
-            ax2 = fig.add_subplot(gs[1, 0])
-            if jd_json_data and required_skills:
-                labels = 'Keywords Matched', 'Keywords Missing'
-                sizes = [len(found_skills), len(missing_skills)]
-                colors = ['#4CAF50', '#F44336']
-                ax2.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90, wedgeprops={"edgecolor":"black"})
-                ax2.set_title('Keyword Match vs. Job Description', fontweight='bold')
-            else:
-                ax2.text(0.5, 0.5, 'No Job Description Provided', ha='center', va='center')
-                ax2.set_title('Keyword Match Analysis', fontweight='bold')
-            ax2.axis('equal')
-
-            ax3 = fig.add_subplot(gs[1, 1])
-            check_names = ['Single Column', 'Simple Fonts', 'No Images', 'Clear Headers', 'Left Aligned', 'No Tables']
-            check_values = [c * 100 for c in structural_checks]
-            colors = ['#4CAF50' if v > 50 else '#F44336' for v in check_values]
-            bars = ax3.barh(check_names, check_values, color=colors, edgecolor='black')
-            ax3.set_title('Structural ATS Compliance', fontweight='bold')
-            ax3.set_xlabel('Compliance Score (%)')
-            ax3.set_xlim(0, 100)
-            for bar in bars:
-                width = bar.get_width()
-                label = '✓ PASS' if width > 50 else '✗ FAIL'
-                ax3.text(width / 2, bar.get_y() + bar.get_height()/2, label, ha='center', va='center', color='white', fontweight='bold')
-
-            ax4 = fig.add_subplot(gs[2, :])
-            ax4.axis('off')
-            scores = {'Structural Score': structural_score, 'Keyword Score': keyword_match_score, 'Overall Match Score': overall_score}
-            y_pos = 0.8
-            for name, score in scores.items():
-                color = 'green' if score >= 75 else 'orange' if score >= 50 else 'red'
-                ax4.text(0.5, y_pos, f'{name}: {score:.1f}%', ha='center', fontsize=16, fontweight='bold',
-                         bbox=dict(boxstyle='round,pad=0.3', fc='whitesmoke', ec=color, lw=2))
-                y_pos -= 0.35
-            
-            plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-            plt.show()
-
-        # --- Part 5: Final JSON Output ---
-        final_json_output = {
-            "column": is_single_column,
-            "simple fonts": uses_simple_fonts,
-            "no images": no_images,
-            "clear section header": has_clear_headers,
-            "poor text alignment": not is_left_aligned,
-            "no tables": no_tables,
-            "key words matched": found_skills,
-            "keyword missing": missing_skills,
-            "score": {
-                "overall score": round(overall_score, 2),
-                "structure score": round(structural_score, 2),
-                "keyword score": round(keyword_match_score, 2)
-            }
+    # --- Part 1: PDF Parsing ---
+    # Accept a pre-parsed document, or build one from a path / bytes / stream
+    if isinstance(pdf_path, pdf_document.PDFDocument):
+        document = pdf_path
+    elif isinstance(pdf_path, (str, bytes)):
+        document = pdf_document.parse_pdf(pdf_path)
+    elif isinstance(pdf_path, BytesIO):
+        document = pdf_document.parse_pdf(pdf_path.getbuffer())
+    elif hasattr(pdf_path, 'read'):
+        document = pdf_document.parse_pdf(pdf_path.read())
+    else:
+        raise ValueError(f"Unsupported input type: {type(pdf_path)}")
+    
+    full_resume_text = document.text
+    pages = [layout_engine.page_geometry(page) for page in document.pages]
+    if sum(len(page.texts) for page in pages) < 5:
+        return {"error": "Not enough readable text found to analyze."}, None
+
+    # --- Part 2: Structural Analysis ---
+    # Columns, tables and section headers are detected page by page
+    page_layouts = layout_engine.analyze_layout(pages)
+    column_groups = max(page.columns for page in page_layouts)
+    is_single_column = bool(column_groups <= 1)
+
+    ATS_FRIENDLY_FONTS = {'arial', 'calibri', 'times', 'helvetica', 'georgia', 'garamond', 'cambria', 'verdana', 'tahoma', 'computer modern', 'cmr', 'lmroman'}
+    font_compatibility_score = 100.0
+    fonts, font_counts = np.unique([font for page in pages for font in page.span_fonts], return_counts=True)
+    if fonts.size:
+        friendly = np.array([any(ats in font.lower() for ats in ATS_FRIENDLY_FONTS) for font in fonts], dtype=bool)
+        font_compatibility_score = font_counts[friendly].sum() / font_counts.sum() * 100
+    uses_simple_fonts = bool(font_compatibility_score > 80)
+
+    no_images = not any(page.images for page in pages)
+    headers = [header for page in page_layouts for header in page.headers]
+    has_clear_headers = bool(len(headers) >= layout_engine.MIN_HEADERS)
+    left_alignment_score = 0.0
+    alignment = np.concatenate([page.span_boxes[:, 0] / page.width for page in pages if page.width > 0] or [np.empty(0)])
+    if alignment.size:
+        left_alignment_score = np.count_nonzero(alignment < 0.2) / alignment.size * 100
+    is_left_aligned = bool(left_alignment_score > 70)
+    no_tables = not any(page.has_table for page in page_layouts)
+
+    # --- Part 3: Scoring & Keyword Analysis ---
+    structural_checks = [is_single_column, uses_simple_fonts, no_images, has_clear_headers, is_left_aligned, no_tables]
+    structural_score = (sum(structural_checks) / len(structural_checks)) * 100
+
+    keyword_match_score, found_skills, missing_skills = 0.0, [], []
+    required_skills = set()
+    if jd_json_data:
+        required_skills = extract_skills_from_json(jd_json_data)
+        if required_skills:
+            keyword_matches = skill_matcher.get_matcher(required_skills).match(full_resume_text)
+            found_skills = keyword_matches["found"]
+            missing_skills = keyword_matches["missing"]
+            keyword_match_score = (len(found_skills) / len(required_skills)) * 100 if required_skills else 0.0
+    
+    overall_score = combined_score(keyword_match_score, structural_score) if jd_json_data else structural_score
+    
+    # --- Part 4: Final JSON Output ---
+    final_json_output = {
+        "column": is_single_column,
+        "simple fonts": uses_simple_fonts,
+        "no images": no_images,
+        "clear section header": has_clear_headers,
+        "poor text alignment": not is_left_aligned,
+        "no tables": no_tables,
+        "key words matched": found_skills,
+        "keyword missing": missing_skills,
+        "score": {
+            "overall score": round(overall_score, 2),
+            "structure score": round(structural_score, 2),
+            "keyword score": round(keyword_match_score, 2)
         }
+    }
+    layout = {
+        "x_positions": np.concatenate([page.line_boxes[:, 0] for page in pages]),
+        "page_width": document.pages[-1].width,
+        "column_groups": column_groups,
+        "pages": page_layouts,
+    }
+    return final_json_output, layout
+
+def analyze_resume_sync(pdf_path, jd_json_data=None, visualize=True):
+    """
+    Structural + keyword analysis of a resume, as a JSON-ready dict.
+    With visualize=True the report is also shown in a matplotlib window
+    (matplotlib is only imported in that case).
+    Pure CPU work: call it through analyze_resume from async code.
+    """
+    try:
+        final_json_output, layout = analyze_with_layout(pdf_path, jd_json_data)
+        if visualize and layout is not None:
+            from utils import ats_report
+            ats_report.show_report(final_json_output, layout)
         return final_json_output
 
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        traceback.print_exc()
-        return {"error": str(e)}
\ No newline at end of file
+        logger.exception("Resume analysis failed")
+        return {"error": str(e)}
+
+async def analyze_resume(pdf_path, jd_json_data=None, visualize=True):
+    """
+    Runs analyze_resume_sync on the CPU executor. Visualization needs the
+    interactive matplotlib backend of this process, so it stays inline.
+    """
+    if visualize:
+        return analyze_resume_sync(pdf_path, jd_json_data, visualize)
+    return await executor.run_cpu(analyze_resume_sync, pdf_path, jd_json_data, False)
+
+def analyze_pdf_bytes(pdf_bytes, jd_json_data=None):
+    """
+    Parses the PDF once and returns its plain text, the compacted text used
+    in Gemini prompts, page count, document stats, the analysis and
+    per-stage timings, so a
+    request needs a single executor round trip for all PDF work.
+    """
+    start = time.perf_counter()
+    document = pdf_document.parse_pdf(pdf_bytes)
+    parsed = time.perf_counter()
+    result = analyze_resume_sync(document, jd_json_data, False)
+    return {
+        "text": document.text,
+        "prompt_text": prompt_builder.compact_resume_text([page.text for page in document.pages]),
+        "pages": document.page_count,
+        "cached_pages": document.cached_pages,
+        "document": document.stats(),
+        "result": result,
+        "timings": {
+            "pdf_parse": parsed - start,
+            "structural_analysis": time.perf_counter() - parsed
+        }
+    }
+
+def render_pdf_report(pdf_bytes, jd_json_data=None, fmt="png"):
+    """
+    Executor entry point for the report endpoint: analyses the PDF and
+    renders its report as PNG/SVG bytes. Raises ValueError when the PDF
+    has too little text to analyze.
+    """
+    from utils import ats_report  # matplotlib is only loaded by report requests
+    result, layout = analyze_with_layout(pdf_bytes, jd_json_data)
+    if layout is None:
+        raise ValueError(result["error"])
+    return ats_report.render_report(result, layout, fmt)
@@ -0,0 +1,93 @@
+# Report rendering for resume analyses. Imported only on demand (matplotlib is
+# heavy and the analysis path never needs it); uses the object-oriented
+# Figure API with the Agg canvas, never pyplot's global interactive state.
+from io import BytesIO
+
+from matplotlib.figure import Figure
+
+REPORT_FORMATS = ("png", "svg")
+
+
+def build_report_figure(result: dict, layout: dict, fig: Figure) -> Figure:
+    x_positions = layout["x_positions"]
+    page_width = layout["page_width"]
+    column_groups = layout["column_groups"]
+    found_skills = result["key words matched"]
+    missing_skills = result["keyword missing"]
+    structural_checks = [
+        result["column"], result["simple fonts"], result["no images"],
+        result["clear section header"], not result["poor text alignment"], result["no tables"]
+    ]
+
+    gs = fig.add_gridspec(3, 2, hspace=0.5, wspace=0.3)
+    fig.suptitle('ATS Resume Analysis Report', fontsize=20, fontweight='bold')
+
+    ax1 = fig.add_subplot(gs[0, :])
+    if x_positions.size > 0:
+        ax1.hist(x_positions, bins=50, color='skyblue', edgecolor='black', alpha=0.7, range=(0, page_width))
+        ax1.set_title(f'Layout Analysis: Detected {column_groups} Significant Column(s)', fontweight='bold')
+        ax1.set_xlabel('Text Start Position (pixels)')
+        ax1.set_ylabel('Frequency')
+    else:
+        ax1.text(0.5, 0.5, 'No valid text positions for layout analysis.', ha='center', va='center')
+        ax1.set_title('Layout Analysis: N/A', fontweight='bold')
+    ax1.grid(alpha=0.3)
+
+    ax2 = fig.add_subplot(gs[1, 0])
+    if found_skills or missing_skills:
+        labels = 'Keywords Matched', 'Keywords Missing'
+        sizes = [len(found_skills), len(missing_skills)]
+        colors = ['#4CAF50', '#F44336']
+        ax2.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90, wedgeprops={"edgecolor": "black"})
+        ax2.set_title('Keyword Match vs. Job Description', fontweight='bold')
+    else:
+        ax2.text(0.5, 0.5, 'No Job Description Provided', ha='center', va='center')
+        ax2.set_title('Keyword Match Analysis', fontweight='bold')
+    ax2.axis('equal')
+
+    ax3 = fig.add_subplot(gs[1, 1])
+    check_names = ['Single Column', 'Simple Fonts', 'No Images', 'Clear Headers', 'Left Aligned', 'No Tables']
+    check_values = [c * 100 for c in structural_checks]
+    colors = ['#4CAF50' if v > 50 else '#F44336' for v in check_values]
+    bars = ax3.barh(check_names, check_values, color=colors, edgecolor='black')
+    ax3.set_title('Structural ATS Compliance', fontweight='bold')
+    ax3.set_xlabel('Compliance Score (%)')
+    ax3.set_xlim(0, 100)
+    for bar in bars:
+        width = bar.get_width()
+        label = '✓ PASS' if width > 50 else '✗ FAIL'
+        ax3.text(width / 2, bar.get_y() + bar.get_height() / 2, label, ha='center', va='center', color='white', fontweight='bold')
+
+    ax4 = fig.add_subplot(gs[2, :])
+    ax4.axis('off')
+    scores = {
+        'Structural Score': result["score"]["structure score"],
+        'Keyword Score': result["score"]["keyword score"],
+        'Overall Match Score': result["score"]["overall score"]
+    }
+    y_pos = 0.8
+    for name, score in scores.items():
+        color = 'green' if score >= 75 else 'orange' if score >= 50 else 'red'
+        ax4.text(0.5, y_pos, f'{name}: {score:.1f}%', ha='center', fontsize=16, fontweight='bold',
+                 bbox=dict(boxstyle='round,pad=0.3', fc='whitesmoke', ec=color, lw=2))
+        y_pos -= 0.35
+
+    fig.tight_layout(rect=[0, 0.03, 1, 0.95])
+    return fig
+
+
+def render_report(result: dict, layout: dict, fmt: str = "png") -> bytes:
+    """Renders the report to PNG or SVG bytes without any GUI backend."""
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported report format '{fmt}', expected one of {REPORT_FORMATS}")
+    fig = build_report_figure(result, layout, Figure(figsize=(15, 12)))
+    buffer = BytesIO()
+    fig.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def show_report(result: dict, layout: dict) -> None:
+    """Interactive display for local use (analyze_resume(..., visualize=True))."""
+    import matplotlib.pyplot as plt
+    fig = build_report_figure(result, layout, plt.figure(figsize=(15, 12)))
+    plt.show()
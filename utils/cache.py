@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from cachetools import TTLCache
+from starlette.concurrency import run_in_threadpool
+
+
+def content_hash(*parts: Any) -> str:
+    """
+    Builds a stable SHA-256 key from any mix of str/bytes parts.
+    Parts are length-prefixed so ("ab", "c") and ("a", "bc") never collide.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(str(len(part)).encode("ascii") + b":")
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class SQLiteBackend:
+    """
+    Persistent cache tier stored in a single SQLite file.
+    WAL mode lets several uvicorn workers share the same file safely.
+    Values must be JSON serialisable.
+    """
+
+    def __init__(self, path: str, table: str = "cache"):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connect()
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _connect(self) -> None:
+        self._pid = os.getpid()
+        self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # SQLite connections must not be used across fork(): pre-forked
+        # workers open their own on first use
+        if self._pid != os.getpid():
+            self._connect()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at < time.time():
+                self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        payload = json.dumps(value, separators=(",", ":"))
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, time.time() + ttl),
+            )
+            self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute(f"DELETE FROM {self.table}")
+            self._db.commit()
+
+
+# Persistent backends by URL scheme. Anything exposing get(key),
+# set(key, value, ttl) and clear() can be registered here (e.g. Redis).
+# Factories receive whatever follows "scheme://" and the table/namespace name.
+BACKENDS = {
+    # SQLAlchemy-style paths: sqlite:///relative.db, sqlite:////absolute.db
+    "sqlite": lambda location, table: SQLiteBackend(location[1:] if location.startswith("/") else location, table=table),
+}
+
+
+def backend_from_url(url: Optional[str], table: str):
+    """
+    Builds a persistent backend from a URL like "sqlite:////var/cache/ats.db".
+    Returns None for an empty URL (memory-only caching).
+    """
+    if not url:
+        return None
+    scheme, sep, location = url.partition("://")
+    if not sep or scheme not in BACKENDS:
+        raise ValueError(f"Unsupported cache backend URL '{url}', known schemes: {sorted(BACKENDS)}")
+    return BACKENDS[scheme](location, table)
+
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":")))
+
+
+class TieredCache:
+    """
+    Two-tier cache: an in-memory LRU with TTL and a byte budget in front of an
+    optional persistent backend (anything with get/set(key, value, ttl)/clear).
+    Disk hits are promoted into memory. Async code uses aget/aset, which keep
+    the backend's blocking calls off the event loop.
+    """
+
+    def __init__(self, name: str, max_bytes: int, ttl: float, backend=None):
+        self.name = name
+        self.ttl = ttl
+        self.backend = backend
+        self._memory = TTLCache(maxsize=max_bytes, ttl=ttl, getsizeof=_json_size)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self.memory_hits += 1
+                return value
+
+        if self.backend is not None:
+            value = self.backend.get(key)
+            if value is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._store_in_memory(key, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._store_in_memory(key, value)
+        if self.backend is not None:
+            self.backend.set(key, value, self.ttl)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get for async code: the backend (blocking I/O) is only read in the threadpool."""
+        if self.backend is not None:
+            with self._lock:
+                value = self._memory.get(key)
+                if value is not None:
+                    self.memory_hits += 1
+                    return value
+            return await run_in_threadpool(self.get, key)
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """set for async code, writing the backend in the threadpool."""
+        if self.backend is not None:
+            await run_in_threadpool(self.set, key, value)
+        else:
+            self.set(key, value)
+
+    def _store_in_memory(self, key: str, value: Any) -> None:
+        try:
+            self._memory[key] = value
+        except ValueError:
+            # Larger than the whole memory budget: keep it on disk only
+            pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._memory),
+                "memory_bytes": self._memory.currsize,
+                "max_memory_bytes": self._memory.maxsize,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "persistent": self.backend is not None,
+            }
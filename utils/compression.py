@@ -0,0 +1,135 @@
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # br is optional; gzip is always available
+    brotli = None
+
+# --- Response compression configuration ---
+# COMPRESSION_ENCODINGS lists the encodings to offer, in order of preference
+# (empty disables compression). Brotli needs the optional "brotli" package.
+# Quality 4 / level 6 trade a little ratio for much less CPU per response.
+COMPRESSION_ENCODINGS = [
+    encoding.strip() for encoding in os.getenv("COMPRESSION_ENCODINGS", "br,gzip").split(",") if encoding.strip()
+]
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))
+
+# Streams whose events must reach the client as soon as they are written
+STREAMING_CONTENT_TYPES = ("text/event-stream", "application/x-ndjson")
+# Formats that are compressed already, where another pass only burns CPU.
+# Prefixes ending in "/" match the whole type; SVG is text and still shrinks.
+COMPRESSED_CONTENT_TYPES = (
+    "image/", "audio/", "video/", "font/woff",
+    "application/zip", "application/gzip", "application/x-gzip", "application/zstd",
+    "application/x-7z-compressed", "application/x-bzip2", "application/x-xz", "application/pdf",
+)
+UNCOMPRESSED_IMAGE_TYPES = ("image/svg+xml", "image/bmp", "image/x-icon")
+
+
+class _GZip:
+    def __init__(self):
+        # wbits 31: a gzip header and trailer around the deflate stream
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        flush = zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH
+        return self._compressor.compress(body) + self._compressor.flush(flush)
+
+
+class _Brotli:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        compressed = self._compressor.process(body)
+        return compressed + (self._compressor.flush() if more_body else self._compressor.finish())
+
+
+COMPRESSORS = {"gzip": _GZip, "br": _Brotli}
+
+
+class _CompressingSend:
+    """
+    Wraps send for one response. The start message is held back until the
+    first body message shows whether to compress: not when the app already
+    set Content-Encoding, for SSE and NDJSON streams, for already-compressed
+    formats (COMPRESSED_CONTENT_TYPES), or for a complete body under
+    COMPRESSION_MIN_BYTES. Every chunk of a streamed body is flushed,
+    so clients see it as soon as the app sends it.
+    """
+
+    def __init__(self, send, encoding: str):
+        self.send = send
+        self.encoding = encoding
+        self.start = None
+        self.compressor = None
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if self.start is not None:
+            start, self.start = self.start, None
+            if message["type"] == "http.response.body" and self._compressible(start, message):
+                self.compressor = COMPRESSORS[self.encoding]()
+                headers = MutableHeaders(raw=list(start["headers"]))
+                headers["Content-Encoding"] = self.encoding
+                headers.add_vary_header("Accept-Encoding")
+                del headers["Content-Length"]
+                start = {**start, "headers": headers.raw}
+            await self.send(start)
+        if self.compressor is not None and message["type"] == "http.response.body":
+            more_body = message.get("more_body", False)
+            message = {**message, "body": self.compressor.compress(message.get("body", b""), more_body)}
+        await self.send(message)
+
+    @staticmethod
+    def _compressible(start, message) -> bool:
+        headers = Headers(raw=start["headers"])
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type.startswith(STREAMING_CONTENT_TYPES):
+            return False
+        if content_type.startswith(COMPRESSED_CONTENT_TYPES) and content_type not in UNCOMPRESSED_IMAGE_TYPES:
+            return False
+        return message.get("more_body", False) or len(message.get("body", b"")) >= COMPRESSION_MIN_BYTES
+
+
+def _accepted(accept_encoding: str) -> set:
+    accepted = set()
+    for item in accept_encoding.split(","):
+        encoding, _, params = item.strip().partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(encoding.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware: compresses responses of at least COMPRESSION_MIN_BYTES
+    with the first of COMPRESSION_ENCODINGS the client accepts.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.encodings = [
+            encoding for encoding in COMPRESSION_ENCODINGS
+            if encoding == "gzip" or (encoding == "br" and brotli is not None)
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        accepted = _accepted(Headers(scope=scope).get("accept-encoding", ""))
+        encoding = next((encoding for encoding in self.encodings if encoding in accepted), None)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding))
@@ -0,0 +1,48 @@
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from utils import metrics
+
+# --- Request budget configuration ---
+# /ats/analyse answers within ANALYSE_BUDGET_SECONDS (a request may ask for
+# another budget up to ANALYSE_MAX_BUDGET_SECONDS). JD structuring may use
+# JD_BUDGET_SHARE of it before the local structurer takes over; the narrative
+# gets what is left and is left out when less than MIN_NARRATIVE_SECONDS is.
+ANALYSE_BUDGET_SECONDS = float(os.getenv("ANALYSE_BUDGET_SECONDS", 45))
+ANALYSE_MAX_BUDGET_SECONDS = float(os.getenv("ANALYSE_MAX_BUDGET_SECONDS", 180))
+JD_BUDGET_SHARE = float(os.getenv("JD_BUDGET_SHARE", 0.3))
+MIN_NARRATIVE_SECONDS = float(os.getenv("MIN_NARRATIVE_SECONDS", 2))
+
+
+class RequestBudget:
+    """
+    End-to-end latency budget of one request (seconds=None: unbounded, for
+    the streaming and job endpoints). Stages ask for their slice of it and
+    record a degradation when they fall back to a cheaper result.
+    """
+
+    def __init__(self, seconds: Optional[float]):
+        self.total = seconds
+        self._started = time.monotonic()
+        self.degradations: List[Dict[str, Any]] = []
+
+    def remaining(self) -> Optional[float]:
+        if self.total is None:
+            return None
+        return max(0.0, self.total - (time.monotonic() - self._started))
+
+    def slice(self, share: float) -> Optional[float]:
+        """Timeout for a stage: share of the budget, or whatever is left if that is less."""
+        if self.total is None:
+            return None
+        return min(self.remaining(), self.total * share)
+
+    def degrade(self, stage: str, reason: str, fallback: str) -> None:
+        self.degradations.append({"stage": stage, "reason": reason, "fallback": fallback})
+        metrics.DEGRADATIONS.inc(stage=stage, reason=reason)
+
+
+def request_budget(seconds: Optional[float] = None) -> RequestBudget:
+    """A budget of the requested length (capped), or the configured default."""
+    return RequestBudget(min(seconds or ANALYSE_BUDGET_SECONDS, ANALYSE_MAX_BUDGET_SECONDS))
@@ -0,0 +1,56 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from utils import profiling
+
+# --- Execution layer configuration ---
+# ATS_EXECUTOR=process runs PDF/spaCy work in a process pool (default),
+# ATS_EXECUTOR=thread uses a thread pool (handy for debugging / tiny hosts).
+EXECUTOR_KIND = os.getenv("ATS_EXECUTOR", "process").lower()
+EXECUTOR_WORKERS = int(os.getenv("ATS_EXECUTOR_WORKERS", os.cpu_count() or 1))
+
+_executor: Optional[Executor] = None
+
+
+def _init_worker():
+    """Loads the spaCy model once per worker process, before the first task."""
+    from utils import jd_keyword_extractor
+    jd_keyword_extractor.get_nlp()
+
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if EXECUTOR_KIND == "thread":
+            _executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix="ats-cpu")
+        else:
+            _executor = ProcessPoolExecutor(max_workers=EXECUTOR_WORKERS, initializer=_init_worker)
+    return _executor
+
+
+async def run_cpu(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Runs a CPU-bound callable off the event loop and awaits its result.
+    With the process pool, fn and its arguments must be picklable. Inside a
+    profiled request the call runs under profiling.run_profiled and its CPU
+    profile and allocations are added to the request's profile.
+    """
+    loop = asyncio.get_running_loop()
+    session = profiling.current()
+    if session is None:
+        return await loop.run_in_executor(get_executor(), functools.partial(fn, *args, **kwargs))
+    result, stage = await loop.run_in_executor(
+        get_executor(), functools.partial(profiling.run_profiled, fn, args, kwargs)
+    )
+    session.stages.append(stage)
+    return result
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,354 @@
+"""
+Gemini model factory and outbound call layer shared by the JD parser and
+the narrative writer.
+
+GEMINI_TRANSPORT=sdk (default) uses google-generativeai's gRPC client.
+GEMINI_TRANSPORT=rest calls the generateContent REST API over httpx against
+GEMINI_API_BASE_URL, which can point at benchmarks/gemini_standin.py for
+load tests that should not spend API quota. Both transports return objects
+with the same .text / .usage_metadata surface and raise google.api_core
+exceptions on HTTP errors.
+
+call() / stream() add admission control on top: a per-model concurrency
+limit with a bounded wait queue (GeminiOverloaded when it is full), per
+attempt timeouts, an overall deadline and jittered exponential backoff on
+rate limits, 5xx responses, timeouts and connection errors.
+"""
+import asyncio
+import dataclasses
+import json
+import math
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import google.generativeai as genai
+import httpx
+from google.api_core import exceptions as api_exceptions
+
+from utils import metrics
+
+T = TypeVar("T")
+
+# --- Transport configuration ---
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT", "sdk").lower()
+GEMINI_API_BASE_URL = os.getenv("GEMINI_API_BASE_URL", "https://generativelanguage.googleapis.com").rstrip("/")
+GEMINI_HTTP_TIMEOUT_SECONDS = float(os.getenv("GEMINI_HTTP_TIMEOUT_SECONDS", 300))
+GEMINI_HTTP_MAX_CONNECTIONS = int(os.getenv("GEMINI_HTTP_MAX_CONNECTIONS", 100))
+
+# --- Admission control and retries ---
+# GEMINI_MODEL_CONCURRENCY overrides the limit per model, e.g.
+# "gemini-2.0-flash=16,gemini-2.5-pro=4".
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 8))
+GEMINI_MODEL_CONCURRENCY = {
+    name.strip(): int(limit)
+    for name, _, limit in (item.partition("=") for item in os.getenv("GEMINI_MODEL_CONCURRENCY", "").split(","))
+    if name.strip() and limit
+}
+GEMINI_MAX_QUEUE = int(os.getenv("GEMINI_MAX_QUEUE", 32))
+GEMINI_QUEUE_TIMEOUT_SECONDS = float(os.getenv("GEMINI_QUEUE_TIMEOUT_SECONDS", 15))
+GEMINI_CALL_TIMEOUT_SECONDS = float(os.getenv("GEMINI_CALL_TIMEOUT_SECONDS", 120))
+GEMINI_DEADLINE_SECONDS = float(os.getenv("GEMINI_DEADLINE_SECONDS", 180))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", 2))
+GEMINI_BACKOFF_BASE_SECONDS = float(os.getenv("GEMINI_BACKOFF_BASE_SECONDS", 0.5))
+GEMINI_BACKOFF_MAX_SECONDS = float(os.getenv("GEMINI_BACKOFF_MAX_SECONDS", 8))
+
+RETRYABLE_ERRORS = (
+    api_exceptions.TooManyRequests,
+    api_exceptions.InternalServerError,
+    api_exceptions.BadGateway,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.GatewayTimeout,
+    httpx.TransportError,
+    TimeoutError,
+)
+
+_sync_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=GEMINI_HTTP_MAX_CONNECTIONS, max_keepalive_connections=GEMINI_HTTP_MAX_CONNECTIONS)
+
+
+def _get_sync_client() -> httpx.Client:
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = httpx.Client(timeout=GEMINI_HTTP_TIMEOUT_SECONDS, limits=_limits())
+    return _sync_client
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(timeout=GEMINI_HTTP_TIMEOUT_SECONDS, limits=_limits())
+    return _async_client
+
+
+async def aclose() -> None:
+    """Closes the pooled REST connections (no-op for the SDK transport)."""
+    global _sync_client, _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
+
+# --- REST transport ---
+
+class _Usage:
+    def __init__(self, usage: Dict[str, Any]):
+        self.prompt_token_count = usage.get("promptTokenCount", 0)
+        self.candidates_token_count = usage.get("candidatesTokenCount", 0)
+        self.cached_content_token_count = usage.get("cachedContentTokenCount", 0)
+
+
+class RestResponse:
+    """One generateContent response (or one streamed chunk)."""
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.payload = payload
+        self.usage_metadata = _Usage(payload.get("usageMetadata") or {})
+
+    @property
+    def text(self) -> str:
+        # Same contract as the SDK: ValueError when there are no text parts
+        candidates = self.payload.get("candidates") or []
+        parts = candidates[0].get("content", {}).get("parts", []) if candidates else []
+        texts = [part["text"] for part in parts if "text" in part]
+        if not texts:
+            raise ValueError("The response did not contain any text parts.")
+        return "".join(texts)
+
+
+class RestStreamResponse:
+    """Async iterator over the SSE chunks of an open streamGenerateContent response."""
+
+    def __init__(self, response: httpx.Response):
+        self._response = response
+        self.usage_metadata = _Usage({})
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        try:
+            async for line in self._response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                chunk = RestResponse(json.loads(line[5:]))
+                if chunk.payload.get("usageMetadata"):
+                    self.usage_metadata = chunk.usage_metadata
+                yield chunk
+        finally:
+            await self._response.aclose()
+
+
+def _raise_for_status(response: httpx.Response) -> None:
+    if not response.is_error:
+        return
+    try:
+        message = response.json().get("error", {}).get("message", response.text)
+    except ValueError:
+        message = response.text
+    error = api_exceptions.from_http_status(response.status_code, message, response=response)
+    raise error
+
+
+def _camel(name: str) -> str:
+    head, *rest = name.split("_")
+    return head + "".join(word.title() for word in rest)
+
+
+def _request_body(prompt: str, generation_config) -> Dict[str, Any]:
+    body: Dict[str, Any] = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+    if generation_config is not None:
+        if dataclasses.is_dataclass(generation_config):
+            generation_config = dataclasses.asdict(generation_config)
+        body["generationConfig"] = {_camel(k): v for k, v in generation_config.items() if v is not None}
+    return body
+
+
+class RestModel:
+    """Drop-in for genai.GenerativeModel covering the calls this app makes."""
+
+    def __init__(self, model_name: str, api_key: str):
+        self.model_name = model_name
+        self.headers = {"x-goog-api-key": api_key}
+
+    def url(self, method: str) -> str:
+        return f"{GEMINI_API_BASE_URL}/v1beta/models/{self.model_name}:{method}"
+
+    def generate_content(self, prompt: str, generation_config=None) -> RestResponse:
+        response = _get_sync_client().post(
+            self.url("generateContent"), json=_request_body(prompt, generation_config), headers=self.headers
+        )
+        _raise_for_status(response)
+        return RestResponse(response.json())
+
+    async def generate_content_async(self, prompt: str, generation_config=None, stream: bool = False):
+        body = _request_body(prompt, generation_config)
+        client = _get_async_client()
+        if stream:
+            # Open the stream here so HTTP errors surface on await, as with the SDK
+            request = client.build_request(
+                "POST", self.url("streamGenerateContent"), params={"alt": "sse"}, json=body, headers=self.headers
+            )
+            response = await client.send(request, stream=True)
+            if response.is_error:
+                await response.aread()
+                await response.aclose()
+                _raise_for_status(response)
+            return RestStreamResponse(response)
+        response = await client.post(self.url("generateContent"), json=body, headers=self.headers)
+        _raise_for_status(response)
+        return RestResponse(response.json())
+
+
+def get_model(model_name: str, api_key: str):
+    """Returns a model object for the configured transport."""
+    if GEMINI_TRANSPORT == "rest":
+        return RestModel(model_name, api_key)
+    if GEMINI_TRANSPORT != "sdk":
+        raise ValueError(f"Unknown GEMINI_TRANSPORT '{GEMINI_TRANSPORT}', expected 'sdk' or 'rest'")
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
+
+# --- Admission control ---
+
+class GeminiOverloaded(Exception):
+    """
+    Raised instead of calling Gemini when the model's wait queue is full or
+    the wait for a slot ran out (503), or when Gemini kept rate limiting us
+    through every retry (429). retry_after is a hint in whole seconds.
+    """
+
+    def __init__(self, detail: str, retry_after: int, status_code: int = 503):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+# What a failed or too slow Gemini call can raise, for callers with a fallback
+UPSTREAM_ERRORS = (GeminiOverloaded, api_exceptions.GoogleAPIError, httpx.HTTPError, TimeoutError)
+
+
+class _ModelGate:
+    def __init__(self, model_name: str, limit: int):
+        self.model_name = model_name
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.waiting = 0
+        self.active = 0
+        self.avg_seconds = 1.0  # EWMA of slot hold time, for Retry-After hints
+
+    def retry_after(self) -> int:
+        return max(1, min(60, math.ceil(self.avg_seconds * (self.waiting + 1) / self.limit)))
+
+    def _reject(self, reason: str, detail: str):
+        metrics.GEMINI_REJECTIONS.inc(model=self.model_name, reason=reason)
+        return GeminiOverloaded(detail, self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self, timeout: float):
+        if self.active + self.waiting >= self.limit + GEMINI_MAX_QUEUE:
+            raise self._reject("queue_full", f"Too many pending {self.model_name} requests, try again later")
+        self.waiting += 1
+        metrics.GEMINI_QUEUE_DEPTH.set(self.waiting, model=self.model_name)
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            raise self._reject("queue_timeout", f"Timed out waiting for a {self.model_name} slot, try again later")
+        finally:
+            self.waiting -= 1
+            metrics.GEMINI_QUEUE_DEPTH.set(self.waiting, model=self.model_name)
+
+        self.active += 1
+        metrics.GEMINI_IN_FLIGHT.inc(model=self.model_name)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * (time.monotonic() - start)
+            self.active -= 1
+            metrics.GEMINI_IN_FLIGHT.dec(model=self.model_name)
+            self.semaphore.release()
+
+
+_gates: Dict[str, _ModelGate] = {}
+
+
+def _gate(model_name: str) -> _ModelGate:
+    gate = _gates.get(model_name)
+    if gate is None:
+        limit = GEMINI_MODEL_CONCURRENCY.get(model_name, GEMINI_MAX_CONCURRENCY)
+        gate = _gates[model_name] = _ModelGate(model_name, limit)
+    return gate
+
+
+def _retry_delay(attempt: int, error: Exception) -> float:
+    """Retry-After when the server sent one, else full-jitter exponential backoff."""
+    response = getattr(error, "response", None)
+    retry_after = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), GEMINI_BACKOFF_MAX_SECONDS)
+        except ValueError:
+            pass
+    return random.uniform(0, min(GEMINI_BACKOFF_MAX_SECONDS, GEMINI_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+async def _with_retries(model_name: str, request: Callable[[], Awaitable[T]], deadline_at: float, admit: bool) -> T:
+    attempt = 0
+    while True:
+        try:
+            if admit:
+                async with _gate(model_name).slot(min(GEMINI_QUEUE_TIMEOUT_SECONDS, deadline_at - time.monotonic())):
+                    return await asyncio.wait_for(request(), _attempt_timeout(deadline_at))
+            return await asyncio.wait_for(request(), _attempt_timeout(deadline_at))
+        except RETRYABLE_ERRORS as e:
+            delay = _retry_delay(attempt, e)
+            if attempt >= GEMINI_MAX_RETRIES or time.monotonic() + delay >= deadline_at:
+                if isinstance(e, api_exceptions.TooManyRequests):
+                    raise GeminiOverloaded(
+                        f"{model_name} is rate limited, try again later", max(1, math.ceil(delay)), status_code=429
+                    ) from e
+                raise
+            attempt += 1
+            metrics.GEMINI_RETRIES.inc(model=model_name, error=type(e).__name__)
+            await asyncio.sleep(delay)
+
+
+def _attempt_timeout(deadline_at: float) -> float:
+    remaining = deadline_at - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Gemini call deadline exceeded")
+    return min(GEMINI_CALL_TIMEOUT_SECONDS, remaining)
+
+
+async def call(model_name: str, request: Callable[[], Awaitable[T]], deadline: Optional[float] = None) -> T:
+    """
+    Runs request() (a zero-argument function starting one Gemini API call)
+    under the model's concurrency limit, retrying retryable failures until
+    GEMINI_MAX_RETRIES or the deadline (seconds from now) is used up.
+    Each attempt waits for a slot of its own, so backoff does not hold one.
+    """
+    deadline_at = time.monotonic() + (deadline or GEMINI_DEADLINE_SECONDS)
+    return await _with_retries(model_name, request, deadline_at, admit=True)
+
+
+@asynccontextmanager
+async def stream(model_name: str, request: Callable[[], Awaitable[T]], deadline: Optional[float] = None):
+    """
+    Streaming counterpart of call(): holds one slot until the block exits.
+    Only opening the stream is retried; errors mid-stream propagate.
+    """
+    deadline_at = time.monotonic() + (deadline or GEMINI_DEADLINE_SECONDS)
+    async with _gate(model_name).slot(min(GEMINI_QUEUE_TIMEOUT_SECONDS, deadline_at - time.monotonic())):
+        yield await _with_retries(model_name, request, deadline_at, admit=False)
@@ -0,0 +1,130 @@
+import os
+import zipfile
+from typing import BinaryIO, List, Tuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from utils import metrics
+from utils.pdf_document import PDFRejected
+
+# --- Upload limits ---
+# MAX_UPLOAD_BYTES caps one PDF, uploaded directly or inside a zip archive.
+# Request bodies are capped while they arrive (UploadLimitMiddleware), by
+# MAX_REQUEST_BYTES, or MAX_BATCH_REQUEST_BYTES for the multi-resume
+# endpoints, which also bounds the PDFs a batch's archives expand to.
+# Starlette spools file parts to disk past 1 MB, so only accepted PDFs are
+# ever held in worker memory.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", MAX_UPLOAD_BYTES + 1024 * 1024))
+MAX_BATCH_REQUEST_BYTES = int(os.getenv("MAX_BATCH_REQUEST_BYTES", 200 * 1024 * 1024))
+BATCH_PATHS = ("/ats/analyse_batch", "/ats/index")
+UPLOAD_CHUNK_BYTES = 256 * 1024
+# The PDF header may be preceded by up to 1 KB of junk
+PDF_HEADER_WINDOW = 1024
+
+
+def _megabytes(limit: int) -> str:
+    # One decimal place, so limits below 1 MB do not read as "0 MB"
+    return f"{limit / (1024 * 1024):.1f} MB"
+
+
+def _too_large(name: str, limit: int) -> PDFRejected:
+    return PDFRejected(f"'{name}' is larger than {_megabytes(limit)}", "bytes")
+
+
+def _check_header(name: str, head: bytes) -> None:
+    if b"%PDF-" not in head[:PDF_HEADER_WINDOW]:
+        raise PDFRejected(f"'{name}' is not a PDF", "not_pdf", 422)
+
+
+def read_file(fileobj: BinaryIO, name: str = "upload", max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    """
+    Reads a PDF from a file object in chunks, raising PDFRejected as soon as
+    it passes max_bytes or when its first chunk has no PDF header.
+    """
+    chunks, size = [], 0
+    while chunk := fileobj.read(UPLOAD_CHUNK_BYTES):
+        if not chunks:
+            _check_header(name, chunk)
+        size += len(chunk)
+        if size > max_bytes:
+            raise _too_large(name, max_bytes)
+        chunks.append(chunk)
+    if not chunks:
+        raise PDFRejected(f"'{name}' is empty", "not_pdf", 422)
+    return b"".join(chunks)
+
+
+async def read_pdf(upload: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    """read_file for an UploadFile, off the event loop; the size Starlette already knows is checked first."""
+    name = upload.filename or "upload"
+    if upload.size is not None and upload.size > max_bytes:
+        raise _too_large(name, max_bytes)
+    return await run_in_threadpool(read_file, upload.file, name, max_bytes)
+
+
+def expand_zip(fileobj: BinaryIO, name: str, budget: int = MAX_BATCH_REQUEST_BYTES) -> List[Tuple[str, bytes]]:
+    """
+    The PDFs inside a (seekable) zip archive as (filename, bytes). Sizes are
+    checked against the entries' declared sizes first and then while
+    reading, so a zip bomb is rejected after at most MAX_UPLOAD_BYTES per
+    entry. budget is how many bytes of PDFs the archive may expand to.
+    """
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise PDFRejected(f"'{name}' is not a valid zip archive", "not_zip", 422)
+    pdfs = []
+    with archive:
+        for entry in archive.infolist():
+            if entry.is_dir() or not entry.filename.lower().endswith(".pdf"):
+                continue
+            if entry.file_size > MAX_UPLOAD_BYTES:
+                raise _too_large(entry.filename, MAX_UPLOAD_BYTES)
+            with archive.open(entry) as member:
+                pdf_bytes = read_file(member, entry.filename)
+            budget -= len(pdf_bytes)
+            if budget < 0:
+                raise PDFRejected(f"The PDFs in '{name}' add up to more than the batch limit", "bytes")
+            pdfs.append((entry.filename, pdf_bytes))
+    return pdfs
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware: rejects request bodies over the limit with 413, from
+    Content-Length before anything is read, or while a chunked body streams in.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+        limit = MAX_BATCH_REQUEST_BYTES if scope["path"] in BATCH_PATHS else MAX_REQUEST_BYTES
+        detail = f"Request body is larger than {_megabytes(limit)}"
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            metrics.UPLOAD_REJECTIONS.inc(reason="request_bytes")
+            await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    metrics.UPLOAD_REJECTIONS.inc(reason="request_bytes")
+                    # FastAPI re-raises HTTPExceptions from body parsing as-is
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,16 +1,59 @@
 import spacy
+import os
 import re
 from collections import defaultdict
+from typing import Iterable, List, Optional
+from utils import executor
 
 # You still need spaCy and its model. If you haven't installed it:
 # pip install spacy
 # python -m spacy download en_core_web_sm
-nlp = spacy.load("en_core_web_sm")
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
 
-async def extract_keywords_simple(job_description: str) -> dict:
-    doc = nlp(job_description)
-    keywords = set()
+# Noun chunks need the tagger + parser, PROPN needs the attribute ruler's
+# tag -> POS mapping and ORG/PRODUCT needs NER. Nothing reads lemmas or
+# sentence boundaries, so those components are never loaded.
+UNUSED_PIPES = ["lemmatizer", "senter"]
+
+# --- Batch extraction configuration ---
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", 32))
+SPACY_N_PROCESS = int(os.getenv("SPACY_N_PROCESS", 1))
+# Longer JDs are split on paragraph/line boundaries into chunks of about this
+# many characters, which keeps the parser's per-doc memory flat
+JD_CHUNK_CHARS = int(os.getenv("JD_CHUNK_CHARS", 5000))
+
+GENERIC_KEYWORDS = {'the job', 'experience', 'team', 'responsibilities'}
+
+_nlp = None
+
+def get_nlp():
+    """Loads the spaCy pipeline on first use; once per process."""
+    global _nlp
+    if _nlp is None:
+        _nlp = spacy.load(SPACY_MODEL, exclude=UNUSED_PIPES)
+    return _nlp
+
+def chunk_text(text: str, max_chars: int = JD_CHUNK_CHARS) -> List[str]:
+    """Splits text into pieces of at most about max_chars, preferring paragraph, then line breaks."""
+    if len(text) <= max_chars:
+        return [text]
+    chunks, current = [], ""
+    for piece in re.split(r"(\n\s*\n|\n)", text):
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        # A single line longer than a chunk is cut on whitespace
+        while len(piece) > max_chars:
+            cut = piece.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            chunks.append(piece[:cut])
+            piece = piece[cut:]
+        current += piece
+    if current.strip():
+        chunks.append(current)
+    return chunks
 
+def _collect_keywords(doc, keywords: set) -> None:
     for chunk in doc.noun_chunks:
         keywords.add(chunk.text.lower())
     for token in doc:
@@ -20,6 +63,7 @@ async def extract_keywords_simple(job_description: str) -> dict:
         if ent.label_ in ['PRODUCT', 'ORG']:
             keywords.add(ent.text.lower())
 
+def _result(job_description: str, keywords: set) -> dict:
     # Updated regex for experience
     experience_pattern = r'(\d+(?:\.\d+)?\s*\+?)\s*years?'
     matches = re.findall(experience_pattern, job_description.lower())
@@ -27,8 +71,8 @@ async def extract_keywords_simple(job_description: str) -> dict:
 
     # Filter generic keywords
     final_keywords = [
-        keyword for keyword in keywords 
-        if len(keyword) > 2 and keyword not in ['the job', 'experience', 'team', 'responsibilities']
+        keyword for keyword in keywords
+        if len(keyword) > 2 and keyword not in GENERIC_KEYWORDS
     ]
 
     return {
@@ -36,3 +80,44 @@ async def extract_keywords_simple(job_description: str) -> dict:
         "experience_requirements": sorted(experience)
     }
 
+def extract_keywords_batch(job_descriptions: Iterable[str], batch_size: Optional[int] = None,
+                           n_process: Optional[int] = None) -> List[dict]:
+    """
+    Extracts keywords from many JDs in one nlp.pipe stream (results in input
+    order). Long JDs are chunked; n_process > 1 lets spaCy fan out to its own
+    worker processes, which only pays off for large batches.
+    """
+    job_descriptions = list(job_descriptions)
+    chunks = [
+        (chunk, index)
+        for index, text in enumerate(job_descriptions)
+        for chunk in chunk_text(text)
+    ]
+    keywords = defaultdict(set)
+    docs = get_nlp().pipe(
+        chunks,
+        as_tuples=True,
+        batch_size=batch_size or SPACY_BATCH_SIZE,
+        n_process=n_process or SPACY_N_PROCESS,
+    )
+    for doc, index in docs:
+        _collect_keywords(doc, keywords[index])
+    return [_result(text, keywords[index]) for index, text in enumerate(job_descriptions)]
+
+def extract_keywords(job_description: str) -> dict:
+    chunks = chunk_text(job_description)
+    keywords = set()
+    if len(chunks) == 1:
+        _collect_keywords(get_nlp()(job_description), keywords)
+    else:
+        for doc in get_nlp().pipe(chunks, batch_size=SPACY_BATCH_SIZE):
+            _collect_keywords(doc, keywords)
+    return _result(job_description, keywords)
+
+async def extract_keywords_simple(job_description: str) -> dict:
+    """Runs extract_keywords on the CPU executor so the event loop stays free."""
+    return await executor.run_cpu(extract_keywords, job_description)
+
+async def extract_keywords_many(job_descriptions: List[str]) -> List[dict]:
+    """Runs extract_keywords_batch on the CPU executor in a single round trip."""
+    return await executor.run_cpu(extract_keywords_batch, job_descriptions)
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from utils import (
+    cache, gemini_client, jd_keyword_extractor, local_structurer, metrics, profiling, prompt_builder, schemas,
+    sendGemini, singleflight,
+)
+
+logger = logging.getLogger(__name__)
+
+# --- JD parse cache configuration ---
+# JD_CACHE_DB enables the on-disk tier; leave it unset for memory-only caching.
+JD_CACHE_MAX_BYTES = int(os.getenv("JD_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+JD_CACHE_TTL_SECONDS = float(os.getenv("JD_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+JD_CACHE_DB = os.getenv("JD_CACHE_DB")
+
+# --- Structurer selection ---
+# "gemini": Gemini Flash only, "local": taxonomy structurer only,
+# "auto": Gemini Flash, falling back to the local structurer when it is
+# slower than JD_GEMINI_TIMEOUT_SECONDS, errors or returns unparseable output.
+# A fallback is remembered for JD_FALLBACK_TTL_SECONDS, during which "auto"
+# serves the local parse of that JD straight away; Gemini is retried after.
+STRUCTURERS = ("gemini", "local", "auto")
+JD_STRUCTURER = os.getenv("JD_STRUCTURER", "gemini")
+JD_GEMINI_TIMEOUT_SECONDS = float(os.getenv("JD_GEMINI_TIMEOUT_SECONDS", 20))
+JD_FALLBACK_TTL_SECONDS = float(os.getenv("JD_FALLBACK_TTL_SECONDS", 60))
+
+jd_cache = cache.TieredCache(
+    "jd",
+    max_bytes=JD_CACHE_MAX_BYTES,
+    ttl=JD_CACHE_TTL_SECONDS,
+    backend=cache.SQLiteBackend(JD_CACHE_DB, table="jd_cache") if JD_CACHE_DB else None,
+)
+metrics.register_cache(jd_cache)
+
+# Gemini cache key -> why the last "auto" parse of that JD fell back (memory only)
+jd_fallbacks = cache.TieredCache("jd_fallback", max_bytes=1024 * 1024, ttl=JD_FALLBACK_TTL_SECONDS)
+metrics.register_cache(jd_fallbacks)
+
+# Concurrent misses for the same JD share one spaCy pass and Gemini call
+jd_flights = singleflight.SingleFlight("jd")
+
+
+def normalize_jd(jd_text: str) -> str:
+    """Collapses whitespace so cosmetic edits to a JD share one cache entry."""
+    return " ".join(jd_text.split())
+
+
+def jd_cache_key(jd_text: str, structurer: str = "gemini") -> str:
+    if structurer == "local":
+        version = (local_structurer.STRUCTURER_VERSION,)
+    else:
+        version = (sendGemini.JD_MODEL_NAME, sendGemini.SYSTEM_PROMPT_VERSION, schemas.SCHEMA_VERSION)
+    return cache.content_hash(*version, normalize_jd(jd_text))
+
+
+def fallback_reason(error: BaseException) -> str:
+    """The degradation reason for a failed Gemini parse."""
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(error, gemini_client.GeminiOverloaded):
+        return "overloaded"
+    return "error"
+
+
+def remember_fallback(jd_text: str, reason: str) -> None:
+    """Makes "auto" serve the local parse of this JD for JD_FALLBACK_TTL_SECONDS."""
+    jd_fallbacks.set(jd_cache_key(jd_text, "gemini"), reason)
+
+
+async def _structure_with_gemini(raw_keywords: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+    with metrics.stage("jd_structuring_gemini"):
+        structured_jd = await asyncio.wait_for(
+            sendGemini.parse_with_gemini_async(sendGemini.system_prompt, raw_keywords),
+            timeout=timeout,
+        )
+    if "error" in structured_jd:
+        raise ValueError(structured_jd["error"])
+    return structured_jd
+
+
+async def structure_jd(jd_text: str, structurer: Optional[str] = None, budget=None) -> Dict[str, Any]:
+    """
+    Returns the structured JD for the given text, running spaCy keyword
+    extraction and the selected structurer only on a cache miss.
+    Concurrent misses for the same JD are coalesced into one computation.
+    Failed parses are never cached. When "auto" serves the local parse
+    instead, the fallback is recorded on budget (a deadline.RequestBudget).
+    """
+    structurer = structurer or JD_STRUCTURER
+    if structurer not in STRUCTURERS:
+        raise ValueError(f"Unknown JD structurer '{structurer}', expected one of {STRUCTURERS}")
+    profiling.annotate(jd_chars=len(jd_text), jd_tokens=prompt_builder.estimate_tokens(jd_text))
+
+    # "auto" serves a cached Gemini parse when there is one
+    key = jd_cache_key(jd_text, "local" if structurer == "local" else "gemini")
+    cached = await jd_cache.aget(key)
+    if cached is not None:
+        return cached
+    if structurer != "auto":
+        return await jd_flights.do((structurer, key), _structure_uncached, jd_text, structurer, key)
+
+    reason = jd_fallbacks.get(key)
+    if reason is None:
+        structured_jd = await jd_flights.do((structurer, key), _structure_uncached, jd_text, structurer, key)
+        # Set by the flight when Gemini failed and the local parse was returned
+        reason = jd_fallbacks.get(key)
+    else:
+        structured_jd = await structure_jd(jd_text, "local")
+    if reason is not None and budget is not None:
+        budget.degrade("jd_structuring", reason, "local")
+    return structured_jd
+
+
+async def structure_jds(jd_texts: List[str], structurer: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    structure_jd for several JDs, results in input order. Cache hits are
+    served directly; the misses share one batched spaCy pass on the CPU
+    executor and are then structured concurrently.
+    """
+    structurer = structurer or JD_STRUCTURER
+    if structurer not in STRUCTURERS:
+        raise ValueError(f"Unknown JD structurer '{structurer}', expected one of {STRUCTURERS}")
+
+    keys = [jd_cache_key(jd_text, "local" if structurer == "local" else "gemini") for jd_text in jd_texts]
+    results = [await jd_cache.aget(key) for key in keys]
+    if structurer == "auto":
+        for index, (jd_text, key) in enumerate(zip(jd_texts, keys)):
+            if results[index] is None and jd_fallbacks.get(key) is not None:
+                results[index] = await structure_jd(jd_text, "local")
+    misses: Dict[str, str] = {}
+    for jd_text, key, result in zip(jd_texts, keys, results):
+        if result is None:
+            misses.setdefault(key, jd_text)
+    if not misses:
+        return results
+
+    with metrics.stage("keyword_extraction"):
+        raw_keywords = await jd_keyword_extractor.extract_keywords_many(list(misses.values()))
+    structured = await asyncio.gather(*(
+        jd_flights.do((structurer, key), _structure_uncached, jd_text, structurer, key, keywords)
+        for (key, jd_text), keywords in zip(misses.items(), raw_keywords)
+    ))
+    by_key = dict(zip(misses, structured))
+    return [result if result is not None else by_key[key] for key, result in zip(keys, results)]
+
+
+async def _structure_uncached(jd_text: str, structurer: str, key: str,
+                              raw_keywords: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    if raw_keywords is None:
+        with metrics.stage("keyword_extraction"):
+            raw_keywords = await jd_keyword_extractor.extract_keywords_simple(jd_text)
+
+    if structurer == "gemini":
+        with metrics.stage("jd_structuring_gemini"):
+            structured_jd = await sendGemini.parse_with_gemini_async(sendGemini.system_prompt, raw_keywords)
+        if "error" not in structured_jd:
+            await jd_cache.aset(key, structured_jd)
+        return structured_jd
+
+    if structurer == "auto":
+        try:
+            structured_jd = await _structure_with_gemini(raw_keywords, JD_GEMINI_TIMEOUT_SECONDS)
+            await jd_cache.aset(key, structured_jd)
+            return structured_jd
+        except Exception as e:
+            logger.warning("Gemini JD structuring failed, using local structurer: %r", e)
+            jd_fallbacks.set(key, fallback_reason(e))
+        key = jd_cache_key(jd_text, "local")
+
+    with metrics.stage("jd_structuring_local"):
+        structured_jd = local_structurer.structure_keywords(raw_keywords)
+    await jd_cache.aset(key, structured_jd)
+    return structured_jd
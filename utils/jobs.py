@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from cachetools import TTLCache
+from starlette.concurrency import run_in_threadpool
+
+from utils import cache
+
+logger = logging.getLogger(__name__)
+
+# --- Job API configuration ---
+# JOB_STORE_URL takes the same URLs as the caches (e.g. sqlite:///jobs.db);
+# unset keeps job state in this process's memory.
+JOB_STORE_URL = os.getenv("JOB_STORE_URL")
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", 24 * 3600))
+JOB_MEMORY_MAX_JOBS = int(os.getenv("JOB_MEMORY_MAX_JOBS", 10_000))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", 100))
+JOB_MAX_WAIT_SECONDS = float(os.getenv("JOB_MAX_WAIT_SECONDS", 30))
+
+# queued -> running -> partial (structural/keyword result) -> done, or failed
+TERMINAL_STATUSES = ("done", "failed")
+
+
+class MemoryJobBackend:
+    """In-process job storage with the persistent cache backends' interface."""
+
+    def __init__(self, max_jobs: int, ttl: float):
+        self._jobs = TTLCache(maxsize=max_jobs, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._jobs[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._jobs.clear()
+
+
+class JobStore:
+    """
+    Job records (plain dicts) in a pluggable backend. Every update bumps the
+    job's version, which long-polling clients pass back to wait for changes.
+    Persistent backends block on I/O, so they are only called in the threadpool.
+    """
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self._blocking = not isinstance(backend, MemoryJobBackend)
+        self._lock = threading.Lock()
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._waiters: Dict[str, int] = {}
+
+    async def _call(self, func: Callable[..., Any], *args) -> Any:
+        if self._blocking:
+            return await run_in_threadpool(func, *args)
+        return func(*args)
+
+    async def create(self, **fields) -> Dict[str, Any]:
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "version": 1,
+            "created_at": now,
+            "updated_at": now,
+            "result": None,
+            "response": None,
+            "error": None,
+        }
+        job.update(fields)
+        await self._call(self.backend.set, job["id"], job, self.ttl)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self._call(self.backend.get, job_id)
+
+    def _update(self, job_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        # The lock keeps the read-modify-write atomic now that it may run in the threadpool
+        with self._lock:
+            job = dict(self.backend.get(job_id) or {"id": job_id, "version": 0, "created_at": time.time()})
+            job.update(fields)
+            job["version"] += 1
+            job["updated_at"] = time.time()
+            self.backend.set(job_id, job, self.ttl)
+        return job
+
+    async def update(self, job_id: str, **fields) -> Dict[str, Any]:
+        job = await self._call(self._update, job_id, fields)
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+        return job
+
+    async def wait(self, job_id: str, after_version: int, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Returns the job once its version is newer than after_version, it has
+        finished, or timeout seconds have passed. Updates made by this process
+        wake waiters at once; other workers' updates are picked up by
+        re-reading the store every second.
+        """
+        deadline = time.monotonic() + timeout
+        self._waiters[job_id] = self._waiters.get(job_id, 0) + 1
+        try:
+            while True:
+                job = await self.get(job_id)
+                if job is None or job["version"] > after_version or job["status"] in TERMINAL_STATUSES:
+                    return job
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return job
+                event = self._changed.setdefault(job_id, asyncio.Event())
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=min(remaining, 1.0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # The last waiter drops the event, or jobs nobody updates again would leak one
+            self._waiters[job_id] -= 1
+            if not self._waiters[job_id]:
+                del self._waiters[job_id]
+                self._changed.pop(job_id, None)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    Bounded queue drained by a fixed number of worker tasks on the event
+    loop. The heavy lifting inside a job still goes through the CPU executor
+    and the Gemini admission layer, so workers mostly wait on those.
+    """
+
+    def __init__(self, store: JobStore, workers: int, max_queued: int):
+        self.store = store
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._max_queued = max_queued
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_queued)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Jobs still waiting in the queue would otherwise stay "queued" forever
+        while self._queue is not None and not self._queue.empty():
+            job_id, _, _ = self._queue.get_nowait()
+            await self.store.update(job_id, status="failed", error="The server shut down before the job started")
+        self._queue = None
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, job_id: str, handler: Callable[..., Awaitable[None]], *args) -> None:
+        """Queues handler(job_id, *args). Raises JobQueueFull when the queue is at capacity."""
+        self.start()
+        try:
+            self._queue.put_nowait((job_id, handler, args))
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"The job queue is full ({self._max_queued} jobs)")
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, handler, args = await self._queue.get()
+            try:
+                await self.store.update(job_id, status="running")
+                await handler(job_id, *args)
+            except asyncio.CancelledError:
+                await self.store.update(job_id, status="failed", error="The server shut down while the job was running")
+                raise
+            except Exception as e:
+                logger.exception("Job %s failed", job_id)
+                await self.store.update(job_id, status="failed", error=str(e))
+            finally:
+                self._queue.task_done()
+
+
+job_store = JobStore(
+    cache.backend_from_url(JOB_STORE_URL, table="jobs") or MemoryJobBackend(JOB_MEMORY_MAX_JOBS, JOB_TTL_SECONDS),
+    ttl=JOB_TTL_SECONDS,
+)
+job_queue = JobQueue(job_store, workers=JOB_WORKERS, max_queued=JOB_QUEUE_MAX)
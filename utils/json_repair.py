@@ -0,0 +1,110 @@
+import json
+import re
+from typing import Any, List, Tuple
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _candidates(text: str) -> List[str]:
+    """
+    The text from the first bracket on, then the same cut at the last
+    matching closer: prose after the value is dropped only when the longer
+    candidate does not parse, so a truncated value is not cut short.
+    """
+    text = _FENCE.sub("", text.strip())
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if not starts:
+        return [text]
+    start = min(starts)
+    end = text.rfind(_CLOSERS[text[start]])
+    return [text[start:]] + ([text[start:end + 1]] if end > start else [])
+
+
+def _repair(text: str) -> str:
+    """
+    One pass over the text outside of strings: drops comments and trailing
+    commas, maps Python literals to JSON and closes whatever a truncated
+    response left open (string, then arrays/objects).
+    """
+    out = []
+    stack = []
+    in_string = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            out.append(char)
+            if char == "\\" and i + 1 < len(text):
+                out.append(text[i + 1])
+                i += 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+            out.append(char)
+        elif text.startswith("//", i):
+            i = text.find("\n", i)
+            if i == -1:
+                break
+            continue
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = len(text) if end == -1 else end + 2
+            continue
+        elif char in "{[":
+            stack.append(_CLOSERS[char])
+            out.append(char)
+        elif char in "}]":
+            _strip_trailing_comma(out)
+            if stack:
+                stack.pop()
+            out.append(char)
+        elif char.isalpha():
+            word = re.match(r"[A-Za-z]+", text[i:]).group(0)
+            out.append(_PY_LITERALS.get(word, word))
+            i += len(word)
+            continue
+        else:
+            out.append(char)
+        i += 1
+
+    if in_string:
+        out.append('"')
+    # A value cut off after its key or a separator
+    _strip_trailing_comma(out)
+    if out and "".join(out).rstrip().endswith(":"):
+        out.append(" null")
+    for closer in reversed(stack):
+        _strip_trailing_comma(out)
+        out.append(closer)
+    return "".join(out)
+
+
+def _strip_trailing_comma(out: list) -> None:
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ",":
+        del out[index]
+
+
+def loads(text: str) -> Tuple[Any, bool]:
+    """
+    Parses model output as JSON, repairing the usual malformations: a
+    markdown fence or prose around the value, comments, trailing commas,
+    Python literals, raw newlines in strings and output truncated by the
+    token limit. Returns (value, whether it needed repair). Raises
+    ValueError when the text cannot be repaired.
+    """
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError as e:
+        error = e
+    for candidate in _candidates(text):
+        try:
+            return json.loads(_repair(candidate), strict=False), True
+        except json.JSONDecodeError as e:
+            error = e
+    raise error
@@ -0,0 +1,283 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from utils import pdf_document
+
+# --- Layout engine configuration ---
+# Every detector always runs: their work is bounded by counts, not by the
+# clock (spans and rules by pdf_document's MAX_PDF_SPANS and
+# MAX_RULES_PER_PAGE, the rule grid by MAX_RULES_PER_ORIENTATION), so a
+# page gets the same layout however busy the worker is.
+
+# Lines shorter than this (stripped) are ignored, as they always were
+MIN_LINE_CHARS = 3
+
+# Columns: candidate gutters lie in the middle half of the page. A gutter
+# needs enough lines on both sides, almost none crossing it, and the text to
+# its right forming a real column: at least MIN_COLUMN_WIDTH_SHARE of the
+# page wide and starting at a common x (not a strip of dates).
+GUTTER_CANDIDATES = np.linspace(0.25, 0.75, 41)
+MIN_COLUMN_LINES = 5
+MIN_SIDE_SHARE = 0.15
+MIN_COLUMN_WIDTH_SHARE = 0.2
+MAX_CROSSING_SHARE = 0.1
+MIN_ALIGNED_START_SHARE = 0.4
+ALIGNMENT_TOLERANCE = 3.0
+
+# Tables: a grid of at least GRID_MIN x GRID_MIN intersecting rules, or a
+# run of consecutive rows of GRID_MIN+ text cells that all start on the same
+# GRID_MIN+ columns. The run must be GRID_MIN rows long when rules cross it
+# and MIN_UNRULED_TABLE_ROWS otherwise: a resume's "Title  City  Dates"
+# entry lines line up the same way, but free text sits between them. Spans
+# further apart than CELL_GAP_EMS font sizes are separate cells.
+GRID_MIN = 3
+MIN_UNRULED_TABLE_ROWS = 5
+ROW_TOLERANCE = 3.0
+COLUMN_TOLERANCE = 4.0
+CELL_GAP_EMS = 1.5
+MAX_RULES_PER_ORIENTATION = 500
+
+# Section headers: short lines set larger than the body text, in bold when
+# the body is not, or in capitals. The name at the top is usually one such
+# line, so a resume needs MIN_HEADERS of them.
+MAX_HEADER_WORDS = 5
+MAX_HEADER_CHARS = 40
+HEADER_SIZE_RATIO = 1.15
+MIN_HEADERS = 2
+TEXT_FONT_BOLD = 16
+_BOLD_FONT = re.compile(r"bold|black|heavy|semibold|demi|cmbx", re.IGNORECASE)
+_DIGIT = re.compile(r"\d")
+
+
+@dataclass
+class PageGeometry:
+    """
+    One page's text as NumPy arrays: a row per line of MIN_LINE_CHARS+
+    characters and a row per span of those lines.
+    """
+    number: int
+    width: float
+    height: float
+    texts: List[str]
+    line_boxes: np.ndarray   # (n, 4) x0 (leftmost span), y0, x1, y1
+    line_chars: np.ndarray   # (n,) stripped characters
+    line_sizes: np.ndarray   # (n,) largest font size
+    line_bold: np.ndarray    # (n,) bold characters are the majority
+    span_boxes: np.ndarray   # (k, 4)
+    span_lines: np.ndarray   # (k,) index of the span's line
+    span_sizes: np.ndarray   # (k,)
+    span_blank: np.ndarray   # (k,) whitespace-only span
+    span_fonts: List[str]
+    rules: np.ndarray        # (m, 4) x0, y0, x1, y1
+    images: int
+
+
+@dataclass
+class PageLayout:
+    number: int
+    columns: int = 1
+    has_table: bool = False
+    headers: List[str] = field(default_factory=list)
+
+
+def page_geometry(page: pdf_document.Page) -> PageGeometry:
+    texts, line_boxes, line_chars = [], [], []
+    span_boxes, span_lines, span_sizes, span_chars, span_flags, span_fonts = [], [], [], [], [], []
+    for line in page.lines:
+        text = line.text.strip()
+        if len(text) < MIN_LINE_CHARS:
+            continue
+        index = len(texts)
+        texts.append(text)
+        line_boxes.append((min(span.bbox[0] for span in line.spans),) + tuple(line.bbox[1:]))
+        line_chars.append(len(text))
+        for span in line.spans:
+            span_boxes.append(span.bbox)
+            span_lines.append(index)
+            span_sizes.append(span.size)
+            span_chars.append(len(span.text.strip()))
+            span_flags.append(span.flags)
+            span_fonts.append(span.font)
+
+    n = len(texts)
+    span_lines = np.array(span_lines, dtype=np.int64)
+    span_sizes = np.array(span_sizes, dtype=float)
+    span_chars = np.array(span_chars, dtype=float)
+    bold = (np.array(span_flags, dtype=np.int64) & TEXT_FONT_BOLD).astype(bool)
+    # A resume uses a handful of fonts: match each name once
+    fonts, font_index = np.unique(np.array(span_fonts, dtype=str), return_inverse=True)
+    bold |= np.array([bool(_BOLD_FONT.search(font)) for font in fonts], dtype=bool)[font_index]
+
+    line_sizes = np.zeros(n)
+    np.maximum.at(line_sizes, span_lines, span_sizes)
+    bold_chars = np.bincount(span_lines, weights=span_chars * bold, minlength=n)
+    all_chars = np.bincount(span_lines, weights=span_chars, minlength=n)
+
+    return PageGeometry(
+        number=page.number,
+        width=page.width,
+        height=page.height,
+        texts=texts,
+        line_boxes=np.array(line_boxes, dtype=float).reshape(-1, 4),
+        line_chars=np.array(line_chars, dtype=float),
+        line_sizes=line_sizes,
+        line_bold=bold_chars * 2 > all_chars,
+        span_boxes=np.array(span_boxes, dtype=float).reshape(-1, 4),
+        span_lines=span_lines,
+        span_sizes=span_sizes,
+        span_blank=span_chars == 0,
+        span_fonts=span_fonts,
+        rules=np.array(page.rules, dtype=float).reshape(-1, 4),
+        images=len(page.images),
+    )
+
+
+def body_style(pages: Sequence[PageGeometry]) -> Tuple[float, bool]:
+    """(character-weighted median font size, whether most text is bold) over all pages."""
+    sizes = np.concatenate([page.line_sizes for page in pages])
+    chars = np.concatenate([page.line_chars for page in pages])
+    bold = np.concatenate([page.line_bold for page in pages])
+    if not chars.sum():
+        return 0.0, False
+    order = np.argsort(sizes, kind="stable")
+    cumulative = np.cumsum(chars[order])
+    median = sizes[order][np.searchsorted(cumulative, cumulative[-1] / 2)]
+    return float(median), bool(chars[bold].sum() * 2 > chars.sum())
+
+
+# --- Detectors ---
+
+def detect_columns(page: PageGeometry) -> int:
+    n = len(page.texts)
+    if n < MIN_COLUMN_LINES or page.width <= 0:
+        return 1
+    x0, x1 = page.line_boxes[:, 0], page.line_boxes[:, 2]
+    gutters = GUTTER_CANDIDATES * page.width
+    left = (x1[None, :] <= gutters[:, None]).sum(axis=1)
+    right = (x0[None, :] >= gutters[:, None]).sum(axis=1)
+    crossing = n - left - right
+    min_side = max(MIN_COLUMN_LINES, MIN_SIDE_SHARE * n)
+    clear = (left >= min_side) & (right >= min_side) & (crossing <= MAX_CROSSING_SHARE * n)
+
+    # Each run of clear candidates is one gutter; check the column after it
+    edges = np.diff(np.concatenate(([0], clear.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    columns = 1
+    for start, end in zip(starts, ends):
+        gutter = gutters[(start + end - 1) // 2]
+        in_column = x0 >= gutter
+        if x1[in_column].max() - x0[in_column].min() < MIN_COLUMN_WIDTH_SHARE * page.width:
+            continue
+        _, counts = np.unique(np.round(x0[in_column] / ALIGNMENT_TOLERANCE), return_counts=True)
+        if counts.max() >= MIN_ALIGNED_START_SHARE * np.count_nonzero(in_column):
+            columns += 1
+    return columns
+
+
+def _rule_grid(rules: np.ndarray) -> bool:
+    if len(rules) < 2 * GRID_MIN:
+        return False
+    horizontal = rules[rules[:, 1] == rules[:, 3]]
+    vertical = rules[rules[:, 0] == rules[:, 2]]
+    # The same edge is often drawn twice (adjacent cell boxes)
+    horizontal = np.unique(np.round(horizontal), axis=0)[:MAX_RULES_PER_ORIENTATION]
+    vertical = np.unique(np.round(vertical), axis=0)[:MAX_RULES_PER_ORIENTATION]
+    if len(horizontal) < GRID_MIN or len(vertical) < GRID_MIN:
+        return False
+    tolerance = pdf_document.RULE_TOLERANCE + 1
+    vx, hy = vertical[:, 0][None, :], horizontal[:, 1][:, None]
+    crosses = (
+        (vx >= horizontal[:, [0]] - tolerance) & (vx <= horizontal[:, [2]] + tolerance)
+        & (hy >= vertical[:, 1][None, :] - tolerance) & (hy <= vertical[:, 3][None, :] + tolerance)
+    )
+    rows = np.unique(horizontal[crosses.sum(axis=1) >= 2][:, 1])
+    cols = np.unique(vertical[crosses.sum(axis=0) >= 2][:, 0])
+    return len(rows) >= GRID_MIN and len(cols) >= GRID_MIN
+
+
+def _crossed_by_rule(rules: np.ndarray, x0: float, y0: float, x1: float, y1: float) -> bool:
+    tolerance = pdf_document.RULE_TOLERANCE + 1
+    return bool(np.any(
+        (rules[:, 0] <= x1 + tolerance) & (rules[:, 2] >= x0 - tolerance)
+        & (rules[:, 1] <= y1 + tolerance) & (rules[:, 3] >= y0 - tolerance)
+    ))
+
+
+def _cell_grid(page: PageGeometry) -> bool:
+    keep = ~page.span_blank
+    boxes, lines, sizes = page.span_boxes[keep], page.span_lines[keep], page.span_sizes[keep]
+    if len(boxes) < GRID_MIN * GRID_MIN:
+        return False
+    # A new cell starts at every line, and wherever a span sits well clear of the previous one
+    gaps = boxes[1:, 0] - boxes[:-1, 2]
+    new_cell = np.concatenate(([True], (lines[1:] != lines[:-1]) | (gaps > CELL_GAP_EMS * sizes[1:])))
+    cell_x0 = boxes[new_cell, 0]
+    cell_y = (boxes[new_cell, 1] + boxes[new_cell, 3]) / 2
+
+    # Cells within ROW_TOLERANCE of each other vertically share a row; rows are numbered top to bottom
+    order = np.argsort(cell_y, kind="stable")
+    row_of = np.empty(len(order), dtype=np.int64)
+    row_of[order] = np.cumsum(np.concatenate(([0], np.diff(cell_y[order]) > ROW_TOLERANCE)))
+    cells_per_row = np.bincount(row_of)
+    grid_rows = cells_per_row[row_of] >= GRID_MIN
+    if np.count_nonzero(cells_per_row >= GRID_MIN) < GRID_MIN:
+        return False
+
+    # Left edges shared by GRID_MIN+ of those rows are table columns
+    x_bucket = np.round(cell_x0 / COLUMN_TOLERANCE).astype(np.int64)
+    pairs = np.unique(np.stack((row_of[grid_rows], x_bucket[grid_rows]), axis=1), axis=0)
+    buckets, rows_per_column = np.unique(pairs[:, 1], return_counts=True)
+    columns = buckets[rows_per_column >= GRID_MIN]
+    if len(columns) < GRID_MIN:
+        return False
+
+    # Table rows have every cell on a column; any other row (free text) ends a run of them
+    on_column = np.bincount(row_of, weights=np.isin(x_bucket, columns), minlength=len(cells_per_row))
+    table_row = (cells_per_row >= GRID_MIN) & (on_column == cells_per_row)
+    edges = np.diff(np.concatenate(([0], table_row.astype(np.int8), [0])))
+    row_top = np.full(len(cells_per_row), np.inf)
+    row_bottom = np.full(len(cells_per_row), -np.inf)
+    np.minimum.at(row_top, row_of, boxes[new_cell, 1])
+    np.maximum.at(row_bottom, row_of, boxes[new_cell, 3])
+    left, right = cell_x0.min(), boxes[:, 2].max()
+    for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+        rows = end - start
+        if rows >= MIN_UNRULED_TABLE_ROWS:
+            return True
+        if rows >= GRID_MIN and _crossed_by_rule(page.rules, left, row_top[start], right, row_bottom[end - 1]):
+            return True
+    return False
+
+
+def detect_table(page: PageGeometry) -> bool:
+    return _rule_grid(page.rules) or _cell_grid(page)
+
+
+def detect_headers(page: PageGeometry, body_size: float, body_bold: bool) -> List[str]:
+    if not page.texts:
+        return []
+    words = np.array([len(text.split()) for text in page.texts])
+    caps = np.array([text.isupper() and not _DIGIT.search(text) for text in page.texts], dtype=bool)
+    short = (words <= MAX_HEADER_WORDS) & (page.line_chars <= MAX_HEADER_CHARS)
+    larger = page.line_sizes >= body_size * HEADER_SIZE_RATIO
+    heavier = page.line_bold & (not body_bold) & (page.line_sizes >= body_size)
+    headers = short & (larger | heavier | caps)
+    return [page.texts[i] for i in np.flatnonzero(headers)]
+
+
+def analyze_page(page: PageGeometry, body_size: float, body_bold: bool) -> PageLayout:
+    return PageLayout(
+        number=page.number,
+        columns=detect_columns(page),
+        has_table=bool(detect_table(page)),
+        headers=detect_headers(page, body_size, body_bold),
+    )
+
+
+def analyze_layout(pages: Sequence[PageGeometry]) -> List[PageLayout]:
+    """Runs the detectors on every page against the document's body text style."""
+    body_size, body_bold = body_style(pages) if pages else (0.0, False)
+    return [analyze_page(page, body_size, body_bold) for page in pages]
@@ -0,0 +1,64 @@
+import copy
+import re
+from typing import Any, Dict
+
+from utils import schemas, skill_taxonomy
+from utils.skill_matcher import SkillMatcher
+
+# Empty JD in the exact shape sendGemini.system_prompt asks Gemini to
+# return, taken from the schema its output is validated against
+JD_SCHEMA: Dict[str, Any] = schemas.StructuredJD().model_dump()
+
+# Bumped together with the taxonomy file and the schema; part of the JD cache key
+STRUCTURER_VERSION = f"local-1-{skill_taxonomy.TAXONOMY_VERSION}-{schemas.SCHEMA_VERSION}"
+
+TITLE_WORDS = {
+    "engineer", "developer", "architect", "analyst", "scientist", "manager",
+    "lead", "administrator", "programmer", "consultant", "specialist", "designer",
+}
+
+# Compiled once at import: every canonical skill plus all taxonomy aliases
+_matcher = SkillMatcher(skill_taxonomy.CATEGORY_OF)
+
+
+def _guess_job_title(keywords) -> str:
+    candidates = [
+        keyword for keyword in keywords
+        if keyword.split() and keyword.split()[-1] in TITLE_WORDS and len(keyword.split()) <= 5
+    ]
+    if not candidates:
+        return ""
+    return max(candidates, key=lambda k: (len(k.split()), k)).title()
+
+
+def _experience_years(requirements) -> Dict[str, Any]:
+    years = []
+    for requirement in requirements:
+        match = re.match(r"(\d+(?:\.\d+)?)", requirement)
+        if match:
+            years.append(int(float(match.group(1))))
+    if not years:
+        return {"min": None, "max": None}
+    return {"min": min(years), "max": max(years) if max(years) != min(years) else None}
+
+
+def structure_keywords(raw_keywords: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Maps extract_keywords_simple output onto the JD schema using the skill
+    taxonomy. Deterministic, no network: a drop-in for parse_with_gemini.
+    """
+    keywords = raw_keywords.get("keywords", [])
+    structured = copy.deepcopy(JD_SCHEMA)
+    structured["job_title"] = _guess_job_title(keywords)
+    structured["experience_years"] = _experience_years(raw_keywords.get("experience_requirements", []))
+
+    # ";" keeps multi-word skills from matching across two separate keywords
+    found = _matcher.match(" ; ".join(keywords))["found"]
+    for skill in found:
+        target = structured
+        *parents, leaf = skill_taxonomy.CATEGORY_OF[skill].split(".")
+        for parent in parents:
+            target = target[parent]
+        target[leaf].append(skill)
+
+    return structured
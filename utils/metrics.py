@@ -0,0 +1,254 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Minimal Prometheus text-format instrumentation (no client library needed).
+# Metrics are per process; each uvicorn worker exposes its own /metrics.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry: List["_Metric"] = []
+_caches = []
+
+# Per-request list of (stage, seconds) used for the Server-Timing header
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                inf_labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{inf_labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+# --- Application metrics ---
+STAGE_SECONDS = Histogram("ats_stage_duration_seconds", "Duration of each analysis pipeline stage", ["stage"])
+REQUEST_SECONDS = Histogram("ats_http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"])
+IN_FLIGHT = Gauge("ats_http_requests_in_flight", "HTTP requests currently being served")
+WORKER_READY = Gauge("ats_worker_ready", "1 once this worker has finished warming up and is not draining")
+WORKER_WARMUP_SECONDS = Gauge("ats_worker_warmup_seconds", "How long this worker's warmup took")
+GEMINI_REQUESTS = Counter("ats_gemini_requests_total", "Gemini API calls", ["model"])
+GEMINI_ERRORS = Counter("ats_gemini_errors_total", "Failed Gemini API calls", ["model", "error"])
+GEMINI_TOKENS = Counter("ats_gemini_tokens_total", "Gemini tokens as reported by usage metadata", ["model", "kind"])
+GEMINI_IN_FLIGHT = Gauge("ats_gemini_in_flight", "Gemini calls currently holding a concurrency slot", ["model"])
+GEMINI_QUEUE_DEPTH = Gauge("ats_gemini_queue_depth", "Gemini calls waiting for a concurrency slot", ["model"])
+GEMINI_REJECTIONS = Counter("ats_gemini_rejections_total", "Gemini calls shed by admission control", ["model", "reason"])
+DEGRADATIONS = Counter("ats_degradations_total", "Responses that fell back to a cheaper result for a stage", ["stage", "reason"])
+GEMINI_RETRIES = Counter("ats_gemini_retries_total", "Gemini call attempts that were retried", ["model", "error"])
+PROMPT_TOKENS = Histogram(
+    "ats_prompt_tokens_estimated", "Estimated prompt size sent to Gemini", ["model"],
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+MODEL_OUTPUTS = Counter(
+    "ats_model_outputs_total", "Gemini JSON outputs by validation outcome (valid, repaired, invalid)", ["model", "outcome"]
+)
+PROMPT_TRUNCATIONS = Counter("ats_prompt_truncations_total", "Prompts whose resume text was trimmed to the token budget", ["model"])
+SINGLEFLIGHT_CALLS = Counter(
+    "ats_singleflight_calls_total", "Calls that started (leader) or joined (follower) a coalesced computation", ["group", "role"]
+)
+PDF_BYTES = Histogram(
+    "ats_pdf_size_bytes", "Size of uploaded PDFs",
+    buckets=(10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000, 50_000_000),
+)
+PAGE_CACHE_LOOKUPS = Counter("ats_page_cache_lookups_total", "Per-page extraction cache lookups", ["result"])
+UPLOAD_REJECTIONS = Counter("ats_upload_rejections_total", "Uploads rejected before or during parsing", ["reason"])
+PDF_PAGES = Histogram("ats_pdf_pages", "Page count of uploaded PDFs", buckets=(1, 2, 3, 5, 10, 20, 50, 100, 300))
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Records a stage duration in the histogram and the current request's Server-Timing."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def stage(name: str):
+    """Times the enclosed block as a pipeline stage (works around awaits too)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+
+def record_gemini_response(model: str, response) -> None:
+    GEMINI_REQUESTS.inc(model=model)
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        GEMINI_TOKENS.inc(getattr(usage, "prompt_token_count", 0) or 0, model=model, kind="prompt")
+        GEMINI_TOKENS.inc(getattr(usage, "candidates_token_count", 0) or 0, model=model, kind="completion")
+        # Prompt tokens served from the API's context cache (a subset of "prompt")
+        GEMINI_TOKENS.inc(getattr(usage, "cached_content_token_count", 0) or 0, model=model, kind="cached")
+
+
+def record_gemini_error(model: str, error: BaseException) -> None:
+    GEMINI_REQUESTS.inc(model=model)
+    GEMINI_ERRORS.inc(model=model, error=type(error).__name__)
+
+
+def register_cache(cache) -> None:
+    """Exposes a TieredCache's hit/miss counters on /metrics."""
+    _caches.append(cache)
+
+
+def _cache_samples() -> List[str]:
+    lines = [
+        "# HELP ats_cache_hits_total Cache hits by tier",
+        "# TYPE ats_cache_hits_total counter",
+    ]
+    stats = [cache.stats() for cache in _caches]
+    for s in stats:
+        lines.append(f'ats_cache_hits_total{{cache="{s["name"]}",tier="memory"}} {s["memory_hits"]}')
+        lines.append(f'ats_cache_hits_total{{cache="{s["name"]}",tier="disk"}} {s["disk_hits"]}')
+    lines += ["# HELP ats_cache_misses_total Cache misses", "# TYPE ats_cache_misses_total counter"]
+    lines += [f'ats_cache_misses_total{{cache="{s["name"]}"}} {s["misses"]}' for s in stats]
+    lines += ["# HELP ats_cache_hit_ratio Cache hit ratio since start", "# TYPE ats_cache_hit_ratio gauge"]
+    lines += [f'ats_cache_hit_ratio{{cache="{s["name"]}"}} {s["hit_ratio"]}' for s in stats]
+    return lines
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    lines.extend(_cache_samples())
+    return "\n".join(lines) + "\n"
+
+
+def _server_timing(timings: List[Tuple[str, float]]) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: request latency per route, in-flight gauge, and a
+    Server-Timing header listing the stages timed while handling the request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "")
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                timings.append(("total", time.perf_counter() - start))
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(timings).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            IN_FLIGHT.dec()
+            # Route template (e.g. /jobs/{job_id}) is known once routing ran
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=method, route=route, status=status["code"])
+            _request_timings.reset(token)
@@ -0,0 +1,330 @@
+import fitz  # PyMuPDF
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils import cache
+
+# get_text("dict") flags without TEXT_PRESERVE_IMAGES: we only need image
+# metadata, which get_images() provides without decoding any pixel data.
+_DICT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# --- Rule lines ---
+# Straight horizontal/vertical strokes (and the edges of thin or boxed
+# rectangles) are kept as segments for table detection; curves and
+# diagonals are dropped. RULE_TOLERANCE is how far off axis a stroke may be.
+RULE_TOLERANCE = 1.0
+MIN_RULE_LENGTH = 8.0
+MAX_RULES_PER_PAGE = 4000
+
+# --- Per-page line cache ---
+# Text extraction dominates parsing, so extracted lines (and rule segments)
+# are cached per page, keyed by a fingerprint of the page's content stream,
+# size and fonts (down to their embedded programs and ToUnicode maps). A
+# re-uploaded resume with one edited page only re-extracts that page.
+# Parsing runs in whichever executor worker is free, so behind each worker's
+# in-memory tier the pages are kept in a backend all workers share
+# (PAGE_CACHE_URL, by default a SQLite file in the temp directory; empty
+# for memory only). PAGE_CACHE_MAX_BYTES=0 disables the cache.
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+PAGE_CACHE_TTL_SECONDS = float(os.getenv("PAGE_CACHE_TTL_SECONDS", 3600))
+PAGE_CACHE_URL = os.getenv("PAGE_CACHE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'ats_page_cache.db')}")
+
+# --- Document limits ---
+# Enforced while the document is parsed, as soon as each figure is known:
+# the page count on open, image sizes from page metadata (no pixel data is
+# decoded) before a page's text is extracted, and spans page by page.
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", 50))
+MAX_PDF_SPANS = int(os.getenv("MAX_PDF_SPANS", 60000))
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", 40_000_000))
+# A PDF whose first pages carry images but no fonts at all is a scan
+SCANNED_SAMPLE_PAGES = 3
+
+
+class PDFRejected(Exception):
+    """
+    Raised for uploads that are too large or that cannot be analyzed (not a
+    PDF, password protected, scanned). reason labels the rejection metric;
+    status_code is 413 for size limits and 422 otherwise.
+    """
+
+    def __init__(self, detail: str, reason: str, status_code: int = 413):
+        # All arguments go to Exception so the error pickles across the process pool
+        super().__init__(detail, reason, status_code)
+        self.detail = detail
+        self.reason = reason
+        self.status_code = status_code
+
+    def __str__(self):
+        return self.detail
+
+
+@dataclass
+class Span:
+    text: str
+    bbox: Tuple[float, float, float, float]
+    font: str
+    size: float
+    flags: int
+
+
+@dataclass
+class Line:
+    spans: List[Span]
+    bbox: Tuple[float, float, float, float]
+
+    @property
+    def text(self) -> str:
+        return "".join(span.text for span in self.spans)
+
+
+@dataclass
+class Image:
+    xref: int
+    width: int
+    height: int
+
+
+@dataclass
+class Page:
+    number: int
+    width: float
+    height: float
+    lines: List[Line] = field(default_factory=list)
+    images: List[Image] = field(default_factory=list)
+    # Axis-aligned rule segments (x0, y0, x1, y1) from the page's drawings
+    rules: List[Tuple[float, float, float, float]] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        # Same layout as page.get_text(): one line of text per PDF line
+        return "".join(line.text + "\n" for line in self.lines)
+
+
+@dataclass
+class PDFDocument:
+    """
+    In-memory model of a PDF built from a single PyMuPDF pass.
+    Shared by text extraction and the structural analyzer so the
+    upload is only ever parsed once per request.
+    """
+    pages: List[Page] = field(default_factory=list)
+    # How many pages came from the per-page cache
+    cached_pages: int = 0
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    @property
+    def text(self) -> str:
+        return "".join(page.text for page in self.pages)
+
+    def stats(self) -> dict:
+        """Input characteristics recorded with profiles: pages, lines, spans, fonts, images."""
+        spans = [span for page in self.pages for line in page.lines for span in line.spans]
+        return {
+            "pages": self.page_count,
+            "lines": sum(len(page.lines) for page in self.pages),
+            "spans": len(spans),
+            "fonts": len({span.font for span in spans}),
+            "images": sum(len(page.images) for page in self.pages),
+        }
+
+
+page_cache: Optional[cache.TieredCache] = (
+    cache.TieredCache(
+        "page",
+        max_bytes=PAGE_CACHE_MAX_BYTES,
+        ttl=PAGE_CACHE_TTL_SECONDS,
+        backend=cache.backend_from_url(PAGE_CACHE_URL, table="page_cache"),
+    )
+    if PAGE_CACHE_MAX_BYTES > 0 else None
+)
+
+
+# Cache entries are JSON: [[line bbox, [[text, bbox, font, size, flags], ...]], ...] and the rules
+
+def _encode_entry(lines: List[Line], rules: list) -> List[Any]:
+    return [
+        [[line.bbox, [[span.text, span.bbox, span.font, span.size, span.flags] for span in line.spans]] for line in lines],
+        rules,
+    ]
+
+
+def _decode_entry(entry: List[Any]) -> Tuple[List[Line], list]:
+    lines, rules = entry
+    return [
+        Line(spans=[Span(text, tuple(bbox), font, size, flags) for text, bbox, font, size, flags in spans], bbox=tuple(bbox))
+        for bbox, spans in lines
+    ], [tuple(rule) for rule in rules]
+
+
+_REFERENCE = re.compile(r"(\d+) \d+ R")
+
+
+def _object_digest(doc, xref: int, digests: Dict[int, str]) -> str:
+    """
+    Hash of a PDF object, its raw stream and every object it references,
+    memoized per document in digests. A font's ToUnicode map, encoding,
+    widths and embedded program all change the text extracted with it.
+    """
+    if xref not in digests:
+        digests[xref] = ""  # a reference back into the walk adds nothing
+        source = doc.xref_object(xref, compressed=True)
+        stream = (doc.xref_stream_raw(xref) or b"") if doc.xref_is_stream(xref) else b""
+        referenced = [_object_digest(doc, int(ref), digests) for ref in _REFERENCE.findall(source)]
+        digests[xref] = cache.content_hash(source, stream, *referenced)
+    return digests[xref]
+
+
+def page_fingerprint(page, font_digests: Optional[Dict[int, str]] = None) -> str:
+    """
+    Hash of everything a page's extracted lines and rules depend on.
+    font_digests memoizes font hashes across the pages of one document.
+    """
+    font_digests = {} if font_digests is None else font_digests
+    fonts = sorted(
+        (font[3], font[4], font[2], font[5], _object_digest(page.parent, font[0], font_digests) if font[0] > 0 else "")
+        for font in page.get_fonts()
+    )
+    # Form XObjects are drawn from the content stream but stored outside it
+    forms = [page.parent.xref_stream(xobject[0]) or b"" for xobject in page.get_xobjects()]
+    return cache.content_hash(
+        page.read_contents(),
+        repr((tuple(page.rect), tuple(page.mediabox), page.rotation)),
+        repr(fonts),
+        *forms,
+    )
+
+
+def _extract_lines(page) -> List[Line]:
+    lines = []
+    for block in page.get_text("dict", flags=_DICT_FLAGS)["blocks"]:
+        for line in block.get("lines", []):
+            spans = [
+                Span(
+                    text=span.get("text", ""),
+                    bbox=tuple(span["bbox"]),
+                    font=span.get("font", "N/A"),
+                    size=span.get("size", 0.0),
+                    flags=span.get("flags", 0),
+                )
+                for span in line.get("spans", [])
+            ]
+            lines.append(Line(spans=spans, bbox=tuple(line["bbox"])))
+    return lines
+
+
+def _extract_rules(page) -> List[Tuple[float, float, float, float]]:
+    rules = []
+
+    def add(x0, y0, x1, y1):
+        if abs(y1 - y0) <= RULE_TOLERANCE and abs(x1 - x0) >= MIN_RULE_LENGTH:
+            y = (y0 + y1) / 2
+            rules.append((min(x0, x1), y, max(x0, x1), y))
+        elif abs(x1 - x0) <= RULE_TOLERANCE and abs(y1 - y0) >= MIN_RULE_LENGTH:
+            x = (x0 + x1) / 2
+            rules.append((x, min(y0, y1), x, max(y0, y1)))
+
+    # get_cdrawings skips building Point/Rect objects, which get_drawings
+    # creates for every path item
+    for path in page.get_cdrawings():
+        for item in path["items"]:
+            if item[0] == "l":
+                (x0, y0), (x1, y1) = item[1], item[2]
+                add(x0, y0, x1, y1)
+            elif item[0] == "re":
+                x0, y0, x1, y1 = item[1][:4]
+                # A hairline rectangle is a rule; any other box contributes its edges
+                if y1 - y0 <= 2 * RULE_TOLERANCE:
+                    add(x0, (y0 + y1) / 2, x1, (y0 + y1) / 2)
+                elif x1 - x0 <= 2 * RULE_TOLERANCE:
+                    add((x0 + x1) / 2, y0, (x0 + x1) / 2, y1)
+                else:
+                    add(x0, y0, x1, y0)
+                    add(x0, y1, x1, y1)
+                    add(x0, y0, x0, y1)
+                    add(x1, y0, x1, y1)
+        if len(rules) >= MAX_RULES_PER_PAGE:
+            return rules[:MAX_RULES_PER_PAGE]
+    return rules
+
+
+def _page_images(page) -> List[Image]:
+    images = []
+    for image in page.get_images():
+        if image[2] * image[3] > MAX_IMAGE_PIXELS:
+            raise PDFRejected(
+                f"Page {page.number + 1} has a {image[2]}x{image[3]} image; "
+                f"images may have at most {MAX_IMAGE_PIXELS} pixels", "image_pixels"
+            )
+        images.append(Image(xref=image[0], width=image[2], height=image[3]))
+    return images
+
+
+def _is_image_only(page) -> bool:
+    return not page.get_fonts() and bool(page.get_images())
+
+
+def _check_document(doc) -> None:
+    """The checks that need nothing but the open document: encryption, page count, scans."""
+    if doc.needs_pass:
+        raise PDFRejected("The PDF is password protected", "encrypted", 422)
+    if doc.page_count > MAX_PDF_PAGES:
+        raise PDFRejected(f"The PDF has {doc.page_count} pages; at most {MAX_PDF_PAGES} are allowed", "pages")
+    sample = [doc[number] for number in range(min(SCANNED_SAMPLE_PAGES, doc.page_count))]
+    if sample and all(_is_image_only(page) for page in sample):
+        raise PDFRejected(
+            "The PDF looks scanned (its pages are images without text); upload a PDF with selectable text",
+            "scanned", 422
+        )
+
+
+def _build_page(page, font_digests: Dict[int, str]) -> Tuple[Page, bool]:
+    """Returns (page model, whether its lines and rules came from the cache)."""
+    images = _page_images(page)
+    entry = None
+    if page_cache is not None:
+        key = page_fingerprint(page, font_digests)
+        entry = page_cache.get(key)
+    cached = entry is not None
+    if cached:
+        lines, rules = _decode_entry(entry)
+    else:
+        lines, rules = _extract_lines(page), _extract_rules(page)
+        if page_cache is not None:
+            page_cache.set(key, _encode_entry(lines, rules))
+
+    # Page number and images always come from this document
+    model = Page(number=page.number, width=page.rect.width, height=page.rect.height,
+                 lines=lines, images=images, rules=rules)
+    return model, cached
+
+
+def parse_pdf(source) -> PDFDocument:
+    """
+    Builds a PDFDocument from raw bytes or a file path.
+    Raises PDFRejected for documents over the limits above, encrypted or
+    scanned ones, and whatever PyMuPDF raises for unreadable input.
+    """
+    if isinstance(source, str):
+        doc = fitz.open(source)
+    else:
+        doc = fitz.open(stream=source, filetype="pdf")
+
+    document = PDFDocument()
+    spans = 0
+    font_digests: Dict[int, str] = {}
+    with doc:
+        _check_document(doc)
+        for page in doc:
+            model, cached = _build_page(page, font_digests)
+            spans += sum(len(line.spans) for line in model.lines)
+            if spans > MAX_PDF_SPANS:
+                raise PDFRejected(f"The PDF has more than {MAX_PDF_SPANS} text spans", "spans")
+            document.pages.append(model)
+            document.cached_pages += cached
+    return document
@@ -1,26 +1,20 @@
-import pdfplumber
 from fastapi import UploadFile
-from io import BytesIO
+from utils import ingest, pdf_document
+
+def extract_text_from_bytes(pdf_bytes) -> str:
+    """Plain text of a PDF given as raw bytes. Raises on unreadable input."""
+    return pdf_document.parse_pdf(pdf_bytes).text
 
 def extract_text_from_pdf(pdf: UploadFile) -> str:
     """
     Extracts text from ALL pages of an uploaded PDF file.
-    Works by reading the file into memory first.
-    Returns an empty string if extraction fails.
+    Reads the upload once, within the ingest limits, and parses it into the
+    shared document model. Returns an empty string if extraction fails or
+    the upload is rejected.
     """
-    full_text = ""
     try:
-        pdf_bytes = pdf.file.read()
-        pdf_stream = BytesIO(pdf_bytes)
-        pdf.file.seek(0)  # Reset pointer after reading
-
-        with pdfplumber.open(pdf_stream) as pdf_doc:
-            for page in pdf_doc.pages:
-                text = page.extract_text()
-                if text:
-                    full_text += text + "\n"
-        return full_text
+        return extract_text_from_bytes(ingest.read_file(pdf.file, pdf.filename or "upload"))
     except Exception as e:
         return ""
     finally:
-        pdf.file.seek(0)  
\ No newline at end of file
+        pdf.file.seek(0)
@@ -0,0 +1,123 @@
+import gc
+import logging
+import os
+import signal
+import time
+from typing import Dict, Optional
+
+import uvicorn
+
+from utils import executor, warmup
+
+logger = logging.getLogger(__name__)
+
+# --- Server configuration ---
+# WEB_CONCURRENCY is the worker count convention uvicorn/gunicorn also read
+SERVER_HOST = os.getenv("HOST", "0.0.0.0")
+SERVER_WORKERS = int(os.getenv("WEB_CONCURRENCY", 1))
+SERVER_LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+SERVER_GRACEFUL_TIMEOUT_SECONDS = float(os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", 30))
+
+# A worker dying sooner than this after its start is restarted with a delay,
+# so a crash at startup does not turn into a fork loop
+MIN_WORKER_UPTIME_SECONDS = 5.0
+RESTART_DELAY_SECONDS = 1.0
+
+
+def _worker_config(app, host: str, port: int) -> uvicorn.Config:
+    return uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        log_level=SERVER_LOG_LEVEL,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT_SECONDS,
+    )
+
+
+def _spawn(app, config: uvicorn.Config, sock) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    # Child: its own process group, so the supervisor can reap the CPU pool
+    # it forks if it dies; uvicorn installs its own SIGINT/SIGTERM handlers
+    os.setpgid(0, 0)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    code = 0
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException:
+        logger.exception("Worker %d crashed", os.getpid())
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def serve(app, port: int, host: Optional[str] = None, workers: Optional[int] = None) -> None:
+    """
+    Runs the app with a pre-fork model: the parent loads spaCy, the taxonomy
+    and the matchers, runs the warmup pipeline once, binds the socket and then
+    forks the workers, which share those pages copy-on-write. Each worker
+    still warms its own CPU pool before serving. Crashed workers are
+    replaced; SIGTERM/SIGINT stop all of them gracefully.
+    """
+    host = host or SERVER_HOST
+    workers = max(1, workers or SERVER_WORKERS)
+    config = _worker_config(app, host, port)
+
+    if "ATS_EXECUTOR_WORKERS" not in os.environ:
+        # Split the cores between the HTTP workers' CPU pools
+        executor.EXECUTOR_WORKERS = max(1, (os.cpu_count() or 1) // workers)
+
+    start = time.perf_counter()
+    warmup.preload()
+    warmup.run_pipeline()
+    logger.info("Preloaded models in %.2fs", time.perf_counter() - start)
+
+    sock = config.bind_socket()
+    if workers == 1:
+        uvicorn.Server(config).run(sockets=[sock])
+        return
+
+    # Objects allocated so far are never freed; keeping the collector off them
+    # stops it from touching (and un-sharing) their pages in every worker
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, float] = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        children[_spawn(app, config, sock)] = time.monotonic()
+    logger.info("Started %d workers on %s:%d", workers, host, port)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        logger.warning("Worker %d exited with status %d, restarting", pid, os.waitstatus_to_exitcode(status))
+        try:
+            # Its CPU pool processes would otherwise wait for work forever
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        if time.monotonic() - started < MIN_WORKER_UPTIME_SECONDS:
+            time.sleep(RESTART_DELAY_SECONDS)
+        if not stopping:
+            children[_spawn(app, config, sock)] = time.monotonic()
+    sock.close()
@@ -0,0 +1,234 @@
+import contextvars
+import cProfile
+import collections
+import hmac
+import io
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+# --- Profiling configuration ---
+# Profiling is off unless PROFILING_TOKEN is set. Requests carrying
+# "X-Profile-Token: <token>" are profiled, and so is a PROFILE_SAMPLE_RATE
+# share of all requests (adjustable at runtime through /admin/profiling).
+# At most PROFILE_MAX_PER_MINUTE requests per worker are profiled, since
+# tracemalloc slows the profiled stages down several times.
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_MAX_PER_MINUTE = int(os.getenv("PROFILE_MAX_PER_MINUTE", 6))
+# Sampled requests are kept only when slower than this; requested ones always
+PROFILE_SLOW_SECONDS = float(os.getenv("PROFILE_SLOW_SECONDS", 5))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 20))
+PROFILE_TOP_N = 30
+PROFILE_TRACE_FRAMES = 10
+
+PROFILE_HEADER = "x-profile-token"
+
+
+def token_valid(token: Optional[str]) -> bool:
+    return bool(PROFILING_TOKEN) and token is not None and hmac.compare_digest(token, PROFILING_TOKEN)
+
+
+# --- Worker side ---
+# run_profiled executes inside the CPU executor (possibly another process),
+# so it returns plain picklable data.
+
+_tracing_lock = threading.Lock()
+
+
+def run_profiled(fn: Callable[..., Any], args: tuple, kwargs: dict) -> tuple:
+    """
+    Runs fn(*args, **kwargs) under cProfile and, unless another profiled call
+    (or PYTHONTRACEMALLOC) is already tracing in this process, tracemalloc.
+    With the thread executor the allocation figures include other threads. Returns (result, stage)
+    where stage holds the timings, the top functions, the marshalled pstats
+    data and the top allocation sites. Exceptions from fn propagate.
+    """
+    tracing = _tracing_lock.acquire(blocking=False)
+    if tracing and tracemalloc.is_tracing():
+        _tracing_lock.release()
+        tracing = False
+    if tracing:
+        tracemalloc.start(PROFILE_TRACE_FRAMES)
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        result = profiler.runcall(fn, *args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        allocations = None
+        if tracing:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            _tracing_lock.release()
+            allocations = {
+                "peak_kb": round(peak / 1024, 1),
+                "retained_kb": round(current / 1024, 1),
+                "top": [
+                    {"location": str(stat.traceback[0]), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:PROFILE_TOP_N]
+                ],
+            }
+
+    summary = io.StringIO()
+    stats = pstats.Stats(profiler, stream=summary)
+    stats.sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+    return result, {
+        "function": f"{fn.__module__}.{fn.__qualname__}",
+        "seconds": round(elapsed, 4),
+        "cpu_profile": summary.getvalue(),
+        "pstats": marshal.dumps(stats.stats),
+        "allocations": allocations,
+    }
+
+
+# --- Request side ---
+
+class ProfileSession:
+    """Profiles and input characteristics gathered while handling one request."""
+
+    def __init__(self, path: str, reason: str):
+        self.id = uuid.uuid4().hex
+        self.path = path
+        self.reason = reason
+        self.started_at = time.time()
+        self.stages: List[Dict[str, Any]] = []
+        self.inputs: Dict[str, Any] = {}
+
+
+_session: contextvars.ContextVar[Optional[ProfileSession]] = contextvars.ContextVar("profile_session", default=None)
+
+
+def current() -> Optional[ProfileSession]:
+    return _session.get()
+
+
+def annotate(**inputs) -> None:
+    """Records input characteristics on the current request's profile, if any."""
+    session = _session.get()
+    if session is not None:
+        session.inputs.update(inputs)
+
+
+class _Sampler:
+    """Decides which requests get profiled: explicit requests or the sample rate, within a per-minute cap."""
+
+    def __init__(self):
+        self.sample_rate = PROFILE_SAMPLE_RATE
+        self.slow_seconds = PROFILE_SLOW_SECONDS
+        self._lock = threading.Lock()
+        self._recent = collections.deque()
+
+    def choose(self, requested: bool) -> Optional[str]:
+        if not PROFILING_TOKEN:
+            return None
+        if requested:
+            reason = "requested"
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            reason = "sampled"
+        else:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if len(self._recent) >= PROFILE_MAX_PER_MINUTE:
+                return None
+            self._recent.append(now)
+        return reason
+
+
+sampler = _Sampler()
+
+
+class ProfileStore:
+    """The last PROFILE_KEEP kept profiles of this worker, newest last."""
+
+    def __init__(self, keep: int):
+        self._profiles = collections.OrderedDict()
+        self._keep = keep
+        self._lock = threading.Lock()
+
+    def add(self, profile: Dict[str, Any]) -> None:
+        with self._lock:
+            self._profiles[profile["id"]] = profile
+            while len(self._profiles) > self._keep:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [
+            {key: profile[key] for key in ("id", "path", "reason", "status", "seconds", "started_at", "inputs")}
+            for profile in reversed(profiles)
+        ]
+
+
+profile_store = ProfileStore(PROFILE_KEEP)
+
+
+def _finish(session: ProfileSession, status: int, seconds: float) -> None:
+    if not session.stages:
+        return
+    if session.reason == "sampled" and seconds < sampler.slow_seconds:
+        return
+    profile_store.add({
+        "id": session.id,
+        "path": session.path,
+        "reason": session.reason,
+        "status": status,
+        "seconds": round(seconds, 4),
+        "started_at": session.started_at,
+        "inputs": session.inputs,
+        "stages": session.stages,
+    })
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware: opens a ProfileSession for requests chosen by the
+    sampler, so executor.run_cpu profiles their CPU stages, and stores the
+    profile when the request finishes. Profiled responses carry X-Profile-Id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILING_TOKEN:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers", []))
+        token = headers.get(PROFILE_HEADER.encode("latin-1"))
+        reason = sampler.choose(token_valid(token.decode("latin-1")) if token else False)
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(scope.get("path", ""), reason)
+        status = {"code": 500}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", session.id.encode())]}
+            await send(message)
+
+        context_token = _session.set(session)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _session.reset(context_token)
+            _finish(session, status["code"], time.perf_counter() - start)
@@ -0,0 +1,107 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, List, Sequence, Tuple
+
+# --- Prompt budget configuration ---
+# Token counts are estimated from characters (the API's own count needs a
+# round trip). PROMPT_TOKEN_BUDGET caps the whole Gemini Pro prompt; the
+# resume text gets whatever the instructions and analysis JSON leave over.
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 8000))
+PROMPT_CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", 4.0))
+MIN_RESUME_TOKENS = 500
+
+# Share of a truncated resume kept from the start; the rest comes from the end
+TRUNCATION_HEAD_SHARE = 0.7
+TRUNCATION_MARKER = "[... {} lines omitted ...]"
+
+# Lines this close to the top/bottom of a page are header/footer candidates
+EDGE_LINES = 3
+
+_SPACES = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+_PAGE_NUMBER = re.compile(r"^(page\s*)?\d{1,3}(\s*(/|of)\s*\d{1,3})?$", re.IGNORECASE)
+_BOILERPLATE = re.compile(
+    r"^(references (are )?available (up)?on request\.?|curriculum vitae|r[eé]sum[eé])$", re.IGNORECASE
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / PROMPT_CHARS_PER_TOKEN)
+
+
+def compact_json(value: Any) -> str:
+    """JSON without indentation or spaces after separators."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def _normalize_line(line: str) -> str:
+    return _SPACES.sub(" ", line).strip()
+
+
+def compact_resume_text(page_texts: Sequence[str]) -> str:
+    """
+    Prompt-ready resume text: whitespace-normalised non-empty lines without
+    page numbers, boilerplate, consecutive duplicates or repeated running
+    headers/footers (only the first copy of those is kept, since the name /
+    contact header is worth sending once).
+    """
+    pages = [[line for line in map(_normalize_line, text.splitlines()) if line] for text in page_texts]
+
+    running = set()
+    if len(pages) > 1:
+        edge_counts = Counter()
+        for lines in pages:
+            edge_counts.update(set(lines[:EDGE_LINES] + lines[-EDGE_LINES:]))
+        running = {line for line, count in edge_counts.items() if count > 1}
+
+    kept: List[str] = []
+    seen_running = set()
+    for lines in pages:
+        for line in lines:
+            if _PAGE_NUMBER.match(line) or _BOILERPLATE.match(line):
+                continue
+            if line in running:
+                if line in seen_running:
+                    continue
+                seen_running.add(line)
+            if kept and kept[-1] == line:
+                continue
+            kept.append(line)
+    return "\n".join(kept)
+
+
+def fit_to_budget(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """
+    Trims text to about max_tokens on line boundaries, keeping the start and
+    the end and marking the gap. Returns (text, truncated).
+    """
+    max_chars = int(max_tokens * PROMPT_CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return text, False
+
+    lines = text.split("\n")
+    head_chars = int(max_chars * TRUNCATION_HEAD_SHARE)
+    tail_chars = max_chars - head_chars - len(TRUNCATION_MARKER) - 8
+
+    head, used = [], 0
+    for line in lines:
+        if used + len(line) + 1 > head_chars:
+            break
+        head.append(line)
+        used += len(line) + 1
+
+    tail, used = [], 0
+    for line in reversed(lines[len(head):]):
+        if used + len(line) + 1 > tail_chars:
+            break
+        tail.append(line)
+        used += len(line) + 1
+    tail.reverse()
+
+    if not head and not tail:
+        # One enormous line: cut it instead
+        return text[:max_chars], True
+    omitted = len(lines) - len(head) - len(tail)
+    return "\n".join(head + [TRUNCATION_MARKER.format(omitted)] + tail), True
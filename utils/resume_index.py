@@ -0,0 +1,258 @@
+import hashlib
+import heapq
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils import atsAanalyzer, cache, pdf_document, skill_matcher
+
+# --- Resume index configuration ---
+RESUME_INDEX_PATH = os.getenv("RESUME_INDEX_PATH", "resume_index.db")
+
+TOKENIZER_VERSION = "2"
+
+# Stored features depend on the analyzer and the tokenizer (skills are
+# matched at ranking time); resumes indexed under another version are
+# reported as stale.
+FEATURES_VERSION = cache.content_hash(atsAanalyzer.ANALYZER_VERSION, TOKENIZER_VERSION)[:12]
+
+STRUCTURE_FIELDS = ("column", "simple fonts", "no images", "clear section header", "poor text alignment", "no tables")
+
+_SQL_BATCH = 500
+
+
+# --- Tokens ---
+# A resume is indexed under "w:<word>" for every run of word characters in
+# its lowercased text. SkillMatcher only matches a term on word boundaries,
+# so each word run of the term is a whole word run of the text too: a
+# resume posted under all of a term's words may contain the term, and one
+# missing any of them cannot. Ranking matches the candidates' stored text
+# with SkillMatcher itself.
+
+_WORD = re.compile(r"\w+")
+
+
+def word_tokens(text: str) -> Set[str]:
+    return {"w:" + word for word in _WORD.findall(text.lower())}
+
+
+def extract_features(pdf_bytes: bytes) -> Dict[str, Any]:
+    """
+    Executor entry point for ingestion: parses the PDF once and returns its
+    text, structural checks/score and index tokens. Raises ValueError when
+    the PDF has too little text to analyze.
+    """
+    document = pdf_document.parse_pdf(pdf_bytes)
+    result, _ = atsAanalyzer.analyze_with_layout(document, None)
+    if "error" in result:
+        raise ValueError(result["error"])
+    text = document.text
+    return {
+        "sha256": hashlib.sha256(pdf_bytes).hexdigest(),
+        "pages": document.page_count,
+        "text": text,
+        "structure": {field: result[field] for field in STRUCTURE_FIELDS},
+        "structure_score": result["score"]["structure score"],
+        "tokens": sorted(word_tokens(text)),
+    }
+
+
+def _batches(items: List[Any], size: int = _SQL_BATCH) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class ResumeIndex:
+    """
+    On-disk inverted index of ingested resumes (SQLite, WAL mode so several
+    uvicorn workers can share the file). Ranking reads the posting lists of
+    the words in the JD's skills, then the stored text of just the resumes
+    that can still make the top k, to match the skills in it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS resumes ("
+            " id TEXT PRIMARY KEY, filename TEXT, sha256 TEXT UNIQUE NOT NULL, pages INTEGER,"
+            " text TEXT, structure TEXT, structure_score REAL NOT NULL,"
+            " features_version TEXT NOT NULL, created_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS resumes_by_structure ON resumes (structure_score DESC);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " token TEXT NOT NULL, resume_id TEXT NOT NULL, PRIMARY KEY (token, resume_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS postings_by_resume ON postings (resume_id);"
+        )
+        self._conn.commit()
+
+    def add(self, features: Dict[str, Any], filename: str) -> Tuple[str, bool]:
+        """Stores a resume's features. Returns (resume_id, already_indexed)."""
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM resumes WHERE sha256 = ?", (features["sha256"],)).fetchone()
+            if row is not None:
+                return row[0], True
+            resume_id = uuid.uuid4().hex
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO resumes (id, filename, sha256, pages, text, structure, structure_score,"
+                    " features_version, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        resume_id, filename, features["sha256"], features["pages"], features["text"],
+                        json.dumps(features["structure"]), features["structure_score"], FEATURES_VERSION, time.time(),
+                    ),
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO postings (token, resume_id) VALUES (?, ?)",
+                    ((token, resume_id) for token in features["tokens"]),
+                )
+        return resume_id, False
+
+    def delete(self, resume_id: str) -> bool:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM postings WHERE resume_id = ?", (resume_id,))
+            return self._conn.execute("DELETE FROM resumes WHERE id = ?", (resume_id,)).rowcount > 0
+
+    def get(self, resume_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, filename, pages, structure, structure_score, created_at, text FROM resumes WHERE id = ?",
+                (resume_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0], "filename": row[1], "pages": row[2], "structure": json.loads(row[3]),
+            "structure score": row[4], "created_at": row[5], "text": row[6],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            resumes, stale = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(features_version != ?), 0) FROM resumes", (FEATURES_VERSION,)
+            ).fetchone()
+            postings = self._conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+        return {"resumes": resumes, "stale_resumes": stale, "postings": postings, "features_version": FEATURES_VERSION}
+
+    def _postings(self, tokens: List[str]) -> Dict[str, Set[str]]:
+        lists: Dict[str, Set[str]] = defaultdict(set)
+        for batch in _batches(tokens):
+            placeholders = ",".join("?" * len(batch))
+            for token, resume_id in self._conn.execute(
+                f"SELECT token, resume_id FROM postings WHERE token IN ({placeholders})", batch
+            ):
+                lists[token].add(resume_id)
+        return lists
+
+    def _structure_scores(self, resume_ids: List[str]) -> Dict[str, Tuple[str, float]]:
+        rows = {}
+        for batch in _batches(resume_ids):
+            placeholders = ",".join("?" * len(batch))
+            for resume_id, filename, score in self._conn.execute(
+                f"SELECT id, filename, structure_score FROM resumes WHERE id IN ({placeholders})", batch
+            ):
+                rows[resume_id] = (filename, score)
+        return rows
+
+    def _all_ids(self) -> Set[str]:
+        return {row[0] for row in self._conn.execute("SELECT id FROM resumes")}
+
+    def _text(self, resume_id: str) -> str:
+        row = self._conn.execute("SELECT text FROM resumes WHERE id = ?", (resume_id,)).fetchone()
+        return row[0] if row is not None else ""
+
+    def rank(self, skills: Iterable[str], k: int) -> List[Dict[str, Any]]:
+        """
+        Top-k resumes for a JD's skills, scored like the analyzer: keyword
+        score = matched / required skills, with the matches found by
+        SkillMatcher in the stored text, combined with the stored structure
+        score by atsAanalyzer.combined_score. The posting lists bound how many
+        skills each resume can match; only resumes whose bound can still
+        reach the top k have their text matched.
+        """
+        skills = sorted(set(skills))
+        matcher = skill_matcher.get_matcher(skills)
+        words_of = {term: word_tokens(term) for forms in matcher.surface_forms.values() for term in forms}
+
+        def overall(matches: int, structure_score: float) -> float:
+            # A JD without skills scores 0 on keywords, as in the analyzer
+            return atsAanalyzer.combined_score(matches / len(skills) * 100 if skills else 0.0, structure_score)
+
+        with self._lock:
+            postings = self._postings(sorted(set().union(*words_of.values())))
+            everyone = None
+            possible: Dict[str, int] = defaultdict(int)
+            for forms in matcher.surface_forms.values():
+                resume_ids: Set[str] = set()
+                for term in forms:
+                    if words_of[term]:
+                        resume_ids |= set.intersection(*(postings.get(word, set()) for word in words_of[term]))
+                    else:
+                        # No word characters to look up (e.g. "++"): any resume may match
+                        everyone = self._all_ids() if everyone is None else everyone
+                        resume_ids |= everyone
+                for resume_id in resume_ids:
+                    possible[resume_id] += 1
+
+            candidates = self._structure_scores(list(possible))
+            # Resumes matching no skill can still make the top k on structure alone
+            for resume_id, filename, score in self._conn.execute(
+                "SELECT id, filename, structure_score FROM resumes ORDER BY structure_score DESC LIMIT ?", (k,)
+            ):
+                candidates.setdefault(resume_id, (filename, score))
+
+            # Best bound first; stop at the first resume whose bound cannot beat the k-th verified score
+            bounds = sorted(
+                ((overall(possible.get(resume_id, 0), score), resume_id) for resume_id, (_, score) in candidates.items()),
+                reverse=True,
+            )
+            found: Dict[str, List[str]] = {}
+            top: List[Tuple[float, str]] = []
+            for bound in bounds:
+                if len(top) >= k and bound < top[0]:
+                    break
+                resume_id = bound[1]
+                found[resume_id] = matcher.match(self._text(resume_id))["found"] if possible.get(resume_id) else []
+                entry = (overall(len(found[resume_id]), candidates[resume_id][1]), resume_id)
+                if len(top) < k:
+                    heapq.heappush(top, entry)
+                else:
+                    heapq.heappushpop(top, entry)
+
+        results = []
+        for overall_score, resume_id in sorted(top, reverse=True):
+            structure_score = candidates[resume_id][1]
+            keyword_score = len(found[resume_id]) / len(skills) * 100 if skills else 0.0
+            results.append({
+                "id": resume_id,
+                "filename": candidates[resume_id][0],
+                "key words matched": found[resume_id],
+                "keyword missing": [skill for skill in skills if skill not in found[resume_id]],
+                "score": {
+                    "overall score": round(overall_score, 2),
+                    "structure score": round(structure_score, 2),
+                    "keyword score": round(keyword_score, 2),
+                },
+            })
+        return results
+
+
+_index: Optional[ResumeIndex] = None
+
+
+def get_index() -> ResumeIndex:
+    """Opens the index on first use, so importing this module creates no file."""
+    global _index
+    if _index is None:
+        _index = ResumeIndex(RESUME_INDEX_PATH)
+    return _index
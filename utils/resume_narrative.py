@@ -0,0 +1,187 @@
+import google.generativeai as genai
+import hashlib
+import os
+from typing import AsyncIterator, Optional
+from utils import gemini_client, metrics, prompt_builder, schemas
+
+# Model that writes the human-readable resume analysis
+NARRATIVE_MODEL_NAME = 'gemini-2.5-pro'
+
+# Static instructions. They form the start of every narrative prompt and the
+# per-request data is appended after them, so the API's implicit prefix
+# caching can reuse this part across requests.
+narrative_instructions = """
+You are an expert software developer resume analyst with 10+ years of experience in technical recruiting and ATS optimization. 
+
+You will be given a JSON analysis of a resume (under RESUME ANALYSIS DATA) and the resume text (under RESUME TEXT).
+
+Provide a comprehensive analysis in the following JSON structure:
+
+{
+  "resumeAnalysis": {
+    "overallAssessment": "A comprehensive 3-4 sentence summary of the resume's current state, highlighting major strengths and critical weaknesses",
+    "detailedBreakdown": {
+      "atsCompatibilityScore": {
+        "score": <number between 0-100>,
+        "analysis": "Detailed explanation of why this score was given and what it means for ATS parsing",
+        "recommendation": "Specific actionable steps to improve ATS compatibility"
+      },
+      "keywordAnalysis": {
+        "matchPercentage": <percentage of keywords matched>,
+        "missingKeywords": ["keyword1", "keyword2", "keyword3"],
+        "analysis": "Explanation of keyword gaps and their impact",
+        "recommendation": "Specific guidance on where and how to add missing keywords with examples"
+      },
+      "impactAndQuantification": {
+        "quantifiedResults": <number of metrics found in resume>,
+        "analysis": "Assessment of how well achievements are quantified",
+        "recommendation": "Guidance on adding metrics using STAR/XYZ method with examples"
+      },
+      "formattingAndReadability": {
+        "issues": ["issue1", "issue2", "issue3"],
+        "analysis": "Explanation of formatting problems and their impact",
+        "recommendation": "Step-by-step formatting improvements"
+      },
+      "grammarAndSpelling": {
+        "errorCount": <estimated number of errors>,
+        "analysis": "Assessment of language quality",
+        "recommendation": "Proofreading and correction guidance"
+      },
+      "structureAndContent": {
+        "skillsSection": "Analysis of the skills section organization and completeness",
+        "projectsSection": "Analysis of projects section and suggestions",
+        "recommendations": ["recommendation1", "recommendation2"]
+      }
+    },
+    "summaryOfKeyRecommendations": {
+      "rectifyFormattingAndProofread": {
+        "priority": "Critical|High|Medium",
+        "action": "Detailed action to take"
+      },
+      "aggressivelyOptimizeKeywords": {
+        "priority": "Critical|High|Medium",
+        "action": "Detailed action to take"
+      },
+      "quantifyAllAchievements": {
+        "priority": "Critical|High|Medium",
+        "action": "Detailed action to take"
+      },
+      "restructureSkillsAndProjects": {
+        "priority": "Critical|High|Medium",
+        "action": "Detailed action to take"
+      }
+    }
+  }
+}
+
+Important guidelines:
+1. Base ATS score on the structure score from the JSON analysis
+2. Use the "keyword missing" array to populate missingKeywords
+3. Calculate keyword match percentage from keywords matched vs total keywords
+4. Be specific and actionable in all recommendations
+5. Use proper priority levels (Critical for urgent issues, High for important, Medium for nice-to-have)
+6. Provide concrete examples in recommendations
+7. Return ONLY valid JSON, no additional text
+"""
+
+NARRATIVE_PROMPT_VERSION = hashlib.sha256(narrative_instructions.encode("utf-8")).hexdigest()[:12]
+
+
+def build_narrative_prompt(resume_text: str, analysis_result_json: dict) -> str:
+    """
+    Static instructions + compact analysis JSON + resume text, with the
+    resume text trimmed so the prompt fits prompt_builder.PROMPT_TOKEN_BUDGET.
+    """
+    analysis_json = prompt_builder.compact_json(analysis_result_json)
+    fixed_tokens = prompt_builder.estimate_tokens(narrative_instructions) + prompt_builder.estimate_tokens(analysis_json)
+    resume_budget = max(prompt_builder.PROMPT_TOKEN_BUDGET - fixed_tokens - 16, prompt_builder.MIN_RESUME_TOKENS)
+    resume_text, truncated = prompt_builder.fit_to_budget(resume_text, resume_budget)
+    if truncated:
+        metrics.PROMPT_TRUNCATIONS.inc(model=NARRATIVE_MODEL_NAME)
+    return f"""{narrative_instructions}
+# RESUME ANALYSIS DATA
+{analysis_json}
+
+# RESUME TEXT
+{resume_text}
+"""
+
+
+def _build_prompt(resume_text: str, analysis_result_json: dict) -> str:
+    prompt = build_narrative_prompt(resume_text, analysis_result_json)
+    metrics.PROMPT_TOKENS.observe(prompt_builder.estimate_tokens(prompt), model=NARRATIVE_MODEL_NAME)
+    return prompt
+
+
+def _get_model():
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY environment variable is not set.")
+    
+    return gemini_client.get_model(NARRATIVE_MODEL_NAME, api_key)
+
+
+def _generation_config() -> genai.types.GenerationConfig:
+    return genai.types.GenerationConfig(
+        temperature=0.1,
+        response_mime_type="application/json"  # Force JSON output
+    )
+
+
+async def generate_narrative(resume_text: str, analysis_result_json: dict, deadline: Optional[float] = None) -> dict:
+    """
+    Asks Gemini Pro for the detailed resume analysis, giving up after
+    deadline seconds (GEMINI_DEADLINE_SECONDS by default).
+    Returns the parsed and validated narrative (see parse_narrative).
+    """
+    model = _get_model()
+    prompt = _build_prompt(resume_text, analysis_result_json)
+    try:
+        gemini_response = await gemini_client.call(
+            NARRATIVE_MODEL_NAME,
+            lambda: model.generate_content_async(prompt, generation_config=_generation_config()),
+            deadline=deadline,
+        )
+    except Exception as e:
+        metrics.record_gemini_error(NARRATIVE_MODEL_NAME, e)
+        raise
+    metrics.record_gemini_response(NARRATIVE_MODEL_NAME, gemini_response)
+    return parse_narrative(gemini_response.text)
+
+
+async def stream_narrative(resume_text: str, analysis_result_json: dict) -> AsyncIterator[str]:
+    """
+    Same request as generate_narrative, but yields the model output
+    text incrementally as Gemini produces it.
+    """
+    model = _get_model()
+    prompt = _build_prompt(resume_text, analysis_result_json)
+    try:
+        # The concurrency slot is held until the whole stream has been read
+        async with gemini_client.stream(
+            NARRATIVE_MODEL_NAME,
+            lambda: model.generate_content_async(prompt, generation_config=_generation_config(), stream=True)
+        ) as gemini_response:
+            async for chunk in gemini_response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks that only carry finish/safety metadata have no text parts
+                    continue
+                if text:
+                    yield text
+    except Exception as e:
+        metrics.record_gemini_error(NARRATIVE_MODEL_NAME, e)
+        raise
+    # Usage metadata is complete once the stream has been consumed
+    metrics.record_gemini_response(NARRATIVE_MODEL_NAME, gemini_response)
+
+
+def parse_narrative(narrative_text: str) -> dict:
+    """
+    Parses the model output into a dict shaped like schemas.Narrative,
+    repairing common JSON slips (fences, trailing commas, truncation).
+    Raises schemas.ModelOutputError (a ValueError) when the text cannot be
+    repaired or validated.
+    """
+    return schemas.parse_model_output(narrative_text, schemas.Narrative, NARRATIVE_MODEL_NAME)
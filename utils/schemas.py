@@ -0,0 +1,279 @@
+import re
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
+
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, model_validator
+
+from utils import json_repair, metrics
+
+# Bump whenever a schema below changes; part of the JD and analysis cache keys
+SCHEMA_VERSION = "1"
+
+
+class ModelOutputError(ValueError):
+    """Model output that could not be repaired into valid JSON or does not fit its schema."""
+
+# --- Lenient field types ---
+# Model output is coerced into shape rather than rejected for small slips:
+# "85%" for a number, a bare string for a list, "critical" for "Critical".
+
+def _number(value: Any) -> Any:
+    if isinstance(value, str):
+        match = re.search(r"-?\d+(?:\.\d+)?", value)
+        return float(match.group(0)) if match else None
+    return value
+
+
+def _percent(value: Any) -> Any:
+    value = _number(value)
+    return min(max(value, 0.0), 100.0) if isinstance(value, (int, float)) else value
+
+
+def _count(value: Any) -> Any:
+    value = _number(value)
+    return int(value) if isinstance(value, float) else value
+
+
+def _text(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return " ".join(str(item) for item in value)
+    return value
+
+
+def _str_list(value: Any) -> Any:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if isinstance(value, list):
+        return [item if isinstance(item, str) else str(item) for item in value if item is not None]
+    return value
+
+
+def _priority(value: Any) -> Any:
+    # "Critical|High" (the prompt's placeholder echoed back) keeps the first
+    if isinstance(value, str):
+        value = value.split("|")[0].strip().capitalize()
+        return value if value in ("Critical", "High", "Medium") else "Medium"
+    return value
+
+
+Percent = Annotated[Optional[float], BeforeValidator(_percent)]
+Count = Annotated[Optional[int], BeforeValidator(_count)]
+Text = Annotated[str, BeforeValidator(_text)]
+StrList = Annotated[List[str], BeforeValidator(_str_list)]
+Priority = Annotated[Literal["Critical", "High", "Medium"], BeforeValidator(_priority)]
+
+
+class _Model(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class ErrorResult(_Model):
+    """A stage's {"error": ...} result, e.g. a PDF with too little text or an unparseable JD."""
+    error: str
+
+
+# --- Structured JD (sendGemini.system_prompt / local_structurer) ---
+
+class ExperienceYears(_Model):
+    min: Count = None
+    max: Count = None
+
+
+class Databases(_Model):
+    relational: StrList = []
+    nosql: StrList = []
+    in_memory: StrList = []
+    search_engines: StrList = []
+    graph: StrList = []
+    time_series: StrList = []
+
+
+class CloudPlatforms(_Model):
+    providers: StrList = []
+    aws_services: StrList = []
+    azure_services: StrList = []
+    gcp_services: StrList = []
+
+
+class DevOpsAndInfrastructure(_Model):
+    containerization: StrList = []
+    orchestration: StrList = []
+    ci_cd: StrList = []
+    iac: StrList = []
+    monitoring: StrList = []
+    version_control: StrList = []
+
+
+class TestingFrameworks(_Model):
+    unit_testing: StrList = []
+    integration_testing: StrList = []
+    e2e_testing: StrList = []
+    performance_testing: StrList = []
+
+
+class StructuredJD(_Model):
+    # Categories the model invents are kept: their skills still count
+    model_config = ConfigDict(extra="allow")
+
+    job_title: Text = ""
+    experience_years: ExperienceYears = ExperienceYears()
+    programming_languages: StrList = []
+    frontend_frameworks: StrList = []
+    backend_frameworks: StrList = []
+    databases: Databases = Databases()
+    cloud_platforms: CloudPlatforms = CloudPlatforms()
+    devops_and_infrastructure: DevOpsAndInfrastructure = DevOpsAndInfrastructure()
+    messaging_and_streaming: StrList = []
+    testing_frameworks: TestingFrameworks = TestingFrameworks()
+    build_and_package_managers: StrList = []
+    apis_and_protocols: StrList = []
+    markup_and_styling: StrList = []
+    architectural_patterns: StrList = []
+    methodologies: StrList = []
+    security: StrList = []
+    operating_systems: StrList = []
+    data_processing: StrList = []
+    machine_learning: StrList = []
+    mobile_development: StrList = []
+    soft_skills: StrList = []
+    certifications: StrList = []
+    other_technical_skills: StrList = []
+
+
+# --- Structural/keyword result (atsAanalyzer.analyze_with_layout) ---
+
+class Scores(_Model):
+    overall_score: float = Field(alias="overall score")
+    structure_score: float = Field(alias="structure score")
+    keyword_score: float = Field(alias="keyword score")
+
+
+class AnalysisResult(_Model):
+    column: bool
+    simple_fonts: bool = Field(alias="simple fonts")
+    no_images: bool = Field(alias="no images")
+    clear_section_header: bool = Field(alias="clear section header")
+    poor_text_alignment: bool = Field(alias="poor text alignment")
+    no_tables: bool = Field(alias="no tables")
+    keywords_matched: List[str] = Field(alias="key words matched")
+    keywords_missing: List[str] = Field(alias="keyword missing")
+    score: Scores
+
+
+
+
+# --- Narrative (resume_narrative.narrative_instructions) ---
+
+class ScoredSection(_Model):
+    score: Percent = None
+    analysis: Text = ""
+    recommendation: Text = ""
+
+
+class KeywordAnalysis(_Model):
+    matchPercentage: Percent = None
+    missingKeywords: StrList = []
+    analysis: Text = ""
+    recommendation: Text = ""
+
+
+class ImpactAndQuantification(_Model):
+    quantifiedResults: Count = None
+    analysis: Text = ""
+    recommendation: Text = ""
+
+
+class FormattingAndReadability(_Model):
+    issues: StrList = []
+    analysis: Text = ""
+    recommendation: Text = ""
+
+
+class GrammarAndSpelling(_Model):
+    errorCount: Count = None
+    analysis: Text = ""
+    recommendation: Text = ""
+
+
+class StructureAndContent(_Model):
+    skillsSection: Text = ""
+    projectsSection: Text = ""
+    recommendations: StrList = []
+
+
+class DetailedBreakdown(_Model):
+    atsCompatibilityScore: ScoredSection = ScoredSection()
+    keywordAnalysis: KeywordAnalysis = KeywordAnalysis()
+    impactAndQuantification: ImpactAndQuantification = ImpactAndQuantification()
+    formattingAndReadability: FormattingAndReadability = FormattingAndReadability()
+    grammarAndSpelling: GrammarAndSpelling = GrammarAndSpelling()
+    structureAndContent: StructureAndContent = StructureAndContent()
+
+
+class Recommendation(_Model):
+    priority: Priority = "Medium"
+    action: Text = ""
+
+
+class KeyRecommendations(_Model):
+    rectifyFormattingAndProofread: Recommendation = Recommendation()
+    aggressivelyOptimizeKeywords: Recommendation = Recommendation()
+    quantifyAllAchievements: Recommendation = Recommendation()
+    restructureSkillsAndProjects: Recommendation = Recommendation()
+
+
+class ResumeAnalysis(_Model):
+    overallAssessment: Text
+    detailedBreakdown: DetailedBreakdown = DetailedBreakdown()
+    summaryOfKeyRecommendations: KeyRecommendations = KeyRecommendations()
+
+
+class Narrative(_Model):
+    resumeAnalysis: ResumeAnalysis
+
+    @model_validator(mode="before")
+    @classmethod
+    def _unwrapped(cls, data: Any) -> Any:
+        # The model sometimes drops the top-level "resumeAnalysis" wrapper
+        if isinstance(data, dict) and "resumeAnalysis" not in data and "overallAssessment" in data:
+            return {"resumeAnalysis": data}
+        return data
+
+
+# --- Endpoint responses ---
+
+class Degradation(_Model):
+    stage: str
+    reason: str
+    fallback: str
+
+
+# ErrorResult is tried first: StructuredJD (all defaults, extras allowed) would accept an error dict too
+JDResult = Annotated[Union[ErrorResult, StructuredJD], Field(union_mode="left_to_right")]
+
+
+class AnalyseResponse(_Model):
+    result: Annotated[Union[ErrorResult, AnalysisResult], Field(union_mode="left_to_right")]
+    response: Optional[Narrative] = Field(None, description="Omitted (null) when the narrative stage was degraded")
+    degraded: bool = False
+    degradations: List[Degradation] = []
+
+
+def parse_model_output(text: str, model: type, model_name: str) -> Dict[str, Any]:
+    """
+    Parses and validates raw model output against a schema, once, where it
+    is received. Returns the normalized dict (by alias, so it matches what
+    the endpoints serve). Raises ModelOutputError when the output cannot
+    be repaired or does not fit the schema.
+    """
+    try:
+        data, repaired = json_repair.loads(text)
+        value = model.model_validate(data).model_dump(by_alias=True)
+    except ValueError as e:
+        metrics.MODEL_OUTPUTS.inc(model=model_name, outcome="invalid")
+        raise ModelOutputError(str(e)) from e
+    metrics.MODEL_OUTPUTS.inc(model=model_name, outcome="repaired" if repaired else "valid")
+    return value
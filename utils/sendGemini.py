@@ -1,12 +1,20 @@
 import google.generativeai as genai
-import json
+import hashlib
+import logging
 import os
 from typing import Dict, Any
 from dotenv import load_dotenv
+from utils import gemini_client, metrics, prompt_builder, schemas
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables from a .env file
 load_dotenv()
 
+# Model used to structure JD keywords. Bump it (or edit the prompt) and every
+# cached JD parse is invalidated, since both are part of the cache key.
+JD_MODEL_NAME = 'gemini-2.0-flash'
+
 system_prompt = """
 # System Prompt: Advanced Job Description Parser for Software Engineering Roles
 
@@ -62,68 +70,94 @@ Return ONLY a single valid JSON object with no additional text, markdown formatt
 
 """
 
-def parse_with_gemini(system_prompt: str, raw_keywords: Dict[str, Any], temperature: float = 0.1) -> Dict[str, Any]:
-    """
-    Parses raw keywords from a job description using the Gemini API.
-
-    Args:
-        system_prompt: The detailed instructions for the AI on how to parse the data.
-        raw_keywords: A dictionary containing the messy keywords extracted from the JD.
-        temperature: The creativity level for the model's response (lower is more deterministic).
+SYSTEM_PROMPT_VERSION = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:12]
 
-    Returns:
-        A structured dictionary with the parsed job description data.
-    """
-    
+def _get_model():
     # Get the API key from environment variables
     api_key = os.getenv('GEMINI_API_KEY')
     if not api_key:
         raise ValueError("GEMINI_API_KEY not found. Please set it in your .env file.")
     
-    # Configure the Gemini client
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.0-flash')
-    
-    # --- THIS IS THE CORRECTED PART ---
-    # Convert the raw_keywords dictionary to a JSON string to include in the prompt
-    keywords_json_string = json.dumps(raw_keywords, indent=2)
+    # Configure the Gemini client (SDK or REST, see gemini_client)
+    return gemini_client.get_model(JD_MODEL_NAME, api_key)
+
+
+def _build_prompt(system_prompt: str, raw_keywords: Dict[str, Any]) -> str:
+    # Convert the raw_keywords dictionary to a compact JSON string to include in the prompt
+    keywords_json_string = prompt_builder.compact_json(raw_keywords)
     
     # Combine the instructions (system_prompt) with the actual data to be processed.
     # A clear separator helps the model understand its task.
-    full_prompt = f"""{system_prompt}
+    return f"""{system_prompt}
 
 # INPUT DATA TO PARSE
 Now, process the following raw JSON data based on the rules you were given:
 
 {keywords_json_string}
 """
-    
-    # Generate the response from the model
-    response = model.generate_content(
-        full_prompt,
-        generation_config=genai.types.GenerationConfig(
-            temperature=temperature,
-            max_output_tokens=4096,  # Adjust if needed for very long JDs
-        )
+
+
+def _generation_config(temperature: float) -> genai.types.GenerationConfig:
+    return genai.types.GenerationConfig(
+        temperature=temperature,
+        max_output_tokens=4096,  # Adjust if needed for very long JDs
     )
-    
-    # Extract and clean the response text
-    response_text = response.text.strip()
-    
-    # Remove markdown code block formatting (e.g., ```json ... ```) if present
-    if response_text.startswith('```'):
-        start_idx = response_text.find('{')
-        end_idx = response_text.rfind('}')
-        if start_idx != -1 and end_idx != -1:
-            response_text = response_text[start_idx:end_idx + 1]
-    
-    # Parse the cleaned text into a Python dictionary and return it
+
+
+def _parse_response_text(response_text: str) -> Dict[str, Any]:
+    # Repair and validate against the schema in system_prompt; every key is present afterwards
     try:
-        return json.loads(response_text)
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON from model response: {e}")
-        print(f"Raw response from model:\n{response_text}")
+        return schemas.parse_model_output(response_text, schemas.StructuredJD, JD_MODEL_NAME)
+    except ValueError as e:
+        logger.error("Error decoding JSON from model response: %s\nRaw response from model:\n%s", e, response_text)
         return {"error": "Failed to parse model response as JSON."}
 
 
+def parse_with_gemini(system_prompt: str, raw_keywords: Dict[str, Any], temperature: float = 0.1) -> Dict[str, Any]:
+    """
+    Parses raw keywords from a job description using the Gemini API.
+
+    Args:
+        system_prompt: The detailed instructions for the AI on how to parse the data.
+        raw_keywords: A dictionary containing the messy keywords extracted from the JD.
+        temperature: The creativity level for the model's response (lower is more deterministic).
+
+    Returns:
+        A structured dictionary with the parsed job description data.
+    """
+    model = _get_model()
+    prompt = _build_prompt(system_prompt, raw_keywords)
+    metrics.PROMPT_TOKENS.observe(prompt_builder.estimate_tokens(prompt), model=JD_MODEL_NAME)
+    try:
+        response = model.generate_content(
+            prompt,
+            generation_config=_generation_config(temperature)
+        )
+    except Exception as e:
+        metrics.record_gemini_error(JD_MODEL_NAME, e)
+        raise
+    metrics.record_gemini_response(JD_MODEL_NAME, response)
+    return _parse_response_text(response.text)
+
+
+async def parse_with_gemini_async(system_prompt: str, raw_keywords: Dict[str, Any], temperature: float = 0.1) -> Dict[str, Any]:
+    """
+    Non-blocking variant of parse_with_gemini for use inside request handlers.
+    Same arguments and return value.
+    """
+    model = _get_model()
+    prompt = _build_prompt(system_prompt, raw_keywords)
+    metrics.PROMPT_TOKENS.observe(prompt_builder.estimate_tokens(prompt), model=JD_MODEL_NAME)
+    try:
+        response = await gemini_client.call(
+            JD_MODEL_NAME,
+            lambda: model.generate_content_async(prompt, generation_config=_generation_config(temperature))
+        )
+    except Exception as e:
+        metrics.record_gemini_error(JD_MODEL_NAME, e)
+        raise
+    metrics.record_gemini_response(JD_MODEL_NAME, response)
+    return _parse_response_text(response.text)
+
+
 # This block runs when the script is executed directly
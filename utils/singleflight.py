@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from utils import metrics
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller starts the
+    coroutine, later callers await the same task instead of repeating the
+    work. Every waiter gets the same result or exception. A waiter being
+    cancelled only cancels the shared work once nobody else is waiting on it.
+    Nothing is remembered after the call finishes; caching is the caller's job.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn(*args, **kwargs)))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            metrics.SINGLEFLIGHT_CALLS.inc(group=self.name, role="leader")
+        else:
+            metrics.SINGLEFLIGHT_CALLS.inc(group=self.name, role="follower")
+
+        call.waiters += 1
+        try:
+            # shield: one waiter going away must not cancel the others' result
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every waiter was cancelled; later callers start afresh
+                self._forget(key, call)
+                call.task.cancel()
@@ -0,0 +1,107 @@
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+from utils import skill_taxonomy
+
+# Alias -> canonical spelling, from the curated skill taxonomy. Applied to
+# both sides: a JD asking for "Kubernetes" is satisfied by "k8s" in the
+# resume and vice versa.
+SKILL_SYNONYMS = skill_taxonomy.ALIASES
+
+
+_WORD_CHAR = re.compile(r"\w")
+
+
+def _canonical(term: str) -> str:
+    return SKILL_SYNONYMS.get(term, term)
+
+
+class SkillMatcher:
+    """
+    Matches a fixed set of skills against text in a single regex pass.
+
+    All skills and their synonyms are compiled into one alternation inside a
+    lookahead, so every start position is tested once and overlapping
+    matches (e.g. "react" inside "react native") are still reported, with the
+    same word-boundary rules as the old per-skill `(?<!\\w)skill(?!\\w)` search.
+    """
+
+    def __init__(self, skills: Iterable[str]):
+        self.skills = sorted(set(skills))
+
+        # Every lowercase surface form that satisfies a required skill:
+        # the skill itself, its canonical spelling and all aliases of that.
+        aliases: Dict[str, Set[str]] = {}
+        for alias, canonical in SKILL_SYNONYMS.items():
+            aliases.setdefault(canonical, set()).add(alias)
+
+        terms: Dict[str, Set[str]] = {}
+        for skill in self.skills:
+            canonical = _canonical(skill.lower())
+            for term in {skill.lower(), canonical} | aliases.get(canonical, set()):
+                terms.setdefault(term, set()).add(skill)
+        self._terms: Dict[str, Tuple[str, ...]] = {
+            term: tuple(sorted(owners)) for term, owners in terms.items()
+        }
+        # skill -> the lowercase terms any of which satisfies it
+        self.surface_forms: Dict[str, Tuple[str, ...]] = {skill: () for skill in self.skills}
+        for term, owners in self._terms.items():
+            for skill in owners:
+                self.surface_forms[skill] += (term,)
+
+        # The regex reports only the longest term at a position; shorter terms
+        # that also end on a word boundary there are precomputed per term.
+        self._nested: Dict[str, Tuple[str, ...]] = {
+            term: tuple(
+                other for other in self._terms
+                if len(other) < len(term)
+                and term.startswith(other)
+                and not _is_word_char(term[len(other)])
+            )
+            for term in self._terms
+        }
+
+        longest_first = sorted(self._terms, key=len, reverse=True)
+        self._pattern = None
+        if longest_first:
+            alternation = "|".join(re.escape(term) for term in longest_first)
+            self._pattern = re.compile(r"(?=(?<!\w)(" + alternation + r")(?!\w))")
+
+    def scan(self, text: str) -> Dict[str, List[Tuple[int, int]]]:
+        """Maps each matched skill to the (start, end) offsets of its hits in text."""
+        offsets: Dict[str, List[Tuple[int, int]]] = {}
+        if self._pattern is None:
+            return offsets
+
+        haystack = text.lower().replace("\n", " ")
+        for match in self._pattern.finditer(haystack):
+            start = match.start(1)
+            term = match.group(1)
+            for hit in (term,) + self._nested[term]:
+                for skill in self._terms[hit]:
+                    offsets.setdefault(skill, []).append((start, start + len(hit)))
+        return offsets
+
+    def match(self, text: str) -> dict:
+        """Returns sorted found/missing skills plus match offsets."""
+        offsets = self.scan(text)
+        return {
+            "found": [skill for skill in self.skills if skill in offsets],
+            "missing": [skill for skill in self.skills if skill not in offsets],
+            "offsets": offsets,
+        }
+
+
+def _is_word_char(char: str) -> bool:
+    return _WORD_CHAR.match(char) is not None
+
+
+@lru_cache(maxsize=256)
+def _matcher_for(skills: FrozenSet[str]) -> SkillMatcher:
+    return SkillMatcher(skills)
+
+
+def get_matcher(skills: Iterable[str]) -> SkillMatcher:
+    """Returns a compiled matcher, reused for as long as the same JD skill set recurs."""
+    return _matcher_for(frozenset(skills))
@@ -0,0 +1,39 @@
+import json
+import os
+from typing import Dict, List, Tuple
+
+from utils import cache
+
+# Curated skill taxonomy: "category.subcategory" -> {canonical name: [aliases]}.
+# Category paths mirror the JD schema described in sendGemini.system_prompt.
+TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "skill_taxonomy.json"),
+)
+
+
+def _load(path: str) -> Tuple[Dict[str, Dict[str, List[str]]], str]:
+    with open(path, "rb") as f:
+        raw = f.read()
+    return json.loads(raw), cache.content_hash(raw)[:12]
+
+
+TAXONOMY, TAXONOMY_VERSION = _load(TAXONOMY_PATH)
+
+# canonical name -> category path, e.g. "PostgreSQL" -> "databases.relational"
+CATEGORY_OF: Dict[str, str] = {
+    canonical: category
+    for category, entries in TAXONOMY.items()
+    for canonical in entries
+}
+
+# lowercase alias -> lowercase canonical name, e.g. "k8s" -> "kubernetes"
+ALIASES: Dict[str, str] = {
+    alias.lower(): canonical.lower()
+    for entries in TAXONOMY.values()
+    for canonical, aliases in entries.items()
+    for alias in aliases
+}
+
+# lowercase canonical name -> canonical spelling, e.g. "kubernetes" -> "Kubernetes"
+CANONICAL_NAMES: Dict[str, str] = {canonical.lower(): canonical for canonical in CATEGORY_OF}
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Any, Dict
+
+import fitz  # PyMuPDF
+
+from utils import executor, metrics
+
+logger = logging.getLogger(__name__)
+
+# --- Warmup inputs ---
+# Small enough to cost milliseconds, but touching every stage a real request
+# does: PDF parsing, spaCy, the skill matchers and the prompt builder.
+WARMUP_JD = (
+    "Senior Backend Engineer. 5+ years of experience building APIs with Python, "
+    "FastAPI and PostgreSQL. Docker, Kubernetes and AWS required; Redis, Kafka "
+    "and CI/CD pipelines are a plus. Strong communication skills."
+)
+
+WARMUP_RESUME_LINES = (
+    "Jane Doe",
+    "jane.doe@example.com | +1 555 0100",
+    "EXPERIENCE",
+    "Backend Engineer, Example Corp (2019 - 2024)",
+    "Built REST APIs in Python and FastAPI backed by PostgreSQL and Redis.",
+    "Deployed services with Docker and Kubernetes on AWS.",
+    "EDUCATION",
+    "B.Sc. Computer Science",
+    "SKILLS",
+    "Python, FastAPI, PostgreSQL, Docker, Kubernetes, AWS, Git",
+)
+
+
+@lru_cache(maxsize=1)
+def warmup_pdf() -> bytes:
+    """One-page PDF resume built in memory."""
+    with fitz.open() as doc:
+        page = doc.new_page()
+        for number, line in enumerate(WARMUP_RESUME_LINES):
+            page.insert_text((72, 72 + number * 18), line, fontsize=11, fontname="helv")
+        return doc.tobytes()
+
+
+# --- Readiness ---
+class WorkerState:
+    """Liveness/readiness of this worker process, reported by /health/*."""
+
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+        self.warmup_seconds = None
+        self.error = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready and not self.draining,
+            "draining": self.draining,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error,
+        }
+
+
+state = WorkerState()
+
+
+def preload() -> None:
+    """
+    Loads spaCy, the taxonomy and the compiled skill matchers into this
+    process. The pre-fork server calls it in the parent so workers share the
+    pages copy-on-write instead of each loading its own copy.
+    """
+    from utils import jd_keyword_extractor, local_structurer, skill_matcher, skill_taxonomy
+
+    jd_keyword_extractor.get_nlp()
+    skill_matcher.get_matcher(skill_taxonomy.CANONICAL_NAMES.values())
+    local_structurer.structure_keywords({"keywords": [], "experience_requirements": []})
+
+
+def run_pipeline() -> float:
+    """
+    Runs the warmup JD and resume through the same stages as /ats/analyse,
+    minus Gemini and the caches. Returns the seconds it took.
+    """
+    from utils import atsAanalyzer, jd_keyword_extractor, local_structurer, resume_narrative
+
+    start = time.perf_counter()
+    parsed_jd = local_structurer.structure_keywords(jd_keyword_extractor.extract_keywords(WARMUP_JD))
+    analysis = atsAanalyzer.analyze_pdf_bytes(warmup_pdf(), parsed_jd)
+    resume_narrative.build_narrative_prompt(analysis["prompt_text"], analysis["result"])
+    return time.perf_counter() - start
+
+
+async def warm_up() -> None:
+    """
+    Warms this worker before it takes traffic: one pipeline run per CPU
+    executor worker, submitted together so every pool process starts and
+    runs it. Marks the worker ready on success; a failure is logged and
+    leaves it unready.
+    """
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(executor.run_cpu(run_pipeline) for _ in range(executor.EXECUTOR_WORKERS)))
+    except Exception as e:
+        logger.exception("Worker warmup failed")
+        state.error = str(e)
+        return
+    state.warmup_seconds = round(time.perf_counter() - start, 3)
+    state.ready = True
+    metrics.WORKER_WARMUP_SECONDS.set(state.warmup_seconds)
+    metrics.WORKER_READY.set(1)
+
+
+def drain() -> None:
+    """Reports the worker unready while it shuts down."""
+    state.draining = True
+    metrics.WORKER_READY.set(0)